@@ -0,0 +1,268 @@
+"""
+VOICE RUNNER PRO - Mixer software su sounddevice
+Somma le voci attive nel callback di un OutputStream (buffer float32
+preallocati, guadagno/pan vettoriali) e fa partire ogni voce a un offset di
+campione preciso, ricavato dal tempo di gioco (perf_counter) e dal clock DAC
+dello stream. Alternativa opzionale al mixer SDL di pygame.
+Qui anche il VoiceManager degli effetti (priorità, cooldown, polifonia), usato
+con entrambi i mixer.
+"""
+
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+import voice_audio
+from voice_audio import AudioCallbackStats, load_sounddevice
+
+MIXER_SAMPLE_RATE = 44100
+MIXER_BLOCKSIZE = 256            # ~5.8 ms per callback
+MIXER_MAX_VOICES = 16
+# Ritardo fisso tra l'istante di gioco e l'uscita: assorbe il jitter del frame
+# e mantiene esatti gli intervalli tra suoni schedulati nello stesso frame
+MIXER_SCHEDULE_BLOCKS = 2
+
+def pan_gains(gain, pan):
+    """Guadagni (sinistra, destra) a potenza costante, pan in [-1, 1]"""
+    angle = (min(1.0, max(-1.0, pan)) + 1.0) * math.pi / 4
+    return gain * math.cos(angle) * math.sqrt(2), gain * math.sin(angle) * math.sqrt(2)
+
+# Voice manager degli effetti: chi suona quando le voci (canali SDL o del mixer) sono finite
+SFX_MAX_VOICES = 8               # Voci SFX simultanee (su 14 canali SDL non riservati)
+SFX_DEFAULT_RULE = {'priority': 2, 'cooldown': 0.0, 'max_voices': 4}
+SFX_VOICE_RULES = {
+    'beep':      {'priority': 1, 'cooldown': 0.15, 'max_voices': 1},   # Bordo schermo: ritriggerato ogni frame
+    'whoosh':    {'priority': 2, 'cooldown': 0.05, 'max_voices': 2},
+    'thunder':   {'priority': 3, 'cooldown': 0.5,  'max_voices': 1},
+    'ui':        {'priority': 4, 'cooldown': 0.05, 'max_voices': 2},
+    'boom':      {'priority': 4, 'cooldown': 0.2,  'max_voices': 1},
+    'levelup':   {'priority': 5, 'cooldown': 0.5,  'max_voices': 1},
+    'collision': {'priority': 5, 'cooldown': 0.3,  'max_voices': 1},
+}
+
+@dataclass
+class SfxVoice:
+    kind: str
+    priority: int
+    started: float
+    ends: float
+    volume: float
+
+class VoiceManager:
+    """Decide quale voce usa un effetto: libera, stessa categoria oltre il limite, o la meno importante"""
+
+    def __init__(self, voices=SFX_MAX_VOICES):
+        self.voices = [None] * voices
+        self.last_played = {}
+        self.played = 0
+        self.stolen = 0
+        self.dropped = {'cooldown': 0, 'busy': 0}
+
+    def resize(self, voices):
+        self.voices = (self.voices + [None] * voices)[:voices]
+
+    def active(self, now):
+        return sum(1 for voice in self.voices if voice is not None and voice.ends > now)
+
+    def allocate(self, kind, volume, length, now):
+        """Indice della voce da usare, o None se l'effetto va scartato"""
+        rule = SFX_VOICE_RULES.get(kind, SFX_DEFAULT_RULE)
+        if now - self.last_played.get(kind, -math.inf) < rule['cooldown']:
+            self.dropped['cooldown'] += 1
+            return None
+
+        playing = [(i, voice) for i, voice in enumerate(self.voices) if voice is not None and voice.ends > now]
+        same_kind = [(i, voice) for i, voice in playing if voice.kind == kind]
+        if len(same_kind) >= rule['max_voices']:
+            # Polifonia della categoria esaurita: si riusa la voce più vecchia della stessa categoria
+            slot = min(same_kind, key=lambda item: item[1].started)[0]
+        else:
+            busy = {i for i, _ in playing}
+            free = [i for i in range(len(self.voices)) if i not in busy]
+            if free:
+                slot = free[0]
+            else:
+                # Ruba la voce a priorità più bassa, poi la più silenziosa, poi la più vecchia
+                victims = [(i, voice) for i, voice in playing if voice.priority <= rule['priority']]
+                if not victims:
+                    self.dropped['busy'] += 1
+                    return None
+                slot = min(victims, key=lambda item: (item[1].priority, item[1].volume, item[1].started))[0]
+                self.stolen += 1
+
+        self.voices[slot] = SfxVoice(kind, rule['priority'], now, now + length, volume)
+        self.last_played[kind] = now
+        self.played += 1
+        return slot
+
+    def stats(self, now):
+        return {
+            'active': self.active(now),
+            'voices': len(self.voices),
+            'played': self.played,
+            'stolen': self.stolen,
+            'dropped': sum(self.dropped.values()),
+            'dropped_cooldown': self.dropped['cooldown'],
+            'dropped_busy': self.dropped['busy'],
+        }
+
+
+class SoftwareMixer:
+    """Voci mono float32 sommate in stereo nel callback audio; play() è lock-free (deque)"""
+
+    def __init__(self, sample_rate=MIXER_SAMPLE_RATE, blocksize=MIXER_BLOCKSIZE, max_voices=MIXER_MAX_VOICES):
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.max_voices = max_voices
+        self.schedule_delay = MIXER_SCHEDULE_BLOCKS * blocksize / sample_rate
+        self.stats = AudioCallbackStats(sample_rate)
+        self.stream = None
+
+        # Stato delle voci (scritto solo dal thread audio)
+        self.voice_data = [None] * max_voices
+        self.voice_start = np.zeros(max_voices, dtype=np.int64)    # Frame assoluto di partenza
+        self.voice_gains = np.zeros((max_voices, 2), dtype=np.float32)
+        self.voice_active = np.zeros(max_voices, dtype=bool)
+        self.frame_clock = 0                                       # Frame assoluto del prossimo blocco
+
+        self._commands = deque()
+        self._mix = np.zeros((blocksize, 2), dtype=np.float32)
+        self._scratch = np.zeros((blocksize, 2), dtype=np.float32)
+
+        # Contatori per l'overlay
+        self.active_voices = 0
+        self.late_starts = 0
+        self.steals = 0
+        self.output_latency_ms = 0.0
+
+    # === LATO GIOCO ===
+
+    def start(self, latency='low'):
+        """Apre l'OutputStream; False se sounddevice/PortAudio non c'è"""
+        try:
+            sd = load_sounddevice()
+            self.stream = sd.OutputStream(samplerate=self.sample_rate, channels=2, dtype='float32',
+                                          blocksize=self.blocksize, latency=latency, callback=self._callback)
+            self.stream.start()
+        except Exception as e:
+            print(f"⚠ Mixer sounddevice non disponibile: {e}")
+            self.stream = None
+            return False
+        voice_audio.hold_device_refresh(True)
+        self.output_latency_ms = self.stream.latency * 1000.0
+        return True
+
+    def close(self):
+        if self.stream is None:
+            return
+        try:
+            self.stream.stop()
+            self.stream.close()
+        except Exception:
+            pass
+        self.stream = None
+        voice_audio.hold_device_refresh(False)
+
+    @property
+    def running(self):
+        return self.stream is not None and self.stream.active
+
+    def play(self, data, gain=1.0, pan=0.0, at=None, slot=None):
+        """Accoda una voce (array mono float32); at = perf_counter dell'evento, None = subito.
+        slot sceglie la voce da usare (allocatore esterno), altrimenti libera o la più vecchia"""
+        self._commands.append(('play', data, pan_gains(gain, pan), at, slot))
+
+    def stop_all(self):
+        self._commands.append(('stop',))
+
+    # === LATO THREAD AUDIO ===
+
+    def _start_frame(self, at, time_info):
+        """Frame assoluto in cui far partire un evento avvenuto all'istante at (perf_counter)"""
+        if at is None:
+            return self.frame_clock
+        now = getattr(time_info, 'currentTime', 0.0)
+        dac = getattr(time_info, 'outputBufferDacTime', 0.0)
+        if not now:
+            return self.frame_clock
+        if not dac:
+            dac = now + self.output_latency_ms / 1000.0
+        # perf_counter -> clock dello stream, poi distanza dal primo campione di questo blocco
+        target = at + (now - time.perf_counter()) + self.schedule_delay
+        frame = self.frame_clock + int(round((target - dac) * self.sample_rate))
+        if frame < self.frame_clock:
+            self.late_starts += 1
+            return self.frame_clock
+        return frame
+
+    def _allocate(self):
+        free = np.flatnonzero(~self.voice_active)
+        if len(free):
+            return int(free[0])
+        # Nessuna voce libera: ruba quella partita per prima
+        self.steals += 1
+        return int(np.argmin(self.voice_start))
+
+    def _apply_commands(self, time_info):
+        while self._commands:
+            command = self._commands.popleft()
+            if command[0] == 'stop':
+                self.voice_active[:] = False
+                self.voice_data = [None] * self.max_voices
+                continue
+            _, data, gains, at, slot = command
+            if slot is None or not 0 <= slot < self.max_voices:
+                slot = self._allocate()
+            self.voice_data[slot] = data
+            self.voice_start[slot] = self._start_frame(at, time_info)
+            self.voice_gains[slot] = gains
+            self.voice_active[slot] = True
+
+    def render(self, frames, time_info=None):
+        """Mix di frames campioni (float32 stereo, buffer interno) e avanzamento del clock"""
+        if frames > len(self._mix):
+            self._mix = np.zeros((frames, 2), dtype=np.float32)
+            self._scratch = np.zeros((frames, 2), dtype=np.float32)
+        self._apply_commands(time_info)
+        mix = self._mix[:frames]
+        scratch = self._scratch
+        mix.fill(0.0)
+        clock = self.frame_clock
+
+        for slot in np.flatnonzero(self.voice_active):
+            data = self.voice_data[slot]
+            start = self.voice_start[slot]
+            offset = max(0, start - clock)
+            if offset >= frames:
+                continue
+            pos = clock + offset - start
+            n = min(frames - offset, len(data) - pos)
+            if n > 0:
+                np.multiply(data[pos:pos + n, None], self.voice_gains[slot], out=scratch[:n])
+                mix[offset:offset + n] += scratch[:n]
+            if pos + n >= len(data):
+                self.voice_active[slot] = False
+                self.voice_data[slot] = None
+
+        np.clip(mix, -1.0, 1.0, out=mix)
+        self.active_voices = int(self.voice_active.sum())
+        self.frame_clock = clock + frames
+        return mix
+
+    def _callback(self, outdata, frames, time_info, status):
+        t0 = time.perf_counter()
+        try:
+            if status:
+                self.stats.note_status(status)
+            outdata[:] = self.render(frames, time_info)
+            dac = getattr(time_info, 'outputBufferDacTime', 0.0)
+            now = getattr(time_info, 'currentTime', 0.0)
+            if dac and now:
+                self.output_latency_ms = (dac - now) * 1000.0
+        except Exception as e:
+            outdata.fill(0)
+            self.stats.note_error(e)
+        self.stats.note_duration(time.perf_counter() - t0, frames)
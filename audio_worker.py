@@ -0,0 +1,566 @@
+"""
+VOICE RUNNER PRO - Worker audio out-of-process
+Il worker possiede lo stream di input e fa tutta l'analisi (denoise, RMS, spettro,
+onset); il gioco legge per frame una piccola struct in shared memory protetta da
+seqlock, più il ring dei campioni per chi ne ha bisogno (pitch tracker).
+
+Avvio manuale (debug):  python audio_worker.py <shm_name> <sorgente> <profilo> <speed>
+"""
+
+import os
+import sys
+import time
+import threading
+import subprocess
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from voice_audio import (
+    MIC_SAMPLE_RATE, MIC_RING_SECONDS, MIC_FRAME_SAMPLES, AUDIO_STATUS_FLAGS, CALLBACK_HIST_EDGES,
+    CAPTURE_PROFILES, CAPTURE_PROFILE_ORDER, DEFAULT_CAPTURE_PROFILE,
+    MicRingBuffer, AudioCallbackStats, MicCapture, NoiseSuppressor, NOISE_BINS,
+    SpectrumAnalyzer, VoiceEvent, VoiceOnsetDetector, VoiceBandAnalyzer, VOICE_BANDS,
+)
+
+# ============================================
+# SHARED MEMORY LAYOUT
+# ============================================
+
+WORKER_START_TIMEOUT = 10.0      # Secondi per il primo heartbeat prima del fallback in-process
+WORKER_STALE_SEC = 1.0           # Heartbeat più vecchio di così = worker fermo
+WORKER_EVENT_SLOTS = 32          # Eventi onset in coda (ring di slot)
+WORKER_MAX_BANDS = 16
+
+# Stato pubblicato dal worker (int64), protetto dal seqlock I_SEQ
+(I_SEQ, I_STATE, I_WRITE_POS, I_FRAME, I_EVENT_COUNT, I_BLOCKSIZE, I_PROFILE, I_PROFILE_ACK,
+ I_CALLBACKS, I_ERRORS, I_LAST_BLOCK_POS, I_DROPPED, I_LATENCY_SAMPLES, I_NOISE_VERSION,
+ I_NUM_BANDS, I_RAW_WRITE_POS) = range(16)
+I_STATUS = 16                                    # + len(AUDIO_STATUS_FLAGS)
+I_HIST = I_STATUS + len(AUDIO_STATUS_FLAGS)      # + len(CALLBACK_HIST_EDGES) + 1
+INT_SLOTS = 32
+
+# Stato pubblicato dal worker (float64)
+(F_HEARTBEAT, F_RMS, F_PEAK, F_LAST_MS, F_MAX_MS, F_TOTAL_MS, F_PERIOD_MS,
+ F_LAST_BLOCK_ADC, F_LAST_BLOCK_OFFSET, F_DENOISE_LAST_MS, F_DENOISE_MEAN_MS) = range(11)
+FLOAT_SLOTS = 16
+
+# Controlli scritti dal gioco (un solo writer, valori da 8 byte: niente seqlock)
+C_PROFILE, C_PROFILE_REQ, C_DENOISE, C_LEARNING, C_QUIT, C_NOISE_IN = range(6)
+C_SILENCE, C_SHOUT = range(2)
+CONTROL_SLOTS = 8
+
+STATE_STARTING, STATE_RUNNING, STATE_FAILED, STATE_STOPPED = range(4)
+# MicCapture.state <-> codice pubblicato
+CAPTURE_STATE_CODES = {'idle': STATE_STARTING, 'starting': STATE_STARTING,
+                       'active': STATE_RUNNING, 'failed': STATE_FAILED}
+CAPTURE_STATE_NAMES = ('starting', 'active', 'failed', 'failed')
+
+def _align(offset, size=8):
+    return (offset + size - 1) // size * size
+
+def shared_layout(capacity):
+    """Offset in byte di ogni vista nel blocco condiviso: {nome: (offset, shape, dtype)}"""
+    fields = [
+        ('ints', (INT_SLOTS,), np.int64),
+        ('floats', (FLOAT_SLOTS,), np.float64),
+        ('ctl_ints', (CONTROL_SLOTS,), np.int64),
+        ('ctl_floats', (CONTROL_SLOTS,), np.float64),
+        ('bands', (WORKER_MAX_BANDS,), np.float64),
+        ('voice_bands', (len(VOICE_BANDS),), np.float64),
+        ('events', (WORKER_EVENT_SLOTS, 2), np.float64),   # (intensità, sample_pos)
+        ('noise_out', (NOISE_BINS,), np.float32),
+        ('noise_in', (NOISE_BINS,), np.float32),
+        ('ring', (capacity,), np.float32),        # Segnale denoisato (analisi, pitch)
+        ('raw_ring', (capacity,), np.float32),    # Ingresso grezzo (oscilloscopio)
+    ]
+    layout, offset = {}, 0
+    for name, shape, dtype in fields:
+        offset = _align(offset)
+        layout[name] = (offset, shape, dtype)
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return layout, _align(offset)
+
+
+class SharedRingBuffer(MicRingBuffer):
+    """MicRingBuffer sopra la shared memory: write_pos vive nell'header condiviso (slot pos_slot)"""
+
+    def __init__(self, buffer, ints, pos_slot=I_WRITE_POS, frame_samples=MIC_FRAME_SAMPLES):
+        self.capacity = len(buffer)
+        self.buffer = buffer
+        self._ints = ints
+        self._pos_slot = pos_slot
+        self.read_pos = 0
+        self.frame_samples = frame_samples
+        self._window = np.zeros(self.capacity, dtype=np.float32)
+
+    @property
+    def write_pos(self):
+        return int(self._ints[self._pos_slot])
+
+    @write_pos.setter
+    def write_pos(self, value):
+        self._ints[self._pos_slot] = value
+
+    def reset(self):
+        self.buffer.fill(0.0)
+        self.write_pos = 0
+        self.read_pos = 0
+
+
+class SharedAudioBlock:
+    """Viste NumPy sul segmento condiviso (lo crea il gioco, il worker si collega)"""
+
+    def __init__(self, shm, capacity, owner):
+        self.shm = shm
+        self.capacity = capacity
+        self.owner = owner
+        layout, _ = shared_layout(capacity)
+        for name, (offset, shape, dtype) in layout.items():
+            setattr(self, name, np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset))
+        self.ring_buffer = SharedRingBuffer(self.ring, self.ints)
+        self.raw_ring_buffer = SharedRingBuffer(self.raw_ring, self.ints, I_RAW_WRITE_POS)
+
+    @classmethod
+    def create(cls, capacity=int(MIC_SAMPLE_RATE * MIC_RING_SECONDS)):
+        _, size = shared_layout(capacity)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        shm.buf[:size] = bytes(size)
+        return cls(shm, capacity, owner=True)
+
+    @classmethod
+    def attach(cls, name, capacity=int(MIC_SAMPLE_RATE * MIC_RING_SECONDS)):
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13: il resource tracker del worker non deve distruggere il segmento del gioco
+            shm = shared_memory.SharedMemory(name=name)
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, 'shared_memory')
+            except Exception:
+                pass
+        return cls(shm, capacity, owner=False)
+
+    def begin_write(self):
+        """Seqlock: contatore dispari = scrittura in corso"""
+        self.ints[I_SEQ] += 1
+
+    def end_write(self):
+        self.ints[I_SEQ] += 1
+
+    def close(self):
+        # Le viste NumPy tengono vivo il buffer: vanno rilasciate prima di chiudere
+        for name in shared_layout(self.capacity)[0]:
+            setattr(self, name, None)
+        self.ring_buffer = self.raw_ring_buffer = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass    # Viste ancora referenziate altrove: le libera il GC
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+# ============================================
+# WORKER (processo figlio: stream + analisi)
+# ============================================
+
+class AudioWorker:
+    """Callback -> capture ring -> denoiser -> ring condiviso -> RMS/spettro/onset -> struct"""
+
+    def __init__(self, block, source_spec, profile, speed):
+        self.block = block
+        self.profile = profile
+        self.stats = AudioCallbackStats()
+        self.capture_ring = block.raw_ring_buffer   # Grezzo, condiviso per l'oscilloscopio
+        self.ring = block.ring_buffer
+        self.denoiser = NoiseSuppressor()
+        self.spectrum = SpectrumAnalyzer(self.ring)
+        self.voice_bands = VoiceBandAnalyzer()
+        self.onset = VoiceOnsetDetector()
+        self.capture = MicCapture(self._callback, self.stats, source_spec, speed)
+        self.wake = threading.Event()
+        self.quit = False
+        self.frame = 0
+        self._noise_in = 0
+        self._profile_req = 0
+
+    def _callback(self, indata, frames, time_info, status):
+        t0 = time.perf_counter()
+        try:
+            if status:
+                self.stats.note_status(status)
+            self.capture_ring.write(indata[:, 0])
+            self.stats.note_block(time_info, t0, self.capture_ring.write_pos - frames)
+        except Exception as e:
+            self.stats.note_error(e)
+        self.stats.note_duration(time.perf_counter() - t0, frames)
+        self.wake.set()
+
+    def _watch_parent(self):
+        """stdin è una pipe del gioco: EOF = il gioco è terminato (anche se ucciso)"""
+        try:
+            sys.stdin.buffer.read()
+        except Exception:
+            pass
+        self.quit = True
+        self.wake.set()
+
+    def _apply_control(self):
+        ctl = self.block.ctl_ints
+        if ctl[C_QUIT]:
+            self.quit = True
+        if ctl[C_PROFILE_REQ] != self._profile_req:
+            self._profile_req = int(ctl[C_PROFILE_REQ])
+            self._start_capture(CAPTURE_PROFILE_ORDER[int(ctl[C_PROFILE])])
+        if ctl[C_NOISE_IN] != self._noise_in:
+            self._noise_in = int(ctl[C_NOISE_IN])
+            self.denoiser.set_profile(self.block.noise_in.tolist())
+            self._publish_noise()
+        self.denoiser.enabled = bool(ctl[C_DENOISE])
+        had_profile = self.denoiser.noise_psd
+        self.denoiser.set_learning(bool(ctl[C_LEARNING]))
+        if self.denoiser.noise_psd is not had_profile:
+            self._publish_noise()
+
+    def _publish_noise(self):
+        if self.denoiser.noise_psd is None:
+            return
+        self.block.noise_out[:] = self.denoiser.noise_psd
+        self.block.ints[I_NOISE_VERSION] += 1
+
+    def _start_capture(self, profile):
+        ints = self.block.ints
+        try:
+            self.capture.start(profile)
+        except Exception as e:
+            # Resta in vita: MicCapture.poll() ritenta (hot-plug) e lo stato arriva al gioco
+            print(f"⚠ Worker audio: input non disponibile: {e}")
+        ints[I_STATE] = CAPTURE_STATE_CODES[self.capture.state]
+        self.profile = self.capture.profile
+        ints[I_PROFILE] = CAPTURE_PROFILE_ORDER.index(self.profile)
+        ints[I_BLOCKSIZE] = self.capture.blocksize
+        ints[I_PROFILE_ACK] = self._profile_req
+
+    def step(self):
+        """Un ciclo di analisi sui campioni arrivati dall'ultimo blocco"""
+        self.capture.poll()
+        self.denoiser.process(self.capture_ring, self.ring)
+        window = self.ring.frame_window()
+        if len(window):
+            rms = float(np.sqrt(np.dot(window, window) / len(window)))
+            peak = float(np.max(np.abs(window)))
+        else:
+            rms = peak = 0.0
+        band_energy = self.voice_bands.measure(window)
+        self.frame += 1
+        bands = self.spectrum.update(self.frame)
+        ctl_f = self.block.ctl_floats
+        events = self.onset.process(self.ring, float(ctl_f[C_SILENCE]), float(ctl_f[C_SHOUT]))
+        self.publish(rms, peak, band_energy, bands, events)
+
+    def publish(self, rms, peak, band_energy, bands, events):
+        block, stats = self.block, self.stats
+        ints, floats = block.ints, block.floats
+        block.begin_write()
+        ints[I_FRAME] = self.frame
+        ints[I_STATE] = CAPTURE_STATE_CODES[self.capture.state]
+        ints[I_BLOCKSIZE] = self.capture.blocksize
+        ints[I_CALLBACKS] = stats.callbacks
+        ints[I_ERRORS] = stats.errors
+        ints[I_DROPPED] = self.denoiser.dropped
+        ints[I_LATENCY_SAMPLES] = self.denoiser.latency_samples
+        ints[I_NUM_BANDS] = len(bands)
+        for i, flag in enumerate(AUDIO_STATUS_FLAGS):
+            ints[I_STATUS + i] = stats.status_counts[flag]
+        ints[I_HIST:I_HIST + len(stats.histogram)] = stats.histogram
+        if stats.last_block is not None:
+            adc, offset, start_pos = stats.last_block
+            floats[F_LAST_BLOCK_ADC] = adc
+            floats[F_LAST_BLOCK_OFFSET] = offset
+            ints[I_LAST_BLOCK_POS] = start_pos
+        floats[F_RMS] = rms
+        floats[F_PEAK] = peak
+        floats[F_LAST_MS] = stats.last_ms
+        floats[F_MAX_MS] = stats.max_ms
+        floats[F_TOTAL_MS] = stats.total_ms
+        floats[F_PERIOD_MS] = stats.period_ms
+        floats[F_DENOISE_LAST_MS] = self.denoiser.last_cost_ms
+        floats[F_DENOISE_MEAN_MS] = self.denoiser.mean_cost_ms
+        block.bands[:len(bands)] = bands
+        block.voice_bands[:] = band_energy
+        count = int(ints[I_EVENT_COUNT])
+        for ev in events:
+            block.events[count % WORKER_EVENT_SLOTS] = (ev.intensity, ev.sample_pos)
+            count += 1
+        ints[I_EVENT_COUNT] = count
+        floats[F_HEARTBEAT] = time.perf_counter()
+        block.end_write()
+
+    def run(self):
+        threading.Thread(target=self._watch_parent, name="AudioWorkerParent", daemon=True).start()
+        self._noise_in = 0
+        self._profile_req = int(self.block.ctl_ints[C_PROFILE_REQ])
+        self._apply_control()
+        self._start_capture(self.profile)
+        while not self.quit:
+            self.wake.wait(0.05)
+            self.wake.clear()
+            self._apply_control()
+            self.step()
+        self.capture.close()
+        self.block.ints[I_STATE] = STATE_STOPPED
+        return 0
+
+
+def worker_main(argv):
+    name, source_spec, profile, speed = argv[1], argv[2], argv[3], float(argv[4])
+    block = SharedAudioBlock.attach(name)
+    try:
+        return AudioWorker(block, source_spec, profile, speed).run()
+    finally:
+        block.close()
+
+
+# ============================================
+# CLIENT (lato gioco: una lettura seqlock per frame)
+# ============================================
+
+class AudioWorkerClient:
+    """Sostituto di mic_capture / noise_suppressor / audio_stats / spectrum_analyzer / voice_onset
+    quando l'analisi gira nel worker: stessi metodi, dati letti dalla struct condivisa"""
+
+    def __init__(self, source_spec, speed=1.0):
+        self.source_spec = source_spec
+        self.speed = speed
+        self.block = SharedAudioBlock.create()
+        self.ring = self.block.ring_buffer
+        self.raw_ring = self.block.raw_ring_buffer
+        self.proc = None
+        self.stats = AudioCallbackStats()
+        self._ints = np.zeros(INT_SLOTS, dtype=np.int64)
+        self._floats = np.zeros(FLOAT_SLOTS, dtype=np.float64)
+        self._bands = np.zeros(WORKER_MAX_BANDS, dtype=np.float64)
+        self.band_energy = np.zeros(len(VOICE_BANDS), dtype=np.float32)
+        self._events = np.zeros((WORKER_EVENT_SLOTS, 2), dtype=np.float64)
+        self._event_cursor = 0
+        self._start_thread = None
+        self.rms = 0.0
+        self.peak = 0.0
+
+    # --- Ciclo di vita ---
+    def launch(self, profile, denoise=False, noise_profile=None, timeout=WORKER_START_TIMEOUT):
+        """Avvia il worker e attende il primo heartbeat; RuntimeError se il processo non parte.
+        Un device assente non è un errore: il worker resta in 'failed' e ritenta da solo"""
+        if profile not in CAPTURE_PROFILES:
+            profile = DEFAULT_CAPTURE_PROFILE
+        ctl = self.block.ctl_ints
+        ctl[C_PROFILE] = CAPTURE_PROFILE_ORDER.index(profile)
+        ctl[C_DENOISE] = int(bool(denoise))
+        self.set_profile(noise_profile)
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'audio_worker.py')
+        self.proc = subprocess.Popen(
+            [sys.executable, script, self.block.shm.name, self.source_spec, profile, str(self.speed)],
+            stdin=subprocess.PIPE)
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if self.block.floats[F_HEARTBEAT] > 0:
+                self.read()
+                return self
+            if self.proc.poll() is not None:
+                break
+            time.sleep(0.01)
+        self.close()
+        raise RuntimeError("worker audio non avviato")
+
+    def close(self):
+        if self.proc is not None:
+            if self.block.ctl_ints is not None:
+                self.block.ctl_ints[C_QUIT] = 1
+            try:
+                self.proc.stdin.close()
+                self.proc.wait(timeout=1.0)
+            except Exception:
+                self.proc.kill()
+            self.proc = None
+        if self.block.shm is not None and self.block.ints is not None:
+            self.ring = self.raw_ring = None
+            self.block.close()
+
+    @property
+    def alive(self):
+        return (self.proc is not None and self.proc.poll() is None
+                and time.perf_counter() - self._floats[F_HEARTBEAT] < WORKER_STALE_SEC)
+
+    # --- Lettura per frame ---
+    def read(self):
+        """Copia la struct sotto seqlock; False se il worker non risponde"""
+        block = self.block
+        for _ in range(16):
+            seq = block.ints[I_SEQ]
+            if seq & 1:
+                continue
+            np.copyto(self._ints, block.ints)
+            np.copyto(self._floats, block.floats)
+            np.copyto(self._bands, block.bands)
+            np.copyto(self.band_energy, block.voice_bands, casting='same_kind')
+            np.copyto(self._events, block.events)
+            if block.ints[I_SEQ] == seq:
+                break
+        ints, floats, stats = self._ints, self._floats, self.stats
+        stats.callbacks = int(ints[I_CALLBACKS])
+        stats.errors = int(ints[I_ERRORS])
+        for i, flag in enumerate(AUDIO_STATUS_FLAGS):
+            stats.status_counts[flag] = int(ints[I_STATUS + i])
+        stats.histogram = ints[I_HIST:I_HIST + len(CALLBACK_HIST_EDGES) + 1].tolist()
+        stats.last_ms = float(floats[F_LAST_MS])
+        stats.max_ms = float(floats[F_MAX_MS])
+        stats.total_ms = float(floats[F_TOTAL_MS])
+        stats.period_ms = float(floats[F_PERIOD_MS])
+        if floats[F_LAST_BLOCK_ADC]:
+            stats.last_block = (float(floats[F_LAST_BLOCK_ADC]), float(floats[F_LAST_BLOCK_OFFSET]),
+                                int(ints[I_LAST_BLOCK_POS]))
+        if not self.alive:
+            self.rms = self.peak = 0.0
+            self.band_energy.fill(0.0)
+            return False
+        self.rms = float(floats[F_RMS])
+        self.peak = float(floats[F_PEAK])
+        # L'ADC -> frame si misura qui, sul clock del gioco
+        stats.note_consumed(int(ints[I_WRITE_POS]))
+        return True
+
+    # --- Interfaccia AudioCallbackStats ---
+    def snapshot(self):
+        return self.stats.snapshot()
+
+    def sample_time(self, pos):
+        return self.stats.sample_time(pos)
+
+    # --- Interfaccia MicCapture ---
+    @property
+    def profile(self):
+        return CAPTURE_PROFILE_ORDER[int(self._ints[I_PROFILE])]
+
+    @property
+    def blocksize(self):
+        return int(self._ints[I_BLOCKSIZE])
+
+    def latency_ms(self):
+        return 1000.0 * self.blocksize / MIC_SAMPLE_RATE
+
+    def poll(self):
+        """Backoff adattivo e retry li fa il worker"""
+
+    @property
+    def state(self):
+        if not self.alive:
+            return 'failed'
+        return CAPTURE_STATE_NAMES[int(self._ints[I_STATE])]
+
+    @property
+    def error(self):
+        if not self.alive:
+            return "worker audio fermo"
+        return "input non disponibile" if self.state == 'failed' else None
+
+    @property
+    def starting(self):
+        return self._start_thread is not None and self._start_thread.is_alive()
+
+    def start_async(self, profile):
+        if self.starting:
+            return
+        self._start_thread = threading.Thread(target=self._start_quietly, args=(profile,),
+                                              name="WorkerProfile", daemon=True)
+        self._start_thread.start()
+
+    def _start_quietly(self, profile):
+        try:
+            self.start(profile)
+            print(f"✓ Profilo microfono: {profile} (blocksize {self.blocksize})")
+        except Exception as e:
+            print(f"⚠ Errore microfono: {e}")
+
+    def next_profile(self):
+        idx = CAPTURE_PROFILE_ORDER.index(self.profile)
+        return CAPTURE_PROFILE_ORDER[(idx + 1) % len(CAPTURE_PROFILE_ORDER)]
+
+    def start(self, profile, timeout=2.0):
+        """Riapre lo stream nel worker con il nuovo profilo e attende la conferma"""
+        ctl = self.block.ctl_ints
+        ctl[C_PROFILE] = CAPTURE_PROFILE_ORDER.index(profile)
+        ctl[C_PROFILE_REQ] += 1
+        deadline = time.perf_counter() + timeout
+        while self.block.ints[I_PROFILE_ACK] != ctl[C_PROFILE_REQ]:
+            if time.perf_counter() > deadline:
+                raise RuntimeError("il worker audio non risponde")
+            time.sleep(0.005)
+        self.read()
+        if self.state == 'failed':
+            raise RuntimeError(f"profilo {profile} non disponibile nel worker")
+
+    # --- Interfaccia NoiseSuppressor ---
+    @property
+    def enabled(self):
+        return bool(self.block.ctl_ints[C_DENOISE])
+
+    @enabled.setter
+    def enabled(self, flag):
+        self.block.ctl_ints[C_DENOISE] = int(bool(flag))
+
+    def set_learning(self, flag):
+        self.block.ctl_ints[C_LEARNING] = int(bool(flag))
+
+    def set_profile(self, profile):
+        if profile and len(profile) == NOISE_BINS:
+            self.block.noise_in[:] = profile
+            self.block.ctl_ints[C_NOISE_IN] += 1
+
+    @property
+    def noise_psd(self):
+        return None if self._ints[I_NOISE_VERSION] == 0 else self.block.noise_out.copy()
+
+    def profile_list(self):
+        psd = self.noise_psd
+        return None if psd is None else [round(float(v), 9) for v in psd]
+
+    @property
+    def latency_samples(self):
+        return int(self._ints[I_LATENCY_SAMPLES])
+
+    @property
+    def dropped(self):
+        return int(self._ints[I_DROPPED])
+
+    @property
+    def last_cost_ms(self):
+        return float(self._floats[F_DENOISE_LAST_MS])
+
+    @property
+    def mean_cost_ms(self):
+        return float(self._floats[F_DENOISE_MEAN_MS])
+
+    # --- Interfaccia SpectrumAnalyzer / VoiceOnsetDetector ---
+    def update(self, frame_index):
+        return self._bands[:int(self._ints[I_NUM_BANDS])]
+
+    def process(self, ring, silence_threshold, shout_threshold):
+        """Soglie al worker, eventi nuovi dalla coda di slot (i più vecchi oltre la coda si perdono)"""
+        ctl_f = self.block.ctl_floats
+        ctl_f[C_SILENCE] = silence_threshold
+        ctl_f[C_SHOUT] = shout_threshold
+        count = int(self._ints[I_EVENT_COUNT])
+        start = max(self._event_cursor, count - WORKER_EVENT_SLOTS)
+        self._event_cursor = count
+        return [VoiceEvent(float(self._events[i % WORKER_EVENT_SLOTS, 0]),
+                           int(self._events[i % WORKER_EVENT_SLOTS, 1]))
+                for i in range(start, count)]
+
+
+if __name__ == '__main__':
+    sys.exit(worker_main(sys.argv))
@@ -0,0 +1,277 @@
+"""
+VOICE RUNNER PRO - Benchmark del sintetizzatore
+Tempo per chiamata (mediana e minimo) e allocazioni (picco tracemalloc) di
+render dei patch, oscillatori, inviluppi, filtri (attraverso l'API di Synthesizer),
+batch di varianti, effetti completi, creazione dei Sound pygame e chunk della
+colonna sonora, a più durate e sample rate.
+Confronta con un baseline JSON e termina con codice 1 se qualcosa è regredito.
+
+Il confronto usa il tempo minimo diviso per quello di un carico di riferimento
+misurato nella stessa esecuzione: il carico della macchina pesa su entrambi e
+si semplifica, anche su un'altra CPU o un altro kernel. Un caso lento viene
+rimisurato prima di dichiararlo regredito; solo con Python, NumPy o pygame
+diversi dal baseline i tempi si riportano come semplice avviso.
+
+    python bench_synth.py                   # confronto con bench_baseline.json
+    python bench_synth.py --save-baseline   # aggiorna il baseline
+    python bench_synth.py --quick --filter patch:
+
+Gira headless: driver SDL 'dummy' per audio e video.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import numpy as np
+import pygame
+
+from synth_patches import SFX_PATCHES, WAVEFORMS, compile_patch, render_batch, pluck_envelope
+from synth_filters import FILTER_KINDS
+from synthesizer import Synthesizer
+from soundtrack import SoundtrackEngine
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+SAMPLE_RATES = (22050, 44100, 48000)
+DURATIONS = (0.1, 0.5, 2.0)
+QUICK_SAMPLE_RATES = (44100,)
+QUICK_DURATIONS = (0.5,)
+MIN_TIME_SEC = 0.2               # Ripetizioni fino a questo tempo totale per caso
+MIN_CALLS = 5
+TIME_TOLERANCE = 0.5             # +50% sul baseline (normalizzato) = regressione...
+TIME_NOISE_MS = 0.05             # ...se anche la differenza assoluta supera questo
+CONFIRM_RUNS = 2                 # Rimisure di un caso lento: regressione solo se lo resta sempre
+ALLOC_TOLERANCE = 0.5
+ALLOC_NOISE_KB = 64.0
+
+# ============================================
+# MISURA
+# ============================================
+
+def time_calls(func):
+    """(mediana ms, minimo ms, chiamate) dopo un warm-up (cache di design, import lazy)"""
+    func()
+    times = []
+    start = time.perf_counter()
+    while len(times) < MIN_CALLS or time.perf_counter() - start < MIN_TIME_SEC:
+        t0 = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return float(np.median(times)), min(times), len(times)
+
+def measure(func):
+    """(mediana ms, minimo ms, chiamate, picco allocazioni KB di una chiamata)"""
+    ms, min_ms, calls = time_calls(func)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ms, min_ms, calls, peak / 1024.0
+
+_REFERENCE_SIGNAL = np.random.default_rng(0).standard_normal(1 << 15)
+
+def reference_workload():
+    """Carico fisso simile ai casi (FFT, ufunc, loop Python): l'unità di misura dei tempi"""
+    x = _REFERENCE_SIGNAL
+    for _ in range(4):
+        np.fft.irfft(np.fft.rfft(x) * 0.5)
+        np.tanh(np.cumsum(x) * 1e-3)
+    total = 0.0
+    for i in range(5000):
+        total += i * 0.5
+    return total
+
+def reference_ms():
+    return time_calls(reference_workload)[1]
+
+def machine_info():
+    return {'python': platform.python_version(), 'numpy': np.__version__,
+            'pygame': pygame.version.ver, 'platform': platform.platform()}
+
+# Solo queste chiavi rendono i tempi non confrontabili: CPU, kernel e carico li
+# assorbe il rapporto col carico di riferimento, 'platform' è solo informativo
+MACHINE_KEYS = ('python', 'numpy', 'pygame')
+
+def same_software(base_machine, machine):
+    base_machine = base_machine or {}
+    return all(base_machine.get(key) == machine[key] for key in MACHINE_KEYS)
+
+SFX_METHODS = ('synthesize_beep', 'synthesize_whoosh', 'synthesize_explosion',
+               'synthesize_levelup', 'synthesize_collision')
+
+def build_cases(sample_rates, durations):
+    """Lista di (nome, funzione senza argomenti)"""
+    cases = []
+    rng = np.random.default_rng(0)
+
+    for name, patch in SFX_PATCHES.items():
+        for sr in sample_rates:
+            plan = compile_patch(patch, sr)
+            cases.append((f"compile:{name}@{sr}", lambda patch=patch, sr=sr: compile_patch(patch, sr)))
+            cases.append((f"patch:{name}@{sr}", lambda plan=plan: plan.render(rng=rng)))
+
+    # Oscillatori, inviluppi e filtri attraverso l'API di Synthesizer usata dal gioco
+    for wave in WAVEFORMS:
+        for sr in sample_rates:
+            for duration in durations:
+                cases.append((f"osc:{wave}:{duration:g}s@{sr}",
+                              lambda wave=wave, d=duration, sr=sr: Synthesizer.generate_oscillator(wave, 440.0, d, sr)))
+
+    for sr in sample_rates:
+        for duration in durations:
+            frames = int(sr * duration)
+            signal = rng.uniform(-1, 1, frames)
+            cases.append((f"envelope:adsr:{duration:g}s@{sr}",
+                          lambda x=signal, sr=sr: Synthesizer.apply_adsr_envelope(x, 0.01, 0.05, 0.5, 0.1, sr)))
+            cases.append((f"envelope:pluck:{duration:g}s@{sr}",
+                          lambda frames=frames, sr=sr: pluck_envelope(frames, 0.02, 2.5, sr)))
+            for kind in FILTER_KINDS:
+                cases.append((f"filter:{kind}:{duration:g}s@{sr}",
+                              lambda kind=kind, x=signal, sr=sr: Synthesizer.apply_filter(x, kind, 1000, sample_rate=sr)))
+            cases.append((f"filter:moving_average:{duration:g}s@{sr}",
+                          lambda x=signal, sr=sr: Synthesizer.apply_moving_average(x, 1000, sr)))
+
+    plans = {name: compile_patch(patch) for name, patch in SFX_PATCHES.items()}
+    requests = [(name, pitch, 1.0) for name in SFX_PATCHES for pitch in np.linspace(0.8, 1.25, 8)]
+    cases.append(("batch:all_patches_x8", lambda: render_batch(plans, requests, rng)))
+
+    pcm = {name: plan.render(rng=rng)[0] for name, plan in plans.items()}
+    for name, data in pcm.items():
+        cases.append((f"make_sound:{name}", lambda data=data: Synthesizer.make_sound(data)))
+    for method in SFX_METHODS:
+        cases.append((f"sfx:{method}", getattr(Synthesizer, method)))
+
+    engine = SoundtrackEngine(seed=0)
+    cases.append(("soundtrack:chunk", engine.render_chunk))
+    return cases
+
+# ============================================
+# BASELINE
+# ============================================
+
+def is_slower(result, reference, base, base_reference):
+    """Minimo normalizzato sul riferimento oltre la tolleranza (e oltre il rumore assoluto)"""
+    scale = reference / base_reference
+    return (result['min_ms'] > base['min_ms'] * scale * (1 + TIME_TOLERANCE)
+            and result['min_ms'] - base['min_ms'] * scale > TIME_NOISE_MS)
+
+def confirm_slow(func, base, base_reference):
+    """Rimisura caso e riferimento: il minimo migliore resta lento?"""
+    for _ in range(CONFIRM_RUNS):
+        reference = reference_ms()
+        _, min_ms, _ = time_calls(func)
+        if not is_slower({'min_ms': min_ms}, reference, base, base_reference):
+            return False
+    return True
+
+def compare(results, reference, baseline, base_reference, funcs):
+    """Righe (nome, risultato, baseline, stato) e numero di regressioni"""
+    rows = []
+    regressions = 0
+    for name, result in results.items():
+        base = baseline.get(name)
+        status = "new"
+        if base is not None:
+            slow = (is_slower(result, reference, base, base_reference)
+                    and confirm_slow(funcs[name], base, base_reference))
+            heavy = (result['peak_kb'] > base['peak_kb'] * (1 + ALLOC_TOLERANCE)
+                     and result['peak_kb'] - base['peak_kb'] > ALLOC_NOISE_KB)
+            status = "SLOWER" if slow else ("MORE MEM" if heavy else "ok")
+            regressions += slow or heavy
+        rows.append((name, result, base, status))
+    return rows, regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del sintetizzatore VoiceRunner")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="file JSON del baseline")
+    parser.add_argument('--save-baseline', action='store_true', help="scrive i risultati come nuovo baseline")
+    parser.add_argument('--quick', action='store_true', help="solo 44.1 kHz e 0.5 s")
+    parser.add_argument('--filter', default='', help="solo i casi il cui nome contiene questo testo")
+    parser.add_argument('--json', help="salva anche i risultati in questo file")
+    args = parser.parse_args(argv)
+
+    pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
+    sample_rates, durations = (QUICK_SAMPLE_RATES, QUICK_DURATIONS) if args.quick else (SAMPLE_RATES, DURATIONS)
+    cases = [(name, func) for name, func in build_cases(sample_rates, durations) if args.filter in name]
+
+    # Riferimento prima e dopo i casi: il minimo dei due copre i transitori di carico
+    reference = reference_ms()
+    results = {}
+    for name, func in cases:
+        ms, min_ms, calls, peak_kb = measure(func)
+        results[name] = {'ms': round(ms, 4), 'min_ms': round(min_ms, 4), 'peak_kb': round(peak_kb, 1),
+                         'calls': calls}
+    reference = min(reference, reference_ms())
+
+    baseline, base_machine, base_reference = {}, None, None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            data = json.load(f)
+        baseline, base_machine, base_reference = (data.get('results', {}), data.get('machine'),
+                                                  data.get('reference_ms'))
+        if base_reference is None:
+            print("⚠ Baseline senza tempo di riferimento: rigeneralo con --save-baseline")
+            baseline = {}
+
+    machine = machine_info()
+    rows, regressions = compare(results, reference, baseline, base_reference, dict(cases))
+    print(f"reference: {reference:.3f} ms" + (f" (baseline {base_reference:.3f} ms)" if base_reference else ""))
+    print(f"{'case':42s} {'ms/call':>9s} {'min':>9s} {'base min':>9s} {'peak KB':>9s} {'base':>9s}  status")
+    for name, result, base, status in rows:
+        base_ms = f"{base['min_ms']:.3f}" if base else "-"
+        base_kb = f"{base['peak_kb']:.0f}" if base else "-"
+        print(f"{name:42s} {result['ms']:9.3f} {result['min_ms']:9.3f} {base_ms:>9s} "
+              f"{result['peak_kb']:9.0f} {base_kb:>9s}  {status}")
+
+    report = {
+        'machine': machine,
+        'reference_ms': round(reference, 4),
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+    if args.save_baseline:
+        if args.filter or args.quick:
+            # Un baseline parziale farebbe sparire i casi esclusi: si aggiorna solo quello misurato
+            previous = {}
+            if os.path.exists(args.baseline):
+                with open(args.baseline) as f:
+                    data = json.load(f)
+                # I casi non rimisurati passano al riferimento di questa esecuzione
+                scale = reference / data.get('reference_ms', reference)
+                previous = {name: {**result, 'min_ms': round(result.get('min_ms', result['ms']) * scale, 4)}
+                            for name, result in data.get('results', {}).items()}
+            report['results'] = {**previous, **results}
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+        print(f"✓ Baseline salvato in {args.baseline} ({len(report['results'])} casi)")
+        return 0
+
+    if not baseline:
+        print("⚠ Nessun baseline: esegui con --save-baseline per crearlo")
+        return 0
+    if not same_software(base_machine, machine):
+        # Altro interprete/NumPy/pygame: tempi e allocazioni non sono confrontabili
+        print(f"⚠ Software diverso dal baseline ({base_machine} vs {machine}): "
+              f"{regressions} differenze solo segnalate, nessun fallimento")
+        return 0
+    if base_machine.get('platform') != machine['platform']:
+        print(f"  Baseline registrato su {base_machine.get('platform')}: confronto sui tempi normalizzati")
+    if regressions:
+        print(f"⚠ {regressions} regressioni rispetto al baseline")
+        return 1
+    print("✓ Nessuna regressione")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -57,11 +57,31 @@ import os
 import math
 import random
 import time
+import threading
+import hashlib
+import inspect
+import mmap
+from collections import deque, OrderedDict
 from dataclasses import dataclass, field
 
 import pygame
 import numpy as np
-import sounddevice as sd
+
+from voice_audio import (
+    MIC_SAMPLE_RATE, MIC_RING_SECONDS, CAPTURE_PROFILES, DEFAULT_CAPTURE_PROFILE,
+    MicRingBuffer, AudioCallbackStats, MicCapture, NoiseSuppressor,
+    SpectrumAnalyzer, VoiceEvent, VoiceOnsetDetector, VoiceBandAnalyzer, VOICE_BANDS,
+    KeywordSpotter, KEYWORDS, PitchTracker, benchmark_control_paths, log_band_matrix,
+    StreamingStats, NoiseFloorTracker, NOISE_FLOOR_QUANTILE,
+)
+from audio_worker import AudioWorkerClient
+import synth_filters
+import synth_patches
+from synth_patches import patch_hash
+from synth_filters import design_filter
+from synthesizer import Synthesizer
+from soundtrack import SoundtrackEngine
+from audio_mixer import SoftwareMixer, VoiceManager, SFX_MAX_VOICES
 
 pygame.init()
 pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
@@ -75,6 +95,7 @@ pygame.display.set_caption("🎤 VOICE RUNNER PRO - SYNTH EDITION 🎮")
 clock = pygame.time.Clock()
 
 CONFIG_FILE = "vr_config.json"
+SFX_CACHE_DIR = os.environ.get("VR_SFX_CACHE", "vr_sfx_cache")
 
 # COLLISION IMPROVEMENTS
 COLLISION_MULTIPLIER = 0.75  # Hitbox ridotta al 75% per gameplay più faire
@@ -459,6 +480,8 @@ font_sm = pygame.font.Font(None, 30)
 font_xs = pygame.font.Font(None, 24)
 
 current_rms = 0.0
+current_peak = 0.0
+current_band_energy = np.zeros(len(VOICE_BANDS), dtype=np.float32)   # RMS per banda (VOICE_BANDS)
 
 # Joypad support
 joysticks = []
@@ -469,283 +492,71 @@ for i in range(pygame.joystick.get_count()):
     print(f"✓ Joypad {i} connesso: {joystick.get_name()}")
 
 # ============================================
-# PROFESSIONAL SYNTHESIZER ENGINE - IMPROVED
+# SFX CACHE - PCM su disco, mmap all'avvio
 # ============================================
 
-class Synthesizer:
-    """Professional Software Synthesizer with ADSR, Multiple Oscillators, Filters"""
-    
-    SAMPLE_RATE = 44100
-    
-    @staticmethod
-    def generate_oscillator(waveform, frequency, duration, sample_rate=44100):
-        """Generate oscillator waveforms"""
-        frames = int(sample_rate * duration)
-        t = np.linspace(0, duration, frames, endpoint=False)
-        
-        if waveform == 'sine':
-            wave = np.sin(2 * np.pi * frequency * t)
-        
-        elif waveform == 'saw':
-            phase = (frequency * t) % 1.0
-            wave = 2 * phase - 1
-        
-        elif waveform == 'square':
-            wave = np.sign(np.sin(2 * np.pi * frequency * t))
-        
-        elif waveform == 'triangle':
-            phase = (frequency * t) % 1.0
-            wave = 2 * np.abs(2 * phase - 1) - 1
-        
-        elif waveform == 'pulse':
-            phase = (frequency * t) % 1.0
-            wave = np.where(phase < 0.3, 1.0, -1.0)
-        
-        else:
-            wave = np.sin(2 * np.pi * frequency * t)
-        
-        return wave, t
-    
-    @staticmethod
-    def apply_adsr_envelope(wave, attack, decay, sustain_level, release, sample_rate=44100):
-        """Apply ADSR envelope"""
-        total_frames = len(wave)
-        
-        attack_samples = int(attack * sample_rate)
-        decay_samples = int(decay * sample_rate)
-        release_samples = int(release * sample_rate)
-        sustain_samples = max(0, total_frames - attack_samples - decay_samples - release_samples)
-        
-        envelope = np.zeros(total_frames)
-        
-        if attack_samples > 0:
-            envelope[:attack_samples] = np.linspace(0, 1, attack_samples)
-        
-        decay_start = attack_samples
-        decay_end = decay_start + decay_samples
-        if decay_samples > 0:
-            envelope[decay_start:decay_end] = np.linspace(1, sustain_level, decay_samples)
-        
-        sustain_start = decay_end
-        sustain_end = sustain_start + sustain_samples
-        envelope[sustain_start:sustain_end] = sustain_level
-        
-        release_start = sustain_end
-        if release_samples > 0 and release_start < total_frames:
-            actual_release = min(release_samples, total_frames - release_start)
-            envelope[release_start:release_start + actual_release] = np.linspace(sustain_level, 0, actual_release)
-        
-        return wave * envelope
-    
-    @staticmethod
-    def apply_lowpass_filter(wave, cutoff_freq, sample_rate=44100):
-        """Lowpass filter"""
-        if cutoff_freq >= sample_rate / 2:
-            return wave
-        
-        window_size = int(sample_rate / (cutoff_freq * 2))
-        window_size = max(2, window_size)
-        
-        kernel = np.ones(window_size) / window_size
-        filtered = np.convolve(wave, kernel, mode='same')
-        
-        return filtered
-    
-    @staticmethod
-    def synthesize_beep():
-        """Improved Beep: Bright and crisp"""
-        duration = 0.12
-        
-        # Bell-like tone
-        sine1, t = Synthesizer.generate_oscillator('sine', 1320, duration)
-        sine2, _ = Synthesizer.generate_oscillator('sine', 1980, duration)
-        triangle, _ = Synthesizer.generate_oscillator('triangle', 660, duration)
-        
-        mixed = sine1 * 0.5 + sine2 * 0.3 + triangle * 0.2
-        
-        enveloped = Synthesizer.apply_adsr_envelope(
-            mixed, 
-            attack=0.005, 
-            decay=0.04, 
-            sustain_level=0.4, 
-            release=0.075
-        )
-        
-        audio = (enveloped * 32767 * 0.85).astype(np.int16)
-        stereo = np.array([audio, audio]).T.copy(order='C')
-        
-        sound = pygame.sndarray.make_sound(stereo)
-        sound.set_volume(1.0)
-        return sound
-    
-    @staticmethod
-    def synthesize_whoosh():
-        """Improved Whoosh: Smoother sweep"""
-        duration = 0.25
-        sample_rate = Synthesizer.SAMPLE_RATE
-        frames = int(sample_rate * duration)
-        t = np.linspace(0, duration, frames)
-        
-        freq_start, freq_end = 300, 2800
-        frequency = np.linspace(freq_start, freq_end, frames)
-        
-        # FM modulation
-        modulator_freq = 10
-        modulation_index = 400
-        modulator = np.sin(2 * np.pi * modulator_freq * t) * modulation_index
-        
-        phase = np.cumsum(2 * np.pi * (frequency + modulator) / sample_rate)
-        carrier = np.sin(phase)
-        
-        # Add harmonics
-        harmonic = np.sin(phase * 1.5) * 0.3
-        mixed = carrier * 0.7 + harmonic
-        
-        enveloped = Synthesizer.apply_adsr_envelope(
-            mixed,
-            attack=0.015,
-            decay=0.06,
-            sustain_level=0.45,
-            release=0.175
-        )
-        
-        filtered = Synthesizer.apply_lowpass_filter(enveloped, 4000)
-        
-        audio = (filtered * 32767 * 0.85).astype(np.int16)
-        stereo = np.array([audio, audio]).T.copy(order='C')
-        
-        sound = pygame.sndarray.make_sound(stereo)
-        sound.set_volume(1.0)
-        return sound
-    
-    @staticmethod
-    def synthesize_explosion():
-        """Improved Explosion: More punch"""
-        duration = 0.40
-        sample_rate = Synthesizer.SAMPLE_RATE
-        frames = int(sample_rate * duration)
-        t = np.linspace(0, duration, frames)
-        
-        # Deep sub bass sweep
-        bass_start, bass_end = 80, 30
-        bass_freq = np.linspace(bass_start, bass_end, frames)
-        phase_bass = np.cumsum(2 * np.pi * bass_freq / sample_rate)
-        bass = np.sin(phase_bass) * 0.8
-        
-        # Mid punch
-        mid_freq = 120
-        mid = np.sin(2 * np.pi * mid_freq * t) * 0.4 * np.exp(-t * 5)
-        
-        # Noise burst
-        noise = np.random.uniform(-0.5, 0.5, frames)
-        
-        mixed = bass + mid + noise
-        mixed = np.clip(mixed, -1.0, 1.0)
-        
-        enveloped = Synthesizer.apply_adsr_envelope(
-            mixed,
-            attack=0.002,
-            decay=0.12,
-            sustain_level=0.18,
-            release=0.278
-        )
-        
-        filtered = Synthesizer.apply_lowpass_filter(enveloped, 1000)
-        
-        audio = (filtered * 32767 * 0.95).astype(np.int16)
-        stereo = np.array([audio, audio]).T.copy(order='C')
-        
-        sound = pygame.sndarray.make_sound(stereo)
-        sound.set_volume(1.0)
-        return sound
-    
-    @staticmethod
-    def synthesize_levelup():
-        """Improved Level Up: More triumphant"""
-        duration = 0.50
-        sample_rate = Synthesizer.SAMPLE_RATE
-        
-        # Bright arpeggio
-        notes = [659.25, 830.61, 987.77, 1318.51]  # E5, G#5, B5, E6
-        note_duration = duration / len(notes)
-        
-        full_wave = []
-        
-        for i, freq in enumerate(notes):
-            saw, _ = Synthesizer.generate_oscillator('saw', freq, note_duration, sample_rate)
-            pulse, _ = Synthesizer.generate_oscillator('pulse', freq * 2, note_duration, sample_rate)
-            
-            mixed = saw * 0.6 + pulse * 0.4
-            
-            # Cada nota más fuerte
-            amp = 0.6 + (i * 0.1)
-            
-            enveloped = Synthesizer.apply_adsr_envelope(
-                mixed,
-                attack=0.008,
-                decay=0.04,
-                sustain_level=0.75,
-                release=0.06,
-                sample_rate=sample_rate
-            ) * amp
-            
-            full_wave.append(enveloped)
-        
-        final_wave = np.concatenate(full_wave)
-        
-        audio = (final_wave * 32767 * 0.80).astype(np.int16)
-        stereo = np.array([audio, audio]).T.copy(order='C')
-        
-        sound = pygame.sndarray.make_sound(stereo)
+SFX_CACHE_VERSION = 2
+SFX_ENGINE_MODULES = (synth_patches, synth_filters)
+
+def _module_source(module):
+    try:
+        return inspect.getsource(module)
+    except (OSError, TypeError):
+        return module.__name__
+
+def sfx_engine_digest():
+    """Hash del codice di sintesi: uno per caricamento, non uno per suono"""
+    return hashlib.sha256("".join(_module_source(m) for m in SFX_ENGINE_MODULES).encode()).hexdigest()
+
+def sfx_cache_key(name, engine):
+    """Hash del patch, del codice di sintesi (sfx_engine_digest) e del formato del mixer"""
+    extra = (SFX_CACHE_VERSION, pygame.mixer.get_init(), np.__version__, Synthesizer.SAMPLE_RATE, engine)
+    return patch_hash(Synthesizer.PATCHES[name], *extra)[:20]
+
+def _remove_stale_sfx(name, keep):
+    for entry in os.listdir(SFX_CACHE_DIR):
+        if entry.startswith(name + "-") and entry.endswith(".pcm") and entry != keep:
+            try:
+                os.remove(os.path.join(SFX_CACHE_DIR, entry))
+            except OSError:
+                pass
+
+def _load_cached_pcm(path):
+    try:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as pcm:
+            sound = pygame.mixer.Sound(buffer=pcm)
         sound.set_volume(1.0)
         return sound
+    except (OSError, ValueError, pygame.error):
+        return None
+
+def load_cached_sounds(names):
+    """Sound dalla cache (mmap); quelli mancanti o cambiati sono sintetizzati in un solo batch e salvati"""
+    sounds = {}
+    missing = []
+    engine = sfx_engine_digest()
+    for name in names:
+        filename = f"{name}-{sfx_cache_key(name, engine)}.pcm"
+        sound = _load_cached_pcm(os.path.join(SFX_CACHE_DIR, filename))
+        if sound is None:
+            missing.append((name, filename))
+        else:
+            sounds[name] = sound
     
-    @staticmethod
-    def synthesize_collision():
-        """Improved Collision: Massive impact"""
-        duration = 0.55
-        sample_rate = Synthesizer.SAMPLE_RATE
-        frames = int(sample_rate * duration)
-        t = np.linspace(0, duration, frames)
-        
-        # Super low bass drop
-        bass_start, bass_end = 70, 20
-        bass_freq = np.linspace(bass_start, bass_end, frames)
-        phase_bass = np.cumsum(2 * np.pi * bass_freq / sample_rate)
-        bass = np.sin(phase_bass) * 0.9
-        
-        # Secondary bass layer
-        bass2 = np.sin(phase_bass * 1.5) * 0.5
-        
-        # Harsh metallic crash
-        noise = np.random.uniform(-0.7, 0.7, frames)
-        
-        # Impact pulse
-        pulse, _ = Synthesizer.generate_oscillator('pulse', 60, duration, sample_rate)
-        pulse *= 0.5 * np.exp(-t * 3)
-        
-        mixed = bass + bass2 + noise + pulse
-        mixed = np.clip(mixed, -1.0, 1.0)
-        
-        # Hard distortion
-        mixed = np.tanh(mixed * 1.5)
-        
-        enveloped = Synthesizer.apply_adsr_envelope(
-            mixed,
-            attack=0.001,
-            decay=0.15,
-            sustain_level=0.12,
-            release=0.399
-        )
-        
-        filtered = Synthesizer.apply_lowpass_filter(enveloped, 800)
-        
-        audio = (filtered * 32767 * 0.98).astype(np.int16)
-        stereo = np.array([audio, audio]).T.copy(order='C')
-        
-        sound = pygame.sndarray.make_sound(stereo)
-        sound.set_volume(1.0)
-        return sound
+    rendered = Synthesizer.render([(name, 1.0, 1.0) for name, _ in missing])
+    for (name, filename), pcm in zip(missing, rendered):
+        sounds[name] = Synthesizer.make_sound(pcm)
+        path = os.path.join(SFX_CACHE_DIR, filename)
+        try:
+            os.makedirs(SFX_CACHE_DIR, exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(sounds[name].get_raw())
+            os.replace(tmp_path, path)
+            _remove_stale_sfx(name, filename)
+        except OSError as e:
+            print(f"  ⚠ Cache SFX non scrivibile ({e})")
+    return sounds, {name for name, _ in missing}
 
 # ============================================
 # INITIALIZE SYNTH SOUNDS
@@ -753,59 +564,339 @@ class Synthesizer:
 
 try:
     print("🎹 Inizializzazione sintetizzatore professionale...")
-    SOUND_BEEP = Synthesizer.synthesize_beep()
-    print("  ✓ Beep sintetizzato")
-    
-    SOUND_WHOOSH = Synthesizer.synthesize_whoosh()
-    print("  ✓ Whoosh sintetizzato")
+    sfx_sounds, sfx_rendered = load_cached_sounds(Synthesizer.PATCHES)
+    for sfx_name in Synthesizer.PATCHES:
+        print(f"  ✓ {sfx_name} {'sintetizzato' if sfx_name in sfx_rendered else 'dalla cache'}")
     
-    SOUND_BOOM = Synthesizer.synthesize_explosion()
-    print("  ✓ Boom sintetizzato")
-    
-    SOUND_LEVELUP = Synthesizer.synthesize_levelup()
-    print("  ✓ Level Up sintetizzato")
-    
-    SOUND_COLLISION = Synthesizer.synthesize_collision()
-    print("  ✓ Collision sintetizzato")
+    SOUND_BEEP = sfx_sounds['beep']
+    SOUND_WHOOSH = sfx_sounds['whoosh']
+    SOUND_BOOM = sfx_sounds['boom']
+    SOUND_LEVELUP = sfx_sounds['levelup']
+    SOUND_COLLISION = sfx_sounds['collision']
     
     print("✓ Sintetizzatore ready")
     
 except Exception as e:
     print(f"⚠ Errore sintesi: {e}")
+    sfx_sounds = {}
     SOUND_BEEP = SOUND_WHOOSH = SOUND_BOOM = SOUND_LEVELUP = SOUND_COLLISION = None
 
-def play_sound(sound, force=False):
-    """Play synthesized sound"""
+# ============================================
+# SFX VARIATION BANK - pitch/timbro al primo uso, LRU con budget in byte
+# ============================================
+
+SFX_BANK_BUDGET = 8 * 1024 * 1024
+SFX_BANK_SEMITONE_STEP = 0.5     # Quantizzazione: limita il numero di varianti distinte
+
+class SFXBank:
+    """Varianti dei suoni base ricampionate (np.interp) al primo uso, tenute in un LRU a budget di byte"""
+    
+    def __init__(self, sounds, budget=SFX_BANK_BUDGET):
+        self.sounds = sounds
+        self.budget = budget
+        self.bytes = 0
+        self._variants = OrderedDict()
+        self._base = {}
+    
+    def _base_wave(self, name):
+        if name not in self._base:
+            pcm = pygame.sndarray.array(self.sounds[name])
+            mono = (pcm if pcm.ndim == 1 else pcm[:, 0]).astype(np.float64)
+            self._base[name] = (mono, pcm.dtype, 1 if pcm.ndim == 1 else pcm.shape[1])
+        return self._base[name]
+    
+    def get(self, name, semitones=0.0, cutoff=None):
+        """Sound trasposto di semitones e (opzionale) scurito con un lowpass a cutoff Hz"""
+        if name not in self.sounds:
+            return None
+        semitones = round(semitones / SFX_BANK_SEMITONE_STEP) * SFX_BANK_SEMITONE_STEP
+        if semitones == 0 and cutoff is None:
+            return self.sounds[name]
+        
+        key = (name, semitones, cutoff)
+        entry = self._variants.get(key)
+        if entry is not None:
+            self._variants.move_to_end(key)
+            return entry[0]
+        
+        mono, dtype, channels = self._base_wave(name)
+        # Ricampionamento lineare: rapporto > 1 accorcia e alza il tono
+        positions = np.arange(0, len(mono) - 1, 2.0 ** (semitones / 12))
+        wave = np.interp(positions, np.arange(len(mono)), mono)
+        if cutoff is not None:
+            wave = design_filter('lowpass', cutoff, sample_rate=pygame.mixer.get_init()[0]).process(wave)
+        limits = np.iinfo(dtype)
+        np.clip(wave, limits.min, limits.max, out=wave)
+        pcm = np.empty((len(wave), channels) if channels > 1 else len(wave), dtype=dtype)
+        if channels > 1:
+            pcm[:] = wave[:, None]
+        else:
+            pcm[:] = wave
+        sound = pygame.sndarray.make_sound(pcm)
+        
+        self._variants[key] = (sound, pcm.nbytes)
+        self.bytes += pcm.nbytes
+        while self.bytes > self.budget and len(self._variants) > 1:
+            _, (_, evicted_bytes) = self._variants.popitem(last=False)
+            self.bytes -= evicted_bytes
+        return sound
+
+sfx_bank = SFXBank(sfx_sounds)
+
+# ============================================
+# SOUNDTRACK - musica procedurale in streaming (thread + coda di chunk)
+# ============================================
+
+MUSIC_FADE_MS = 400
+
+# Canali riservati (musica, loop ambientale): find_channel / Sound.play non li rubano agli effetti
+pygame.mixer.set_reserved(2)
+music_channel = pygame.mixer.Channel(0)
+ambient_channel = pygame.mixer.Channel(1)
+music_playing = False
+soundtrack = SoundtrackEngine(sample_rate=pygame.mixer.get_init()[0])
+soundtrack.start()
+
+# Sound riusati a rotazione: uno in riproduzione, uno in coda, uno libero da riempire
+MUSIC_SOUND_POOL = 3
+_music_channels = pygame.mixer.get_init()[2]
+_music_shape = (soundtrack.chunk, _music_channels) if _music_channels > 1 else (soundtrack.chunk,)
+_music_sounds = [pygame.sndarray.make_sound(np.zeros(_music_shape, dtype=np.int16))
+                 for _ in range(MUSIC_SOUND_POOL)]
+_music_pcm = [pygame.sndarray.samples(sound) for sound in _music_sounds]   # Viste sul buffer di ogni Sound
+_music_scratch = np.empty(soundtrack.chunk)
+_music_next = 0
+
+def _music_sound(chunk):
+    """Copia il chunk nel prossimo Sound del pool (mai quello in riproduzione o in coda)"""
+    global _music_next
+    sound, pcm = _music_sounds[_music_next], _music_pcm[_music_next]
+    _music_next = (_music_next + 1) % MUSIC_SOUND_POOL
+    np.multiply(chunk, 32767, out=_music_scratch)
+    np.copyto(pcm, _music_scratch[:, None] if _music_channels > 1 else _music_scratch, casting='unsafe')
+    return sound
+
+def pump_soundtrack():
+    """Accoda il prossimo chunk pronto sul canale musica; non aspetta mai il thread di sintesi"""
+    global music_playing
+    if not (game.music_enabled and game.state == "GAME"):
+        if music_playing:
+            music_channel.fadeout(MUSIC_FADE_MS)
+            music_playing = False
+        return
+    
+    soundtrack.set_params(game.current_level, game.obstacle_speed, game.base_obstacle_speed)
+    # Un chunk in riproduzione + uno in coda: il canale non resta mai a secco tra un frame e l'altro
+    if music_channel.get_queue() is not None:
+        return
+    busy = music_channel.get_busy()
+    chunk = soundtrack.next_chunk(starving=music_playing and not busy)
+    if chunk is None:
+        return
+    if busy:
+        music_channel.queue(_music_sound(chunk))
+    else:
+        music_channel.play(_music_sound(chunk))
+    music_playing = True
+
+# ============================================
+# SFX VOICE MANAGER - priorità, cooldown e polifonia per suono
+# ============================================
+# Regole (SFX_VOICE_RULES) e VoiceManager in audio_mixer.py
+
+sfx_voices = VoiceManager()
+# Canali SDL per gli effetti: tutti tranne i riservati (musica, loop ambientale)
+sfx_channels = [pygame.mixer.Channel(i) for i in range(2, 2 + SFX_MAX_VOICES)]
+
+def play_sound(sound, kind=None):
+    """Play synthesized sound through the voice manager (kind: see SFX_VOICE_RULES)"""
     if sound is None:
         return
+    now = time.perf_counter()
+    volume = sound.get_volume()
+    slot = sfx_voices.allocate(kind, volume, sound.get_length(), now)
+    if slot is None:
+        return
+    if sd_mixer is not None:
+        # Mixer sounddevice: partenza al campione esatto relativo all'inizio del frame
+        sd_mixer.play(mixer_samples(sound), volume, at=frame_time, slot=slot)
+        return
     try:
-        if force:
-            pygame.mixer.stop()
-            sound.play()
-        else:
-            channel = pygame.mixer.find_channel(True)
-            if channel:
-                channel.play(sound)
-            else:
-                sound.play()
+        sfx_channels[slot].play(sound)
     except Exception as e:
         pass
 
+# capture_ring: campioni grezzi dal callback | mic_ring: segnale (denoised) per i consumatori
+capture_ring = MicRingBuffer(int(MIC_SAMPLE_RATE * MIC_RING_SECONDS))
+mic_ring = MicRingBuffer(int(MIC_SAMPLE_RATE * MIC_RING_SECONDS))
+mic_frame_index = 0
+
+noise_suppressor = NoiseSuppressor()
+
+def process_capture():
+    """Stadio di cattura del frame: capture_ring -> (denoiser) -> mic_ring"""
+    noise_suppressor.process(capture_ring, mic_ring)
+
+def update_mic_levels():
+    """Una sola lettura per frame: RMS, picco e bande coerenti per tutti i consumatori"""
+    global current_rms, current_peak, current_band_energy, mic_frame_index
+    mic_frame_index += 1
+    if audio_worker is not None:
+        # Analisi nel worker: qui solo la copia della struct condivisa
+        audio_worker.read()
+        current_rms, current_peak = audio_worker.rms, audio_worker.peak
+        current_band_energy = audio_worker.band_energy
+        return None
+    process_capture()
+    window = mic_ring.frame_window()
+    audio_stats.note_consumed(noise_suppressor.cursor)
+    current_band_energy = voice_band_analyzer.measure(window)
+    if len(window) == 0:
+        current_rms = current_peak = 0.0
+        return window
+    current_rms = float(np.sqrt(np.dot(window, window) / len(window)))
+    current_peak = float(np.max(np.abs(window)))
+    return window
+
+spectrum_analyzer = SpectrumAnalyzer(mic_ring)
+voice_band_analyzer = VoiceBandAnalyzer()
+
+voice_onset = VoiceOnsetDetector()
+voice_events = []
+keyword_spotter = KeywordSpotter()
+
+def stamp_voice_events(events):
+    """Assegna a ogni evento l'istante ADC in cui il suono è stato catturato"""
+    for ev in events:
+        ev.adc_time = audio_stats.sample_time(ev.sample_pos - noise_suppressor.latency_samples)
+    return events
+
+# ============================================
+# VOICE CONTROL MODES
+# ============================================
+
+CONTROL_MODES = ['loudness', 'pitch', 'bands']
+DEFAULT_CONTROL_MODE = 'loudness'
+PITCH_FOLLOW_GAIN = 0.18         # Velocità di inseguimento dell'altezza target
+
+# Modalità 'bands': banda bassa ("mmm") = flap, banda alta ("iii") = picchiata
+BAND_GATE_ON = 0.15              # Livello di banda che apre il gate
+BAND_GATE_OFF = 0.05             # ...e che lo richiude (isteresi)
+BAND_DIVE_ACCEL = 1.4            # Accelerazione verso il basso a livello pieno (px/tick²)
+BAND_FLAP_FRAMES = 4             # Frame dopo l'apertura in cui il flap cresce col livello
+BAND_CALIB_STATES = ["CALIBRATE_" + name.upper() for name, _, _ in VOICE_BANDS]
+# Comandi vocali (K): un template per parola registrato in calibrazione
+KEYWORD_CALIB_STATES = {"CALIBRATE_WORD_" + word.upper(): word for word in KEYWORDS}
+BAND_CALIB_TEXT = {
+    'low': ("LOW HUM", "🎵 Hum a deep 'MMMM' - this is your FLAP"),
+    'high': ("HIGH EEE", "🎶 Sing a sharp 'EEEE' - this is your DIVE"),
+}
+
+pitch_tracker = PitchTracker(mic_ring)
+
+if '--bench-pitch' in sys.argv:
+    print("⏱  Benchmark percorsi di controllo vocale")
+    benchmark_control_paths()
+    sys.exit(0)
+
+audio_stats = AudioCallbackStats()
+
+def _cli_option(name, default=None):
+    """Legge --name=valore da sys.argv (o VR_NAME dall'ambiente)"""
+    prefix = f"--{name}="
+    for arg in sys.argv[1:]:
+        if arg.startswith(prefix):
+            return arg[len(prefix):]
+    return os.environ.get("VR_" + name.upper().replace('-', '_'), default)
+
+AUDIO_SOURCE_SPEC = _cli_option('audio-source', 'mic')
+AUDIO_SOURCE_SPEED = float(_cli_option('audio-speed', '1.0'))
+
 def audio_callback(indata, frames, time_info, status):
-    global current_rms
+    t0 = time.perf_counter()
     try:
-        audio = np.abs(indata[:, 0]).astype(np.float32)
-        current_rms = float(np.sqrt(np.mean(audio ** 2)))
-    except:
-        pass
+        if status:
+            audio_stats.note_status(status)
+        capture_ring.write(indata[:, 0])
+        audio_stats.note_block(time_info, t0, capture_ring.write_pos - frames)
+    except Exception as e:
+        audio_stats.note_error(e)
+    audio_stats.note_duration(time.perf_counter() - t0, frames)
 
-try:
-    stream = sd.InputStream(channels=1, samplerate=44100, blocksize=2048, callback=audio_callback)
-    stream.start()
-    print("✓ Microfono attivo")
-except Exception as e:
-    print(f"⚠ Errore microfono: {e}")
-    sys.exit(1)
+mic_capture = MicCapture(audio_callback, audio_stats, AUDIO_SOURCE_SPEC, AUDIO_SOURCE_SPEED)
+
+# Worker out-of-process (--audio-worker): stream e analisi fuori dal GIL del gioco
+AUDIO_WORKER = '--audio-worker' in sys.argv or _cli_option('audio-worker', '0') not in ('0', '')
+audio_worker = None
+audio_worker_pending = None      # Client pronto, adottato dal game loop tra due frame
+
+def launch_audio_worker(profile, denoise, noise_profile):
+    """Thread di avvio del worker; se non parte si torna all'analisi in-process"""
+    global audio_worker_pending
+    try:
+        client = AudioWorkerClient(AUDIO_SOURCE_SPEC, AUDIO_SOURCE_SPEED)
+        audio_worker_pending = client.launch(profile, denoise, noise_profile)
+        print(f"✓ Worker audio attivo (pid {client.proc.pid})")
+    except Exception as e:
+        print(f"⚠ Worker audio non disponibile, analisi in-process: {e}")
+        mic_capture.start_async(profile)
+
+def adopt_audio_worker():
+    """Stessa interfaccia: il resto del gioco non sa dove gira l'analisi"""
+    global audio_worker, audio_worker_pending, mic_capture, noise_suppressor
+    global audio_stats, spectrum_analyzer, voice_onset, mic_ring
+    audio_worker, audio_worker_pending = audio_worker_pending, None
+    audio_worker.enabled = noise_suppressor.enabled
+    mic_capture = noise_suppressor = audio_stats = spectrum_analyzer = voice_onset = audio_worker
+    mic_ring = pitch_tracker.ring = waterfall.ring = audio_worker.ring
+    oscilloscope.ring = audio_worker.raw_ring     # Ingresso grezzo, come in-process
+
+# ============================================
+# SOUNDDEVICE MIXER (--sd-mixer) - effetti sonori fuori da SDL
+# ============================================
+
+SD_MIXER = '--sd-mixer' in sys.argv or _cli_option('sd-mixer', '0') not in ('0', '')
+MIXER_SAMPLE_CACHE = 64
+sd_mixer = None
+frame_time = time.perf_counter()     # Inizio del frame corrente: riferimento per la schedulazione
+_mixer_samples = OrderedDict()
+
+def mixer_samples(sound):
+    """Campioni mono float32 di un pygame Sound (cache LRU per identità)"""
+    key = id(sound)
+    entry = _mixer_samples.get(key)
+    if entry is not None and entry[0] is sound:
+        _mixer_samples.move_to_end(key)
+        return entry[1]
+    pcm = pygame.sndarray.array(sound)
+    mono = pcm if pcm.ndim == 1 else pcm[:, 0]
+    data = (mono / float(np.iinfo(pcm.dtype).max)).astype(np.float32)
+    _mixer_samples[key] = (sound, data)
+    while len(_mixer_samples) > MIXER_SAMPLE_CACHE:
+        _mixer_samples.popitem(last=False)
+    return data
+
+if SD_MIXER:
+    sd_mixer = SoftwareMixer(sample_rate=pygame.mixer.get_init()[0])
+    if sd_mixer.start():
+        sfx_voices.resize(min(SFX_MAX_VOICES, sd_mixer.max_voices))
+        print(f"✓ Mixer sounddevice attivo (block {sd_mixer.blocksize}, {sd_mixer.output_latency_ms:.1f} ms)")
+    else:
+        sd_mixer = None
+
+# ============================================
+# DEGRADED MODE (nessun input audio)
+# ============================================
+
+KEY_FLAP_INTENSITY = 0.8         # Flap da tastiera/joypad quando il microfono manca
+
+def voice_input_active():
+    """False mentre il microfono si apre o se non c'è: si gioca con tastiera/joypad"""
+    return mic_capture.state == 'active'
+
+def manual_flap():
+    """Flap da SPACE/UP/tasto A, stesso percorso degli eventi voce"""
+    voice_events.append(VoiceEvent(KEY_FLAP_INTENSITY, 0))
 
 class Particle:
     __slots__ = ['x', 'y', 'vx', 'vy', 'color', 'lifetime', 'age', 'size']
@@ -1728,6 +1819,49 @@ def lerp(a, b, t):
     """Interpolazione lineare smooth per AI"""
     return a + (b - a) * t
 
+# ============================================
+# STREAMING CALIBRATION STATS (memoria costante)
+# ============================================
+# Stimatori (P2Quantile, StreamingStats, NoiseFloorTracker) in voice_audio.py
+
+CALIB_SILENCE_QUANTILE = 0.9     # Rumore "alto" del silenzio (robusto ai picchi)
+CALIB_SILENCE_MARGIN = 1.3
+CALIB_SHOUT_QUANTILE = 0.9       # Urlo tipico, un colpo di tosse non conta
+CALIB_SHOUT_FACTOR = 0.85
+CALIB_MIN_DYNAMIC = 1.5          # shout >= silence * 1.5
+
+noise_floor_tracker = NoiseFloorTracker()
+
+# ============================================
+# LATENCY COMPENSATION (eventi voce -> tick)
+# ============================================
+
+# Al massimo ~170 ms di tick rigiocati: latenza di cattura + finestra di picco dell'onset (90 ms)
+LATENCY_COMP_MAX_TICKS = 10
+
+def compensate_flap(event_time, jump_velocity, gravity, v_min, v_max):
+    """Rigioca i tick già simulati dopo event_time come se il flap fosse arrivato in tempo.
+    Ritorna (player_y, velocity) dopo il tick corrente, oppure None se non serve."""
+    if event_time is None:
+        return None
+    history = game.tick_history
+    k = 0
+    for tick_time, _, _ in reversed(history):
+        if tick_time < event_time or k >= LATENCY_COMP_MAX_TICKS:
+            break
+        k += 1
+    # k == 1: l'evento cade nel tick corrente, basta il percorso normale
+    if k <= 1:
+        return None
+    _, y, v = history[-k]
+    for i in range(k):
+        v += gravity
+        if i == 0:
+            v = jump_velocity
+        v = max(v_min, min(v_max, v))
+        y += v
+    return y, v
+
 class Game:
     def __init__(self):
         self.state = "MENU"
@@ -1757,21 +1891,43 @@ class Game:
         self.transition_progress = 0.0
         self.is_transitioning = False
         
-        self.calib_silence = []
-        self.calib_shout = []
+        self.calib_silence = StreamingStats()
+        self.calib_shout = StreamingStats()
         self.silence_threshold = 0.05
+        self.calibrated_silence = 0.05    # Quella salvata: silence_threshold può seguire il rumore di fondo
+        self.calib_word_silence = None    # Provvisoria per le fasi parola: al gioco solo a fine calibrazione
         self.shout_threshold = 0.15
+        # Soglie e calibrazione per banda (VOICE_BANDS), modalità 'bands'
+        self.calib_band_silence = [StreamingStats() for _ in VOICE_BANDS]
+        self.calib_band_shout = [StreamingStats() for _ in VOICE_BANDS]
+        self.band_silence = [0.02] * len(VOICE_BANDS)
+        self.band_shout = [0.08] * len(VOICE_BANDS)
+        self.band_gate = [False] * len(VOICE_BANDS)
+        self.band_flap_timer = 0
+        self.voice_commands = False
         self.calibrated = False
         self.calib_timer = 0
         self.calib_duration = 90
+        self.capture_profile = DEFAULT_CAPTURE_PROFILE
+        self.control_mode = DEFAULT_CONTROL_MODE
+        self.denoise = False
+        self.track_noise_floor = False
+        self.noise_floor_margin = CALIB_SILENCE_MARGIN
         
         self.menu_pulse = 0.0
         self.stars = generate_stars(SCREEN_WIDTH, SCREEN_HEIGHT, 700)
         
         # EQUALIZER TOGGLE
         self.show_equalizer = False
+        self.show_audio_debug = False
+        self.show_waterfall = False
+        self.show_scope = False
+        self.music_enabled = True
         self.explosion_animation = None
         
+        # (istante del tick, player_y, velocity) prima della fisica: per la compensazione latenza
+        self.tick_history = deque(maxlen=LATENCY_COMP_MAX_TICKS + 1)
+        
         self.load_calibration()
 
     def check_level_up(self):
@@ -1788,22 +1944,39 @@ class Game:
             self.obstacle_speed = self.base_obstacle_speed * (1.0 + (self.current_level - 1) * 0.06)
             
             self.level_notifications.append(LevelNotification(self.current_level))
-            play_sound(SOUND_LEVELUP)
+            # Trasposto di un tono per livello (un'ottava al massimo)
+            play_sound(sfx_bank.get('levelup', min(12, 2 * (self.current_level - 2))), 'levelup')
             
             print(f"✓ Level {self.current_level}")
 
-    def save_calibration(self):
+    def save_config(self):
         data = {
-            "silence": self.silence_threshold,
+            "silence": self.calibrated_silence,
             "shout": self.shout_threshold,
-            "high_score": self.high_score
+            "high_score": self.high_score,
+            "capture_profile": self.capture_profile,
+            "control_mode": self.control_mode,
+            "denoise": self.denoise,
+            "noise_tracking": self.track_noise_floor,
+            "noise_margin": self.noise_floor_margin,
+            "band_silence": self.band_silence,
+            "band_shout": self.band_shout,
+            "voice_commands": self.voice_commands,
+            "music": self.music_enabled,
+            "keywords": keyword_spotter.template_lists(),
+            "noise_profile": noise_suppressor.profile_list()
         }
         try:
             with open(CONFIG_FILE, 'w') as f:
                 json.dump(data, f)
-            self.calibrated = True
+            return True
         except Exception as e:
             print(f"⚠ Errore salvataggio: {e}")
+            return False
+
+    def save_calibration(self):
+        if self.save_config():
+            self.calibrated = True
 
     def load_calibration(self):
         if not os.path.exists(CONFIG_FILE):
@@ -1813,15 +1986,120 @@ class Game:
         try:
             with open(CONFIG_FILE, 'r') as f:
                 data = json.load(f)
-                self.silence_threshold = data.get("silence", 0.05)
+                self.calibrated_silence = data.get("silence", 0.05)
+                self.silence_threshold = self.calibrated_silence
                 self.shout_threshold = data.get("shout", 0.15)
                 self.high_score = data.get("high_score", 0)
+                self.capture_profile = data.get("capture_profile", DEFAULT_CAPTURE_PROFILE)
+                self.control_mode = data.get("control_mode", DEFAULT_CONTROL_MODE)
+                if self.control_mode not in CONTROL_MODES:
+                    self.control_mode = DEFAULT_CONTROL_MODE
+                self.denoise = bool(data.get("denoise", False))
+                self.track_noise_floor = bool(data.get("noise_tracking", False))
+                self.noise_floor_margin = data.get("noise_margin", CALIB_SILENCE_MARGIN)
+                if len(data.get("band_silence", [])) == len(VOICE_BANDS):
+                    self.band_silence = [float(v) for v in data["band_silence"]]
+                if len(data.get("band_shout", [])) == len(VOICE_BANDS):
+                    self.band_shout = [float(v) for v in data["band_shout"]]
+                self.voice_commands = bool(data.get("voice_commands", False))
+                self.music_enabled = bool(data.get("music", True))
+                keyword_spotter.set_templates(data.get("keywords"))
+                noise_suppressor.set_profile(data.get("noise_profile"))
+                noise_suppressor.enabled = self.denoise
                 self.calibrated = True
                 print(f"✓ Calibrazione caricata")
         except Exception as e:
             print(f"⚠ Errore caricamento: {e}")
             self.calibrated = False
     
+    def calibration_phases(self):
+        """Silenzio e urlo sempre; una fase per banda in modalità 'bands', una per parola con i comandi vocali"""
+        phases = ["CALIBRATE_SILENCE", "CALIBRATE_SHOUT"]
+        if self.control_mode == 'bands':
+            phases += BAND_CALIB_STATES
+        if self.voice_commands:
+            phases += list(KEYWORD_CALIB_STATES)
+        return phases
+
+    def start_calibration(self):
+        self.calib_silence = StreamingStats()
+        self.calib_shout = StreamingStats()
+        self.calib_band_silence = [StreamingStats() for _ in VOICE_BANDS]
+        self.calib_band_shout = [StreamingStats() for _ in VOICE_BANDS]
+        self.calib_word_silence = None
+        self.calib_timer = 0
+        self.state = "CALIBRATE_SILENCE"
+
+    def add_calibration_sample(self, rms, band_energy):
+        if rms <= 0:
+            return
+        if self.state == "CALIBRATE_SILENCE":
+            self.calib_silence.append(rms)
+            for stats, energy in zip(self.calib_band_silence, band_energy):
+                stats.append(float(energy))
+        elif self.state == "CALIBRATE_SHOUT":
+            self.calib_shout.append(rms)
+        elif self.state in BAND_CALIB_STATES:
+            band = BAND_CALIB_STATES.index(self.state)
+            self.calib_band_shout[band].append(float(band_energy[band]))
+
+    def measured_silence(self):
+        """(soglia di silenzio, margine sul rumore di fondo) dalla fase di silenzio, None se vuota"""
+        if not self.calib_silence:
+            return None
+        silence = self.calib_silence.quantile(CALIB_SILENCE_QUANTILE) * CALIB_SILENCE_MARGIN
+        floor = self.calib_silence.quantile(NOISE_FLOOR_QUANTILE)
+        margin = silence / floor if floor > 1e-6 else self.noise_floor_margin
+        return silence, margin
+
+    def finish_silence_calibration(self):
+        """Soglia appena misurata solo per il gate delle fasi parola: ESC a metà non tocca le soglie salvate"""
+        measured = self.measured_silence()
+        self.calib_word_silence = measured[0] if measured else None
+
+    def word_silence(self):
+        """Gate del keyword spotter: la soglia provvisoria mentre si registrano le parole"""
+        if self.state in KEYWORD_CALIB_STATES and self.calib_word_silence is not None:
+            return self.calib_word_silence
+        return self.silence_threshold
+
+    def finish_calibration(self):
+        """Soglie robuste dai quantili streaming (non da media/massimo)"""
+        measured = self.measured_silence()
+        if measured:
+            self.silence_threshold, self.noise_floor_margin = measured
+        self.calib_word_silence = None
+        if self.calib_shout:
+            self.shout_threshold = self.calib_shout.quantile(CALIB_SHOUT_QUANTILE) * CALIB_SHOUT_FACTOR
+        self.shout_threshold = max(self.shout_threshold, self.silence_threshold * CALIB_MIN_DYNAMIC)
+        self.calibrated_silence = self.silence_threshold
+        for band in range(len(VOICE_BANDS)):
+            if self.calib_band_silence[band]:
+                self.band_silence[band] = (self.calib_band_silence[band].quantile(CALIB_SILENCE_QUANTILE)
+                                           * CALIB_SILENCE_MARGIN)
+            if self.calib_band_shout[band]:
+                self.band_shout[band] = (self.calib_band_shout[band].quantile(CALIB_SHOUT_QUANTILE)
+                                         * CALIB_SHOUT_FACTOR)
+            self.band_shout[band] = max(self.band_shout[band], self.band_silence[band] * CALIB_MIN_DYNAMIC)
+        noise_floor_tracker.reset()
+
+    def update_band_gates(self, band_energy):
+        """Livello 0..1 per banda e gate con isteresi: (livelli, bande appena aperte)"""
+        levels, opened = [], []
+        for band, energy in enumerate(band_energy):
+            span = max(self.band_shout[band] - self.band_silence[band], 1e-4)
+            level = min(1.0, max(0.0, (float(energy) - self.band_silence[band]) / span))
+            was_open = self.band_gate[band]
+            self.band_gate[band] = level >= BAND_GATE_ON or (was_open and level > BAND_GATE_OFF)
+            levels.append(level)
+            opened.append(self.band_gate[band] and not was_open)
+        return levels, opened
+
+    def apply_noise_floor(self, floor):
+        """Aggiorna silence_threshold dal rumore di fondo tracciato durante il gioco (solo runtime, mai salvato)"""
+        new_silence = floor * self.noise_floor_margin
+        self.silence_threshold = min(new_silence, self.shout_threshold / CALIB_MIN_DYNAMIC)
+
     def toggle_fullscreen(self):
         global screen
         self.fullscreen = not self.fullscreen
@@ -1836,6 +2114,12 @@ class Game:
 
 game = Game()
 
+# Input audio in background: il menu si disegna subito, senza microfono si gioca da tastiera/joypad
+if AUDIO_WORKER:
+    threading.Thread(target=launch_audio_worker, name="AudioWorkerStart", daemon=True,
+                     args=(game.capture_profile, game.denoise, noise_suppressor.profile_list())).start()
+else:
+    mic_capture.start_async(game.capture_profile)
 
 
 
@@ -2612,66 +2896,15 @@ def draw_blood_background():
     scr_h = screen.get_height()
     scr_w = screen.get_width()
     
-    # 1. MUSICA CHIPTUNE HORROR OTTIMIZZATA (non blocca più il gioco)
+    # 1. MUSICA CHIPTUNE HORROR (pre-renderizzata con gli altri SFX)
     if not hasattr(game, 'blood_music_playing'):
-        sample_rate = 22050
-        full_samples = []
+        horror_melody = sfx_sounds.get('horror')
+        if horror_melody is not None:
+            # Play in loop su canale dedicato
+            ambient_channel.play(horror_melody, -1)  # -1 = loop infinito
+            ambient_channel.set_volume(0.22)  # Volume ridotto per non coprire SFX
         
-        # Melodia horror semplificata (ottava più bassa, più atmosferica)
-        melody_notes = [
-            130.81,  # Do3
-            155.56,  # Mib3
-            174.61,  # Fa3
-            146.83,  # Re3
-            130.81,  # Do3
-            116.54,  # Si2
-            103.83,  # Lab2
-            130.81,  # Do3
-        ]
-        
-        # DURATA RIDOTTA: 0.4 secondi per nota invece di 5!
-        note_duration = 0.4
-        
-        # Loop breve ma efficace (circa 3.2 secondi totali)
-        for note in melody_notes:
-            samples_per_note = int(sample_rate * note_duration)
-            for i in range(samples_per_note):
-                t = i / sample_rate
-                
-                # Square wave principale (duty cycle 25% per suono più pieno)
-                phase = (t * note) % 1.0
-                square = 0.6 if phase < 0.25 else -0.3
-                
-                # Sub-bass (un'ottava sotto)
-                sub_phase = (t * note * 0.5) % 1.0
-                sub = 0.3 if sub_phase < 0.3 else -0.15
-                
-                # Drone atmosferico continuo (molto grave)
-                drone = math.sin(2 * math.pi * 65.41 * t) * 0.15
-                
-                # Envelope: attack rapido, decay medio
-                if t < 0.02:
-                    envelope = t / 0.02  # Attack 20ms
-                else:
-                    envelope = math.exp(-(t - 0.02) * 2.5)  # Decay
-                
-                # Mix dei segnali
-                wave = (square * 0.5 + sub * 0.3 + drone) * envelope
-                
-                # Clipping sicuro e conversione
-                sample = int(127 + max(-120, min(120, wave * 80)))
-                full_samples.append(sample)
-        
-        # Crea il sound buffer
-        sound_buffer = bytearray(full_samples)
-        horror_melody = pygame.mixer.Sound(buffer=sound_buffer)
-        
-        # Play in loop su canale dedicato
-        channel = pygame.mixer.Channel(1)
-        channel.play(horror_melody, -1)  # -1 = loop infinito
-        channel.set_volume(0.22)  # Volume ridotto per non coprire SFX
-        
-        game.blood_horror_channel = channel
+        game.blood_horror_channel = ambient_channel
         game.blood_music_playing = True
     
     # 2. INIZIALIZZAZIONE GRAFICA (una sola volta)
@@ -2914,29 +3147,11 @@ def draw_background_toys():
         b = int(top_color[2] + (bottom_color[2] - top_color[2]) * progress)
         pygame.draw.rect(screen, (r, g, b), (0, y, scr_w, 2))
     
-    # 2. SINTESI TUONO (Una volta sola) - MANTENUTO
+    # 2. TUONO (pre-renderizzato con gli altri SFX)
     if not hasattr(draw_background_toys, 'thunder_sound'):
-        try:
-            freq = 44100
-            duration = 1.2
-            n_samples = int(freq * duration)
-            buf = array.array('h', [0] * n_samples)
-            
-            value = 0
-            max_amp = 20000
-            
-            for i in range(n_samples):
-                value += random.randint(-1500, 1500)
-                if value > max_amp: value -= 1600
-                if value < -max_amp: value += 1600
-                env = min(1.0, i / 1000.0) if i < 1000 else 1.0 - ((i - 1000) / (n_samples - 1000))
-                buf[i] = int(value * env)
-            
-            draw_background_toys.thunder_sound = pygame.mixer.Sound(buffer=buf)
+        draw_background_toys.thunder_sound = sfx_sounds.get('thunder')
+        if draw_background_toys.thunder_sound:
             draw_background_toys.thunder_sound.set_volume(0.5)
-            draw_background_toys.thunder_channel = pygame.mixer.Channel(0)
-        except:
-            draw_background_toys.thunder_sound = None
 
     current_time = pygame.time.get_ticks()
     
@@ -2969,7 +3184,7 @@ def draw_background_toys():
     if lightning['thunder_delay'] > 0:
         lightning['thunder_delay'] -= 16
         if lightning['thunder_delay'] <= 0 and draw_background_toys.thunder_sound:
-            draw_background_toys.thunder_channel.play(draw_background_toys.thunder_sound)
+            play_sound(draw_background_toys.thunder_sound, 'thunder')
 
     # 5. DISEGNA FULMINI CON GLOW MULTI-LAYER
     if lightning['active']:
@@ -3238,6 +3453,23 @@ def draw_background():
 
 
 # EQUALIZER - Toggle with E key
+_eq_bar_cache = {}
+
+def _get_eq_bar_surface(bar_width, bar_height, color_top, color_bottom):
+    """Gradiente della barra disegnato una sola volta per (colore, altezza)"""
+    key = (bar_width, bar_height, color_top, color_bottom)
+    surf = _eq_bar_cache.get(key)
+    if surf is None:
+        surf = pygame.Surface((bar_width, bar_height), pygame.SRCALPHA)
+        for y in range(bar_height):
+            progress = y / max(1, bar_height)
+            r = int(color_bottom[0] + (color_top[0] - color_bottom[0]) * progress)
+            g = int(color_bottom[1] + (color_top[1] - color_bottom[1]) * progress)
+            b = int(color_bottom[2] + (color_top[2] - color_bottom[2]) * progress)
+            pygame.draw.line(surf, (r, g, b), (0, y), (bar_width, y))
+        _eq_bar_cache[key] = surf
+    return surf
+
 def draw_equalizer(level):
     if not game.show_equalizer:
         return
@@ -3275,12 +3507,13 @@ def draw_equalizer(level):
     bar_area_y = eq_y + 30
     bar_area_h = eq_h - 55
     
+    # Spettro reale (calcolato al massimo una volta per frame)
+    bands = spectrum_analyzer.update(mic_frame_index)
+    
     for i in range(num_bars):
         bar_x = eq_x + 6 + i * (bar_width + 4)
         
-        # Variazione più fluida
-        variation = random.uniform(0.8, 1.0) if level > 0.1 else random.uniform(0.05, 0.2)
-        bar_level = min(level * variation, 1.0)
+        bar_level = min(float(bands[i % len(bands)]), 1.0)
         bar_height = int(bar_area_h * bar_level)
         
         if bar_height < 2:
@@ -3299,17 +3532,8 @@ def draw_equalizer(level):
         
         bar_y_start = bar_area_y + bar_area_h - bar_height
         
-        # Barre con gradiente smooth
-        bar_surf = pygame.Surface((bar_width, bar_height), pygame.SRCALPHA)
-        
-        for y in range(bar_height):
-            progress = y / max(1, bar_height)
-            r = int(color_bottom[0] + (color_top[0] - color_bottom[0]) * progress)
-            g = int(color_bottom[1] + (color_top[1] - color_bottom[1]) * progress)
-            b = int(color_bottom[2] + (color_top[2] - color_bottom[2]) * progress)
-            
-            pygame.draw.line(bar_surf, (r, g, b), (0, y), (bar_width, y))
-        
+        # Barre con gradiente smooth (cache)
+        bar_surf = _get_eq_bar_surface(bar_width, bar_height, color_top, color_bottom)
         screen.blit(bar_surf, (bar_x, bar_y_start))
         
         # Bordo sottile
@@ -3356,6 +3580,207 @@ def draw_equalizer(level):
 
 
 
+# SPECTROGRAM WATERFALL - Toggle with W key
+WATERFALL_SIZE = (240, 96)
+WATERFALL_F_MIN = 60.0
+WATERFALL_F_MAX = 12000.0
+
+def _waterfall_lut():
+    """Colormap precalcolata 256 x RGB: nero -> viola -> magenta -> ciano -> bianco"""
+    stops = np.array([(0, 0, 0), (20, 10, 60), (120, 0, 170), (255, 0, 150), (0, 220, 255), (255, 255, 255)],
+                     dtype=np.float32)
+    pos = np.linspace(0, 255, len(stops))
+    x = np.arange(256)
+    return np.stack([np.interp(x, pos, stops[:, c]) for c in range(3)], axis=1).astype(np.uint8)
+
+class SpectrogramWaterfall:
+    """Storico dello spettro su una Surface persistente: scroll di una colonna, si scrive solo la nuova"""
+
+    def __init__(self, ring, width, height, fft_size=1024, sample_rate=MIC_SAMPLE_RATE,
+                 f_min=WATERFALL_F_MIN, f_max=WATERFALL_F_MAX, floor_db=-90.0, ceil_db=-20.0):
+        self.ring = ring
+        self.surface = pygame.Surface((width, height), 0, 32)
+        self.surface.fill((0, 0, 0))
+        self.lut = _waterfall_lut()
+        self.fft_size = fft_size
+        self.window = np.hanning(fft_size).astype(np.float32)
+        self.amp_scale = 2.0 / float(self.window.sum())
+        self._samples = np.zeros(fft_size, dtype=np.float32)
+        # Riga 0 = frequenza più alta (in cima)
+        self.row_matrix = log_band_matrix(fft_size, sample_rate, f_min, f_max, height)[::-1]
+        self.f_min, self.f_max = f_min, f_max
+        self.floor_db = floor_db
+        self.lut_scale = 255.0 / (ceil_db - floor_db)
+        self._frame = -1
+
+    def update(self, frame_index):
+        """Al massimo una colonna per frame"""
+        if frame_index == self._frame:
+            return
+        self._frame = frame_index
+        samples = self.ring.read_latest(self.fft_size, out=self._samples)
+        if len(samples) < self.fft_size:
+            return
+        spectrum = np.abs(np.fft.rfft(samples * self.window)) * self.amp_scale
+        db = 10.0 * np.log10(self.row_matrix @ (spectrum * spectrum) + 1e-12)
+        idx = np.clip((db - self.floor_db) * self.lut_scale, 0, 255).astype(np.uint8)
+        self.surface.scroll(-1, 0)
+        pixels = pygame.surfarray.pixels3d(self.surface)
+        pixels[-1] = self.lut[idx]
+        del pixels    # Sblocca la Surface prima del blit
+
+    def row_of(self, freq):
+        """Riga (dall'alto) corrispondente a una frequenza, per i marker delle bande"""
+        frac = math.log(freq / self.f_min) / math.log(self.f_max / self.f_min)
+        return int((1.0 - max(0.0, min(1.0, frac))) * (self.surface.get_height() - 1))
+
+waterfall = SpectrogramWaterfall(mic_ring, *WATERFALL_SIZE)
+
+def draw_waterfall():
+    if not game.show_waterfall:
+        return
+    
+    scr_w = screen.get_width()
+    scr_h = screen.get_height()
+    wf_w, wf_h = WATERFALL_SIZE
+    # Accanto all'equalizer quando è visibile
+    wf_x = scr_w - wf_w - 15 - (135 if game.state == "GAME" and game.show_equalizer else 0)
+    wf_y = scr_h - wf_h - 33
+    
+    waterfall.update(mic_frame_index)
+    
+    pygame.draw.rect(screen, (15, 15, 25), (wf_x - 4, wf_y - 22, wf_w + 8, wf_h + 26), border_radius=6)
+    pygame.draw.rect(screen, NEON_CYAN, (wf_x - 4, wf_y - 22, wf_w + 8, wf_h + 26), 1, border_radius=6)
+    title = font_xs.render("SPECTRUM", True, NEON_CYAN)
+    screen.blit(title, (wf_x, wf_y - 19))
+    screen.blit(waterfall.surface, (wf_x, wf_y))
+    
+    # Marker delle bande voce (modalità 'bands')
+    for (name, f_lo, f_hi), color in zip(VOICE_BANDS, (NEON_BLUE, NEON_ORANGE)):
+        top, bottom = waterfall.row_of(f_hi), waterfall.row_of(f_lo)
+        pygame.draw.line(screen, color, (wf_x + wf_w + 1, wf_y + top), (wf_x + wf_w + 1, wf_y + bottom), 2)
+
+# OSCILLOSCOPE - Toggle with O key
+SCOPE_SIZE = (256, 70)
+SCOPE_SAMPLES = 2048             # Finestra fissa (~46 ms): costo costante con qualsiasi blocksize
+SCOPE_CLIP_LEVEL = 0.99
+
+class Oscilloscope:
+    """Forma d'onda decimata a larghezza schermo con inviluppo min/max, una sola draw.lines"""
+
+    def __init__(self, ring, width, height, samples=SCOPE_SAMPLES):
+        self.ring = ring
+        self.width = width
+        self.height = height
+        self.per_column = max(1, samples // width)
+        self._samples = np.zeros(self.per_column * width, dtype=np.float32)
+        # Punti (x, max), (x, min) alternati: la polilinea a zig-zag disegna l'inviluppo
+        self._points = np.zeros((2 * width, 2), dtype=np.int32)
+        self._points[:, 0] = np.repeat(np.arange(width), 2)
+        self.peak = 0.0
+        self.clipping = False
+
+    def draw(self, surface, x, y, color):
+        samples = self.ring.read_latest(len(self._samples), out=self._samples)
+        if len(samples) < len(self._samples):
+            return
+        columns = samples.reshape(self.width, self.per_column)
+        envelope = np.empty((self.width, 2), dtype=np.float32)
+        np.max(columns, axis=1, out=envelope[:, 0])
+        np.min(columns, axis=1, out=envelope[:, 1])
+        self.peak = float(max(envelope[:, 0].max(), -envelope[:, 1].min()))
+        self.clipping = self.peak >= SCOPE_CLIP_LEVEL
+        half = self.height // 2 - 1
+        self._points[:, 1] = y + half - (np.clip(envelope.reshape(-1), -1.0, 1.0) * half).astype(np.int32)
+        points = self._points.copy()
+        points[:, 0] += x
+        pygame.draw.lines(surface, NEON_MAGENTA if self.clipping else color, False, points.tolist(), 1)
+
+oscilloscope = Oscilloscope(capture_ring, *SCOPE_SIZE)
+
+def draw_oscilloscope():
+    if not game.show_scope:
+        return
+    
+    scr_w = screen.get_width()
+    scr_h = screen.get_height()
+    sc_w, sc_h = SCOPE_SIZE
+    # Sopra equalizer / spettrogramma (angolo in basso a destra)
+    sc_x = scr_w - sc_w - 15
+    sc_y = scr_h - 15 - 150 - 12 - sc_h
+    
+    pygame.draw.rect(screen, (15, 15, 25), (sc_x - 4, sc_y - 4, sc_w + 8, sc_h + 8), border_radius=6)
+    pygame.draw.rect(screen, NEON_CYAN, (sc_x - 4, sc_y - 4, sc_w + 8, sc_h + 8), 1, border_radius=6)
+    pygame.draw.line(screen, (50, 50, 70), (sc_x, sc_y + sc_h // 2 - 1), (sc_x + sc_w, sc_y + sc_h // 2 - 1), 1)
+    oscilloscope.draw(screen, sc_x, sc_y, NEON_GREEN)
+    
+    label = "CLIP!" if oscilloscope.clipping else f"peak {oscilloscope.peak:.2f}"
+    label_surf = font_xs.render(label, True, NEON_MAGENTA if oscilloscope.clipping else GRAY)
+    screen.blit(label_surf, (sc_x + sc_w - label_surf.get_width() - 2, sc_y + 2))
+
+# AUDIO DEBUG OVERLAY - Toggle with D key
+def sd_mixer_debug_line():
+    if sd_mixer is None:
+        return "sfx mixer SDL (--sd-mixer per sounddevice)"
+    mixer_stats = sd_mixer.stats.snapshot()
+    return (f"sd mixer {sd_mixer.active_voices}/{sd_mixer.max_voices}  cb {mixer_stats['mean_ms']:.3f}"
+            f"  max {mixer_stats['max_ms']:.2f} ms  out {sd_mixer.output_latency_ms:.1f} ms"
+            f"  late {sd_mixer.late_starts}  xrun {mixer_stats['status']['output_underflow']}")
+
+def draw_audio_debug():
+    if not game.show_audio_debug:
+        return
+    
+    stats = audio_stats.snapshot()
+    music = soundtrack.stats()
+    voices = sfx_voices.stats(time.perf_counter())
+    panel_w, panel_h = 300, 290
+    panel_x, panel_y = 15, 90
+    
+    bg_surf = pygame.Surface((panel_w, panel_h), pygame.SRCALPHA)
+    bg_surf.fill((10, 10, 20, 190))
+    pygame.draw.rect(bg_surf, NEON_ORANGE, (0, 0, panel_w, panel_h), 1)
+    screen.blit(bg_surf, (panel_x, panel_y))
+    
+    frame_ms = clock.get_time()
+    status = stats['status']
+    lines = [
+        ("AUDIO DEBUG", NEON_ORANGE),
+        (f"block {mic_capture.blocksize}  period {stats['period_ms']:.1f} ms", WHITE),
+        (f"callback last {stats['last_ms']:.3f}  mean {stats['mean_ms']:.3f}  max {stats['max_ms']:.2f} ms", WHITE),
+        (f"overflow {status['input_overflow']}  underflow {status['input_underflow']}  errors {stats['errors']}",
+         NEON_MAGENTA if status['input_overflow'] or stats['errors'] else NEON_GREEN),
+        (f"ADC->frame {stats['adc_gap_ms']:.1f}  mean {stats['adc_gap_mean_ms']:.1f}  max {stats['adc_gap_max_ms']:.1f} ms", WHITE),
+        (f"denoise {'ON' if noise_suppressor.enabled else 'OFF'}  {noise_suppressor.last_cost_ms:.3f}"
+         f"  mean {noise_suppressor.mean_cost_ms:.3f} ms  dropped {noise_suppressor.dropped}", WHITE),
+        (f"music q {music['queued']}/{music['capacity']}  underruns {music['underruns']}  flushed {music['flushed']}"
+         f"  render {music['mean_render_ms']:.2f} ms  {music['bpm']:.0f} bpm",
+         NEON_MAGENTA if music['underruns'] else WHITE),
+        (sd_mixer_debug_line(), WHITE),
+        (f"sfx voices {voices['active']}/{voices['voices']}  played {voices['played']}  stolen {voices['stolen']}"
+         f"  dropped {voices['dropped']} (cooldown {voices['dropped_cooldown']}, busy {voices['dropped_busy']})", WHITE),
+        (f"frame {frame_ms} ms  ({clock.get_fps():.0f} FPS)", NEON_MAGENTA if frame_ms > 20 else NEON_GREEN),
+    ]
+    for i, (text, color) in enumerate(lines):
+        surf = font_xs.render(text, True, color)
+        screen.blit(surf, (panel_x + 8, panel_y + 6 + i * 20))
+    
+    # Istogramma durata callback / periodo di blocco
+    hist = stats['histogram']
+    total = max(1, sum(count for _, count in hist))
+    hist_x = panel_x + 8
+    hist_y = panel_y + panel_h - 12
+    bar_w = (panel_w - 16) // len(hist)
+    for i, (edge, count) in enumerate(hist):
+        h = int(50 * count / total)
+        color = NEON_GREEN if edge <= 0.25 else (NEON_YELLOW if edge <= 1.0 else NEON_MAGENTA)
+        pygame.draw.rect(screen, color, (hist_x + i * bar_w, hist_y - h, bar_w - 2, max(1, h)))
+        label = "inf" if edge == float('inf') else f"{edge:g}"
+        label_surf = font_xs.render(label, True, GRAY)
+        label_surf = pygame.transform.scale(label_surf, (label_surf.get_width() * 2 // 3, label_surf.get_height() * 2 // 3))
+        screen.blit(label_surf, (hist_x + i * bar_w, hist_y + 1))
+
+
 def draw_vignette(surf):
     """Optimized vignette effect"""
     scrw = surf.get_width()
@@ -3447,7 +3872,8 @@ def draw_menu():
     
     instructions = [
         "Control with voice - Avoid obstacles",
-        "SPACE: Jump/Start  |  C: Calibrate  |  F: Fullscreen"
+        "SPACE: Jump/Start  |  C: Calibrate  |  K: Voice Commands  |  M: Music  |  F: Fullscreen",
+        "P: Mic Profile  |  V: Voice Mode  |  N: Denoise  |  T: Noise Tracking  |  D: Debug  |  W: Spectrum  |  O: Scope"
     ]
     
     for i, text in enumerate(instructions):
@@ -3480,6 +3906,22 @@ def draw_menu():
     # === STATUS BAR (Bottom) ===
     status_bar_y = scr_h - 25
     
+    # Mic profile
+    profile_label = CAPTURE_PROFILES.get(mic_capture.profile, {}).get('label', mic_capture.profile)
+    source_label = "MIC" if mic_capture.source_spec == 'mic' else mic_capture.source_spec.upper()
+    if mic_capture.state == 'active':
+        mic_status, mic_color = f"{profile_label}  {mic_capture.blocksize} ({mic_capture.latency_ms():.0f} ms)", NEON_BLUE
+    elif mic_capture.state == 'failed':
+        mic_status, mic_color = "OFF - KEYBOARD / PAD (retrying)", NEON_MAGENTA
+    else:
+        mic_status, mic_color = "STARTING" + "." * (pygame.time.get_ticks() // 400 % 4), NEON_ORANGE
+    mic_text = (f"{source_label}: {mic_status}"
+                f"  |  VOICE: {game.control_mode.upper()}"
+                f"  |  DENOISE: {'ON' if game.denoise else 'OFF'}"
+                f"  |  WORDS: {'ON' if game.voice_commands else 'OFF'}")
+    mic_surf = font_xs.render(mic_text, True, mic_color)
+    screen.blit(mic_surf, (center_x - mic_surf.get_width() // 2, status_bar_y - 25))
+    
     # Mode
     fs_status = "FULLSCREEN" if game.fullscreen else "WINDOWED"
     fs_color = NEON_GREEN if game.fullscreen else DARK_GRAY
@@ -3532,11 +3974,24 @@ def draw_calibration():
         phase_text = "PHASE 1: SILENCE"
         desc = "🤫 Don't make any noise for 1.5 seconds..."
         rms_list = game.calib_silence
-    else:
+    elif game.state == "CALIBRATE_SHOUT":
         color = NEON_MAGENTA
         phase_text = "PHASE 2: SHOUT!"
         desc = "📢 SCREAM, CLAP, WHISTLE - GO LOUD!"
         rms_list = game.calib_shout
+    elif game.state in KEYWORD_CALIB_STATES:
+        color = NEON_GREEN
+        word = KEYWORD_CALIB_STATES[game.state].upper()
+        phase_text = f"PHASE {game.calibration_phases().index(game.state) + 1}: SAY \"{word}\""
+        desc = f"🗣 Say \"{word}\" once, clearly"
+        rms_list = None
+    elif game.state in BAND_CALIB_STATES:
+        band = BAND_CALIB_STATES.index(game.state)
+        color = NEON_BLUE if band == 0 else NEON_ORANGE
+        label, desc = BAND_CALIB_TEXT[VOICE_BANDS[band][0]]
+        phase_text = f"PHASE {3 + band}: {label}"
+        rms_list = game.calib_band_shout[band]
+    value = current_band_energy[band] if game.state in BAND_CALIB_STATES else current_rms
     
     title = font_xl.render(phase_text, True, color)
     screen.blit(title, (scr_w // 2 - title.get_width() // 2, 80))
@@ -3545,7 +4000,7 @@ def draw_calibration():
     screen.blit(desc_text, (scr_w // 2 - desc_text.get_width() // 2, 180))
     
     # Large RMS display
-    rms_display = font_xl.render(f"{current_rms:.4f}", True, color)
+    rms_display = font_xl.render(f"{value:.4f}", True, color)
     rms_w = rms_display.get_width()
     rms_h = rms_display.get_height()
     
@@ -3580,9 +4035,9 @@ def draw_calibration():
     screen.blit(pct_text, (scr_w // 2 - pct_text.get_width() // 2, bar_y + 7))
     
     if rms_list:
-        mean_val = np.mean(rms_list)
-        max_val = np.max(rms_list)
-        stats = font_sm.render(f"Mean: {mean_val:.4f} | Max: {max_val:.4f}", True, GRAY)
+        p90_val = rms_list.quantile(0.9)
+        stats = font_sm.render(f"Mean: {rms_list.mean:.4f} | P90: {p90_val:.4f} | Max: {rms_list.max:.4f}",
+                               True, GRAY)
         screen.blit(stats, (scr_w // 2 - stats.get_width() // 2, 520))
     
     draw_vignette(screen)
@@ -3953,9 +4408,10 @@ def reset_game():
     game.level_notifications = []
     game.spawn_timer = 0
     game.spawn_interval = 115
+    game.tick_history.clear()
 
     game.state = "GAME"
-    play_sound(SOUND_BOOM, force=True)
+    play_sound(SOUND_BOOM, 'boom')
 
 
 running = True
@@ -3989,9 +4445,36 @@ print("🎮 Game loop avviato")
 
 while running:
     clock.tick(60)
+    frame_time = time.perf_counter()
+    if audio_worker_pending is not None:
+        adopt_audio_worker()
+    mic_capture.poll()
+    pump_soundtrack()
+    noise_suppressor.set_learning(game.state == "CALIBRATE_SILENCE")
+    update_mic_levels()
+    voice_events = stamp_voice_events(voice_onset.process(mic_ring, game.silence_threshold, game.shout_threshold))
+    keyword_spotter.set_recording(KEYWORD_CALIB_STATES.get(game.state))
+    spoken_words = []
+    if game.voice_commands or keyword_spotter.recording:
+        spoken_words = keyword_spotter.process(mic_ring, game.word_silence())
+    keyword_jump = False
+    for word in spoken_words:
+        print(f"🗣 Comando vocale: {word}")
+        if word == 'start' and game.state in ("MENU", "GAME_OVER") and voice_trigger_cooldown == 0:
+            reset_game()
+            voice_trigger_cooldown = 30
+        elif word == 'menu' and game.state in ("GAME", "GAME_OVER"):
+            game.save_calibration()
+            reset_celestial_objects()
+            game.state = "MENU"
+        elif word == 'jump' and game.state == "GAME" and not game.ai_active:
+            manual_flap()
+            keyword_jump = True
+    # Con la parola "start" registrata il rumore non avvia più la partita
+    rms_start = not (game.voice_commands and keyword_spotter.has('start'))
     
     # ===== VOICE TRIGGER - MENU STATE =====
-    if game.state == "MENU":
+    if game.state == "MENU" and rms_start:
         if current_rms > MENU_START_RMS_THRESHOLD:
             # Incrementa timer (0.0 -> 1.0 in 1 secondo)
             voice_start_timer = min(1.0, voice_start_timer + (1.0 / (MENU_START_DURATION_SEC * 60)))
@@ -4005,7 +4488,7 @@ while running:
             voice_start_timer = max(0.0, voice_start_timer - 0.05)
     
     # ===== VOICE TRIGGER - GAME OVER STATE =====
-    elif game.state == "GAME_OVER":
+    elif game.state == "GAME_OVER" and rms_start:
         if current_rms > MENU_START_RMS_THRESHOLD:
             voice_start_timer = min(1.0, voice_start_timer + (1.0 / (MENU_START_DURATION_SEC * 60)))
             
@@ -4120,31 +4603,96 @@ while running:
                 if game.state == "MENU":
                     game.toggle_fullscreen()
             
+            # CAPTURE PROFILE with P
+            if event.key == pygame.K_p:
+                if game.state == "MENU":
+                    game.capture_profile = mic_capture.next_profile()
+                    mic_capture.start_async(game.capture_profile)
+                    game.save_config()
+            
+            # NOISE SUPPRESSION with N
+            if event.key == pygame.K_n:
+                if game.state == "MENU":
+                    game.denoise = not game.denoise
+                    noise_suppressor.enabled = game.denoise
+                    if game.denoise and noise_suppressor.noise_psd is None:
+                        print("⚠ Denoiser: nessun profilo di rumore, ricalibra (C)")
+                    print(f"✓ Denoiser: {'ON' if game.denoise else 'OFF'}")
+                    game.save_config()
+            
+            # NOISE FLOOR TRACKING with T
+            if event.key == pygame.K_t:
+                if game.state == "MENU":
+                    game.track_noise_floor = not game.track_noise_floor
+                    noise_floor_tracker.reset()
+                    game.silence_threshold = game.calibrated_silence
+                    print(f"✓ Noise floor tracking: {'ON' if game.track_noise_floor else 'OFF'}")
+                    game.save_config()
+            
+            # CONTROL MODE with V (volume / pitch)
+            if event.key == pygame.K_v:
+                if game.state == "MENU":
+                    idx = CONTROL_MODES.index(game.control_mode)
+                    game.control_mode = CONTROL_MODES[(idx + 1) % len(CONTROL_MODES)]
+                    print(f"✓ Controllo voce: {game.control_mode}")
+                    if game.control_mode == 'bands':
+                        print("  Bassa = flap, alta = picchiata (C per calibrare le bande)")
+                    game.save_config()
+            
+            # VOICE COMMANDS with K
+            if event.key == pygame.K_k:
+                if game.state == "MENU":
+                    game.voice_commands = not game.voice_commands
+                    print(f"✓ Comandi vocali: {'ON' if game.voice_commands else 'OFF'}")
+                    missing = [word for word in KEYWORDS if not keyword_spotter.has(word)]
+                    if game.voice_commands and missing:
+                        print(f"  Parole da registrare: {', '.join(missing)} (C per calibrare)")
+                    game.save_config()
+            
             # TOGGLE EQUALIZER with E
             if event.key == pygame.K_e:
                 if game.state == "GAME":
                     game.show_equalizer = not game.show_equalizer
                     print(f"✓ Equalizer: {'ON' if game.show_equalizer else 'OFF'}")
             
+            # TOGGLE SPECTROGRAM WATERFALL with W
+            if event.key == pygame.K_w:
+                game.show_waterfall = not game.show_waterfall
+                print(f"✓ Spectrogram: {'ON' if game.show_waterfall else 'OFF'}")
+            
+            # TOGGLE MUSIC with M
+            if event.key == pygame.K_m:
+                game.music_enabled = not game.music_enabled
+                game.save_config()
+                print(f"✓ Musica: {'ON' if game.music_enabled else 'OFF'}")
+            
+            # TOGGLE OSCILLOSCOPE with O
+            if event.key == pygame.K_o:
+                game.show_scope = not game.show_scope
+                print(f"✓ Oscilloscope: {'ON' if game.show_scope else 'OFF'}")
+            
+            # TOGGLE AUDIO DEBUG with D
+            if event.key == pygame.K_d:
+                game.show_audio_debug = not game.show_audio_debug
+                print(f"✓ Audio debug: {'ON' if game.show_audio_debug else 'OFF'}")
+            
             if event.key == pygame.K_c:
                 if game.state == "MENU":
                     game.calibrated = False
-                    game.calib_silence = []
-                    game.calib_shout = []
-                    game.calib_timer = 0
-                    game.state = "CALIBRATE_SILENCE"
-                    play_sound(SOUND_BEEP, force=True)
+                    game.start_calibration()
+                    play_sound(SOUND_BEEP, 'ui')
 
+            if event.key in (pygame.K_SPACE, pygame.K_UP):
+                if game.state == "GAME" and not voice_input_active() and not game.ai_active:
+                    manual_flap()
+            
             if event.key == pygame.K_SPACE:
                 if game.state == "MENU":
-                    if game.calibrated:
+                    if game.calibrated or not voice_input_active():
                         reset_game()
                     else:
-                        game.calib_silence = []
-                        game.calib_shout = []
-                        game.calib_timer = 0
-                        game.state = "CALIBRATE_SILENCE"
-                        play_sound(SOUND_BEEP, force=True)
+                        game.start_calibration()
+                        play_sound(SOUND_BEEP, 'ui')
                         
                 elif game.state == "GAME_OVER":
                     reset_game()
@@ -4155,19 +4703,28 @@ while running:
                     game.ai_active = not game.ai_active
                     print(f"AI {'ON' if game.ai_active else 'OFF'}")
 
+        # Joypad hot-plug
+        if event.type == pygame.JOYDEVICEADDED:
+            joystick = pygame.joystick.Joystick(event.device_index)
+            if all(j.get_instance_id() != joystick.get_instance_id() for j in joysticks):
+                joysticks.append(joystick)
+                print(f"✓ Joypad connesso: {joystick.get_name()}")
+        elif event.type == pygame.JOYDEVICEREMOVED:
+            joysticks[:] = [j for j in joysticks if j.get_instance_id() != event.instance_id]
+            print("⚠ Joypad scollegato")
+        
         # Joypad buttons (invariato)
         if event.type == pygame.JOYBUTTONDOWN:
             # A button (0) = Start/Jump
             if event.button == 0:
-                if game.state == "MENU":
-                    if game.calibrated:
+                if game.state == "GAME" and not voice_input_active() and not game.ai_active:
+                    manual_flap()
+                elif game.state == "MENU":
+                    if game.calibrated or not voice_input_active():
                         reset_game()
                     else:
-                        game.calib_silence = []
-                        game.calib_shout = []
-                        game.calib_timer = 0
-                        game.state = "CALIBRATE_SILENCE"
-                        play_sound(SOUND_BEEP, force=True)
+                        game.start_calibration()
+                        play_sound(SOUND_BEEP, 'ui')
                         
                 elif game.state == "GAME_OVER":
                     reset_game()
@@ -4196,62 +4753,92 @@ while running:
     if game.state == "MENU":
         draw_menu()
     
-    elif game.state in ["CALIBRATE_SILENCE", "CALIBRATE_SHOUT"]:
+    elif game.state in game.calibration_phases():
         game.calib_timer += 1
-        
-        if game.state == "CALIBRATE_SILENCE" and current_rms > 0:
-            game.calib_silence.append(current_rms)
-        elif game.state == "CALIBRATE_SHOUT" and current_rms > 0:
-            game.calib_shout.append(current_rms)
+        game.add_calibration_sample(current_rms, current_band_energy)
         
         if game.calib_timer >= game.calib_duration:
+            phases = game.calibration_phases()
+            phase = phases.index(game.state)
             if game.state == "CALIBRATE_SILENCE":
+                game.finish_silence_calibration()
+            if phase + 1 < len(phases):
                 game.calib_timer = 0
-                game.state = "CALIBRATE_SHOUT"
-                play_sound(SOUND_WHOOSH, force=True)
+                game.state = phases[phase + 1]
+                play_sound(SOUND_WHOOSH, 'ui')
             else:
-                if game.calib_silence:
-                    game.silence_threshold = np.mean(game.calib_silence) * 1.3
-                if game.calib_shout:
-                    game.shout_threshold = np.max(game.calib_shout) * 0.75
-                
+                # Il template dell'ultima parola va nei template prima di salvare
+                keyword_spotter.set_recording(None)
+                game.finish_calibration()
                 game.save_calibration()
                 reset_game()
         
-        draw_calibration()
+        # Ultima fase appena chiusa: lo stato è già "GAME", niente schermata di calibrazione
+        if game.state in game.calibration_phases():
+            draw_calibration()
     
     elif game.state == "GAME":
-        if current_rms > game.silence_threshold:
-            level = (current_rms - game.silence_threshold) / (game.shout_threshold - game.silence_threshold)
-            level = max(0.0, min(1.0, level))
-        else:
-            level = 0.0
+        # Rumore di fondo continuo (opzionale): aggiorna silence_threshold senza ricalibrare
+        if game.track_noise_floor and noise_floor_tracker.add(current_rms):
+            game.apply_noise_floor(noise_floor_tracker.floor)
+        
+        # Flap discreti dal rilevatore di onset (il più forte del frame)
+        flap = max(voice_events, key=lambda ev: ev.intensity, default=None)
+        level = flap.intensity if flap else 0.0
                 
         # *** AI HA GIA' MODIFICATO velocity SE ATTIVA ***
         gravity = 0.45 + (game.current_level - 1) * 0.040  # +0.035/livello [file:1]
         jump_power = 9.5 + (game.current_level - 1) * 0.95  # +0.45/livello
+        v_min = -11 - (game.current_level - 1) * 0.5
+        v_max = 15 + (game.current_level - 1) * 0.3
 
+        game.tick_history.append((frame_time, game.player_y, game.velocity))
+        compensated = None
         game.velocity += gravity
-        if level > 0.1 and not game.ai_active:  # Voice solo se AI spenta
+        manual = not voice_input_active() or keyword_jump
+        if game.control_mode == 'pitch' and not manual:
+            # Il pitch decide l'altezza target, il volume fa da gate
+            if current_rms > game.silence_threshold and not game.ai_active:
+                pitch = pitch_tracker.update(mic_frame_index)
+                if pitch is not None:
+                    target_y = PitchTracker.target_y(pitch, scr_h, game.player_size)
+                    game.velocity = (target_y - game.player_y) * PITCH_FOLLOW_GAIN
+            else:
+                pitch_tracker.smoothed = None
+        elif game.control_mode == 'bands' and not manual:
+            # Bassa = flap (forza dal livello), alta = picchiata finché il gate resta aperto
+            band_levels, band_opened = game.update_band_gates(current_band_energy)
+            if band_opened[0]:
+                game.band_flap_timer = BAND_FLAP_FRAMES
+            if not game.ai_active:
+                if game.band_flap_timer > 0 and game.band_gate[0]:
+                    game.velocity = min(game.velocity, -jump_power * (band_levels[0] ** 0.75))
+                if game.band_gate[1]:
+                    game.velocity += BAND_DIVE_ACCEL * band_levels[1]
+            game.band_flap_timer = max(0, game.band_flap_timer - 1)
+        elif level > 0.0 and not game.ai_active:  # Voice solo se AI spenta
             game.velocity = -jump_power * (level ** 0.75)
-        game.velocity = max(-11 - (game.current_level - 1) * 0.5, 
-                        min(15 + (game.current_level - 1) * 0.3, 
-                            game.velocity))
-        game.player_y += game.velocity
+            # Applica il flap al tick in cui il suono è stato catturato
+            compensated = compensate_flap(flap.adc_time, game.velocity, gravity, v_min, v_max)
+        if compensated:
+            game.player_y, game.velocity = compensated
+        else:
+            game.velocity = max(v_min, min(v_max, game.velocity))
+            game.player_y += game.velocity
         # Resto della tua logica GAME identica...
         if game.player_y < game.player_size:
             game.player_y = game.player_size
             game.velocity = 0
             for _ in range(10):
                 game.particles.append(Particle(150, game.player_y, random.uniform(-4, 4), random.uniform(-5, 0), NEON_GREEN, 40, random.randint(4, 8)))
-            play_sound(SOUND_BEEP)
+            play_sound(sfx_bank.get('beep', random.choice((1, 2, 3))), 'beep')
         
         if game.player_y > scr_h - game.player_size:
             game.player_y = scr_h - game.player_size
             game.velocity = 0
             for _ in range(10):
                 game.particles.append(Particle(150, game.player_y, random.uniform(-4, 4), random.uniform(0, 5), NEON_MAGENTA, 40, random.randint(4, 8)))
-            play_sound(SOUND_BEEP)
+            play_sound(sfx_bank.get('beep', random.choice((-5, -4, -3)), cutoff=2500), 'beep')
         
         game.spawn_timer += 1 
         if game.spawn_timer > game.spawn_interval:
@@ -4289,7 +4876,8 @@ while running:
                     vy = math.sin(angle) * speed
                     game.particles.append(Particle(150, game.player_y, vx, vy, NEON_GREEN, 45, random.randint(5, 9)))
                 
-                play_sound(SOUND_WHOOSH)
+                # Sale con la combo (combo max 5: fino a +8 semitoni)
+                play_sound(sfx_bank.get('whoosh', 2 * (game.combo - 1)), 'whoosh')
                 game.check_level_up()
             
             if obs.x < -obs.width:
@@ -4314,7 +4902,7 @@ while running:
                 game.explosion_animation = ComicExplosion(150, game.player_y)
                 game.state = "EXPLODING"
 
-                play_sound(SOUND_COLLISION, force=True)
+                play_sound(SOUND_COLLISION, 'collision')
 
                 if game.score > game.high_score:
                     game.high_score = game.score
@@ -4372,6 +4960,9 @@ while running:
     elif game.state == "GAME_OVER":
         draw_gameover()
     
+    draw_waterfall()
+    draw_oscilloscope()
+    draw_audio_debug()
     pygame.display.flip()
 
 
@@ -4384,7 +4975,9 @@ while running:
 
 
 print("✓ Chiusura gioco...")
+soundtrack.stop()
+if sd_mixer is not None:
+    sd_mixer.close()
 pygame.quit()
-stream.stop()
-stream.close()
+mic_capture.close()
 sys.exit(0)
@@ -0,0 +1,229 @@
+"""
+VOICE RUNNER PRO - Colonna sonora procedurale
+Un thread renderizza la musica a chunk fissi (NumPy a blocchi, fase e filtri
+continui tra un chunk e l'altro) in una coda limitata; il gioco pesca i chunk
+pronti senza mai aspettare la sintesi. Tempo e tonalità seguono livello e
+velocità: a un cambio i chunk già in coda si scartano e la sintesi riparte
+dallo stato del primo scartato. I chunk sono buffer di un pool preallocato.
+Nessuna dipendenza da pygame.
+"""
+
+import time
+import queue
+import threading
+
+import numpy as np
+
+from synth_filters import new_filter
+
+MUSIC_SAMPLE_RATE = 44100
+MUSIC_CHUNK = 8192               # ~186 ms per chunk
+MUSIC_QUEUE_CHUNKS = 6           # ~1.1 s di anticipo sulla riproduzione
+MUSIC_GAIN = 0.22                # Sotto gli effetti sonori
+
+MUSIC_BPM_BASE = 96
+MUSIC_BPM_MAX = 150
+MINOR_SCALE = (0, 2, 3, 5, 7, 8, 10)
+
+# Gradi della scala minore per sedicesimo (una battuta), None = pausa
+BASS_PATTERN = (0, None, 0, None, 0, None, 3, None, 5, None, 5, None, 4, None, 3, None)
+ARP_DEGREES = (0, 2, 4, 7, 4, 2, 9, 7)
+KICK_STEPS = frozenset((0, 8))
+HAT_STEPS = frozenset(range(2, 16, 4))
+
+def music_params(level, obstacle_speed, base_speed=None):
+    """(bpm, tonica in semitoni) da livello e velocità degli ostacoli"""
+    speed_factor = obstacle_speed / base_speed if base_speed else 1.0
+    bpm = min(MUSIC_BPM_MAX, MUSIC_BPM_BASE * speed_factor + 2 * (level - 1))
+    # Tonica per quarte ascendenti: ogni livello cambia tonalità
+    root = ((level - 1) * 5) % 12
+    return bpm, root
+
+def _degree_freq(root, degree, octave):
+    semis = root + MINOR_SCALE[degree % 7] + 12 * (degree // 7)
+    return 55.0 * 2.0 ** (octave + semis / 12)
+
+class SoundtrackEngine:
+    """Sintetizzatore a step: basso, arpeggio, cassa e charleston, renderizzati chunk per chunk"""
+
+    def __init__(self, sample_rate=MUSIC_SAMPLE_RATE, chunk=MUSIC_CHUNK, queue_chunks=MUSIC_QUEUE_CHUNKS, seed=None):
+        self.sample_rate = sample_rate
+        self.chunk = chunk
+        self.chunks = queue.Queue(maxsize=queue_chunks)    # (stato a inizio chunk, buffer)
+        self.params = music_params(1, 1.0)
+        self._params_changed = threading.Event()
+        self.rng = np.random.default_rng(seed)
+
+        # Stato continuo tra i chunk
+        self.step_pos = 0.0
+        self.bass_phase = 0.0
+        self.arp_phase = 0.0
+        self.bass_filter = new_filter('resonant', 420, q=3.0, sample_rate=sample_rate)
+        self.hat_filter = new_filter('highpass', 7000, sample_rate=sample_rate)
+        self.arp_degrees = np.array(ARP_DEGREES)
+
+        self._n = np.arange(chunk, dtype=np.float64)
+        self._mix = np.empty(chunk)
+        # In coda + uno in render + uno in mano al gioco: nessun buffer riusato mentre serve
+        self._pool = np.zeros((queue_chunks + 2, chunk))
+        self._pool_index = 0
+
+        # Statistiche (lette dal gioco)
+        self.rendered = 0
+        self.consumed = 0
+        self.underruns = 0
+        self.flushed = 0
+        self.last_render_ms = 0.0
+        self.mean_render_ms = 0.0
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def set_params(self, level, obstacle_speed, base_speed=None):
+        """Aggiornato dal loop di gioco; a un cambio il thread scarta i chunk in coda"""
+        params = music_params(level, obstacle_speed, base_speed)
+        if params != self.params:
+            self.params = params
+            self._params_changed.set()
+
+    # === RENDER ===
+
+    def render_chunk(self):
+        """Un chunk mono float in [-1, 1], in un buffer del pool (valido per len(pool) - 1 chunk)"""
+        bpm, root = self.params
+        sr = self.sample_rate
+        step_samples = sr * 60.0 / bpm / 4            # Sedicesimi
+        steps = self.step_pos + self._n / step_samples
+        step_index = steps.astype(np.int64)
+        in_step = (steps - step_index) * step_samples / sr   # Secondi dall'inizio dello step
+        slot = step_index % 16
+        attack = np.minimum(1.0, in_step * 400.0)          # 2.5 ms: niente click a inizio step
+        mix = self._mix
+        mix[:] = 0.0
+
+        # Arpeggio nuovo ogni 4 battute (variazione casuale di un grado)
+        bar = int(self.step_pos // 16)
+        if bar % 4 == 0 and int((self.step_pos + self.chunk / step_samples) // 16) != bar:
+            self.arp_degrees = np.array(ARP_DEGREES) + self.rng.integers(-1, 2, len(ARP_DEGREES))
+
+        # Basso: dente di sega per step con filtro risonante continuo
+        bass_deg = np.array([-1 if d is None else d for d in BASS_PATTERN])[slot]
+        bass_on = bass_deg >= 0
+        bass_freq = np.array([_degree_freq(root, max(d, 0), 0) for d in range(16)])[np.maximum(bass_deg, 0)]
+        phase = self.bass_phase + np.cumsum(bass_freq / sr)
+        self.bass_phase = float(phase[-1] % 1.0)
+        bass = (2.0 * (phase % 1.0) - 1.0) * bass_on * np.exp(-in_step * 6.0) * attack
+        mix += self.bass_filter.process_stream(bass) * 0.55
+
+        # Arpeggio: triangolo un'ottava e mezza sopra
+        arp_freq = np.array([_degree_freq(root, int(d), 3) for d in self.arp_degrees])[step_index % len(self.arp_degrees)]
+        phase = self.arp_phase + np.cumsum(arp_freq / sr)
+        self.arp_phase = float(phase[-1] % 1.0)
+        arp = 2.0 * np.abs(2.0 * (phase % 1.0) - 1.0) - 1.0
+        mix += arp * np.exp(-in_step * 14.0) * attack * 0.18
+
+        # Cassa: sweep 120 -> 45 Hz sugli step forti, la fase riparte a ogni colpo
+        kick_on = np.isin(slot, tuple(KICK_STEPS))
+        kick_freq = 45.0 + 75.0 * np.exp(-in_step * 30.0)
+        kick = np.sin(2 * np.pi * kick_freq * in_step) * np.exp(-in_step * 9.0) * kick_on
+        mix += kick * 0.7
+
+        # Charleston: rumore passa-alto
+        hat_on = np.isin(slot, tuple(HAT_STEPS))
+        noise = self.rng.random(self.chunk) * 2.0 - 1.0
+        mix += self.hat_filter.process_stream(noise * np.exp(-in_step * 60.0) * hat_on) * 0.25
+
+        self.step_pos = float(steps[-1] + 1.0 / step_samples)
+        np.tanh(mix, out=mix)
+        out = self._pool[self._pool_index]
+        self._pool_index = (self._pool_index + 1) % len(self._pool)
+        return np.multiply(mix, MUSIC_GAIN, out=out)
+
+    def _snapshot(self):
+        """Stato continuo a inizio chunk: basta per rifare il chunk con altri parametri"""
+        filters = [section.state.copy() for f in (self.bass_filter, self.hat_filter) for section in f.sections]
+        return self.step_pos, self.bass_phase, self.arp_phase, self.arp_degrees, filters
+
+    def _restore(self, snapshot):
+        self.step_pos, self.bass_phase, self.arp_phase, self.arp_degrees, filters = snapshot
+        sections = [section for f in (self.bass_filter, self.hat_filter) for section in f.sections]
+        for section, state in zip(sections, filters):
+            section.state[:] = state
+
+    def render_item(self):
+        """(stato a inizio chunk, chunk): l'elemento che va in coda"""
+        snapshot = self._snapshot()
+        return snapshot, self.render_chunk()
+
+    def flush_stale(self, pending=None):
+        """Parametri cambiati: scarta i chunk in coda (e pending, non ancora accodato)
+        e riparte dallo stato del primo, così la musica prosegue senza salti né attesa di ~1 s"""
+        self._params_changed.clear()
+        items = []
+        while True:
+            try:
+                items.append(self.chunks.get_nowait())
+            except queue.Empty:
+                break
+        if pending is not None:
+            items.append(pending)
+        if items:
+            self._restore(items[0][0])
+            self.flushed += len(items)
+
+    # === THREAD ===
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="soundtrack", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def _run(self):
+        pending = None
+        while not self._stop.is_set():
+            if self._params_changed.is_set():
+                self.flush_stale(pending)
+                pending = None
+            if pending is None:
+                start = time.perf_counter()
+                pending = self.render_item()
+                self.last_render_ms = (time.perf_counter() - start) * 1000
+                self.mean_render_ms = self.mean_render_ms * 0.95 + self.last_render_ms * 0.05
+            # Coda piena = abbastanza anticipo: aspetta (controllando stop e cambi di parametri)
+            try:
+                self.chunks.put(pending, timeout=0.1)
+                self.rendered += 1
+                pending = None
+            except queue.Full:
+                pass
+
+    def next_chunk(self, starving=True):
+        """Chunk pronto o None; non blocca mai. Con starving=True (uscita ferma) None è un underrun.
+        Il buffer è del pool: va copiato prima della prossima chiamata"""
+        try:
+            _, chunk = self.chunks.get_nowait()
+        except queue.Empty:
+            if starving:
+                self.underruns += 1
+            return None
+        self.consumed += 1
+        return chunk
+
+    def stats(self):
+        return {
+            'queued': self.chunks.qsize(),
+            'capacity': self.chunks.maxsize,
+            'rendered': self.rendered,
+            'consumed': self.consumed,
+            'underruns': self.underruns,
+            'flushed': self.flushed,
+            'last_render_ms': self.last_render_ms,
+            'mean_render_ms': self.mean_render_ms,
+            'bpm': self.params[0],
+        }
@@ -0,0 +1,174 @@
+"""
+VOICE RUNNER PRO - Filtri del sintetizzatore
+Biquad IIR (RBJ cookbook) in cascata, valutati a blocchi con prodotti matriciali
+invece che campione per campione, più una media mobile O(n) a somme cumulative.
+I filtri si progettano una volta per cutoff (cache) e si riusano per ogni effetto.
+"""
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+FILTER_KINDS = ('lowpass', 'highpass', 'bandpass', 'resonant')
+FILTER_BLOCK = 64                # Campioni per blocco: costo O(n * FILTER_BLOCK) tutto in BLAS
+RESONANT_Q = 4.0
+
+# ============================================
+# DESIGN
+# ============================================
+
+def biquad_coefficients(kind, freq, q, sample_rate):
+    """Coefficienti normalizzati (b0, b1, b2, a1, a2) di un biquad RBJ"""
+    freq = min(max(freq, 1.0), sample_rate * 0.499)
+    w0 = 2 * math.pi * freq / sample_rate
+    cos_w0 = math.cos(w0)
+    alpha = math.sin(w0) / (2 * q)
+
+    if kind in ('lowpass', 'resonant'):
+        b0 = b2 = (1 - cos_w0) / 2
+        b1 = 1 - cos_w0
+    elif kind == 'highpass':
+        b0 = b2 = (1 + cos_w0) / 2
+        b1 = -(1 + cos_w0)
+    elif kind == 'bandpass':
+        # Guadagno 0 dB al centro banda
+        b0, b1, b2 = alpha, 0.0, -alpha
+    else:
+        raise ValueError(f"Filtro sconosciuto: {kind}")
+
+    a0 = 1 + alpha
+    return (b0 / a0, b1 / a0, b2 / a0, -2 * cos_w0 / a0, (1 - alpha) / a0)
+
+def butterworth_qs(order):
+    """Q delle sezioni di un Butterworth di ordine pari"""
+    return [1 / (2 * math.sin((2 * k + 1) * math.pi / (2 * order))) for k in range(order // 2)]
+
+# ============================================
+# BIQUAD A BLOCCHI
+# ============================================
+
+class Biquad:
+    """Biquad in forma di stato: ogni blocco è y = H x + O s, s' = A^L s + G x"""
+
+    def __init__(self, coefficients, block=FILTER_BLOCK):
+        b0, b1, b2, a1, a2 = coefficients
+        self.coefficients = coefficients
+        self.block = block
+
+        # Forma diretta II trasposta: y = b0 x + s1
+        a = np.array([[-a1, 1.0], [-a2, 0.0]])
+        b = np.array([b1 - a1 * b0, b2 - a2 * b0])
+
+        powers = np.empty((block + 1, 2, 2))
+        powers[0] = np.eye(2)
+        for k in range(1, block + 1):
+            powers[k] = a @ powers[k - 1]
+
+        # Risposta all'impulso h[0] = b0, h[k] = C A^(k-1) B con C = [1, 0]
+        impulse = np.empty(block)
+        impulse[0] = b0
+        impulse[1:] = (powers[:block - 1] @ b)[:, 0]
+        lags = np.arange(block)[:, None] - np.arange(block)[None, :]
+        self._h_t = np.where(lags >= 0, impulse[np.clip(lags, 0, None)], 0.0).T
+        self._o_t = powers[:block, 0, :].T                    # Contributo dello stato iniziale
+        self._g_t = (powers[block - 1::-1] @ b)               # Ingresso -> stato a fine blocco
+        self._a_l_t = powers[block].T
+        self._powers = powers
+        self._b = b
+        self.state = np.zeros(2)
+
+    def reset(self):
+        self.state[:] = 0.0
+
+    def process(self, x, state=None):
+        """Filtra x lungo l'ultimo asse (anche un batch 2-D); con state (1-D) continua da lì e lo aggiorna"""
+        x = np.asarray(x, dtype=np.float64)
+        n = x.shape[-1]
+        lead = x.shape[:-1]
+        if n == 0:
+            return np.zeros(x.shape)
+        blocks = -(-n // self.block)
+        frames = np.zeros(lead + (blocks, self.block))
+        frames.reshape(lead + (-1,))[..., :n] = x
+
+        # Stato a fine blocco: ends[k] = A^L ends[k-1] + G x_k, risolto con uno scan
+        # a raddoppio (log2(blocchi) passi vettoriali) invece di un loop per blocco
+        s0 = np.zeros(2) if state is None else state.astype(np.float64)
+        ends = frames @ self._g_t
+        ends[..., 0, :] += s0 @ self._a_l_t
+        step_t = self._a_l_t
+        offset = 1
+        while offset < blocks:
+            ends[..., offset:, :] += ends[..., :-offset, :] @ step_t
+            step_t = step_t @ step_t
+            offset *= 2
+        starts = np.empty(lead + (blocks, 2))
+        starts[..., 0, :] = s0
+        starts[..., 1:, :] = ends[..., :-1, :]
+
+        out = frames @ self._h_t + starts @ self._o_t
+        if state is not None:
+            # Stato dopo l'ultimo campione reale (il padding non conta)
+            tail = n - (blocks - 1) * self.block
+            state[:] = self._powers[tail] @ starts[-1] + frames[-1, :tail] @ (self._powers[tail - 1::-1] @ self._b)
+        return out.reshape(lead + (-1,))[..., :n]
+
+    def process_stream(self, x):
+        """Come process, mantenendo lo stato interno tra chiamate successive"""
+        return self.process(x, self.state)
+
+class BiquadCascade:
+    """Sezioni biquad in serie (Butterworth di ordine pari o una sezione con Q dato)"""
+
+    def __init__(self, sections):
+        self.sections = sections
+
+    def process(self, x):
+        out = np.asarray(x, dtype=np.float64)
+        for section in self.sections:
+            out = section.process(out)
+        return out
+
+    def process_stream(self, x):
+        out = np.asarray(x, dtype=np.float64)
+        for section in self.sections:
+            out = section.process_stream(out)
+        return out
+
+    def reset(self):
+        for section in self.sections:
+            section.reset()
+
+@lru_cache(maxsize=64)
+def design_filter(kind, cutoff, order=2, q=None, sample_rate=44100):
+    """Filtro progettato una volta e riusato (stato condiviso: per lo streaming usa new_filter)"""
+    return new_filter(kind, cutoff, order, q, sample_rate)
+
+def new_filter(kind, cutoff, order=2, q=None, sample_rate=44100):
+    """Cascata biquad nuova, con stato proprio"""
+    if kind not in FILTER_KINDS:
+        raise ValueError(f"Filtro sconosciuto: {kind}")
+    qs = butterworth_qs(max(2, order - order % 2))
+    if q is not None or kind == 'resonant':
+        # Risonanza sull'ultima sezione, le altre restano Butterworth
+        qs = qs[:-1] + [q if q is not None else RESONANT_Q]
+    return BiquadCascade([Biquad(biquad_coefficients(kind, cutoff, section_q, sample_rate)) for section_q in qs])
+
+# ============================================
+# MEDIA MOBILE O(n)
+# ============================================
+
+def moving_average(x, width):
+    """Boxcar di width campioni via somme cumulative, allineato come np.convolve(mode='same')"""
+    x = np.asarray(x, dtype=np.float64)
+    width = max(1, int(width))
+    if width == 1 or len(x) == 0:
+        return x.copy()
+    sums = np.concatenate(([0.0], np.cumsum(x)))
+    n = len(x)
+    # Uscita i = somma di x[start .. start + width) con start = i + (width-1)//2 - (width-1)
+    start = np.arange(n) + (width - 1) // 2 - (width - 1)
+    lo = np.clip(start, 0, n)
+    hi = np.clip(start + width, 0, n)
+    return (sums[hi] - sums[lo]) / width
@@ -0,0 +1,303 @@
+"""
+VOICE RUNNER PRO - Patch SFX dichiarative
+Un effetto è un dict (oscillatori, FM, rumore, inviluppo, filtro, distorsione)
+compilato una volta in un PatchPlan: fasi, inviluppo e filtro sono precalcolati,
+e ogni render produce in un colpo solo tutte le varianti richieste (pitch, gain)
+riusando buffer di lavoro preallocati. Nessuna dipendenza da pygame.
+"""
+
+import json
+import hashlib
+
+import numpy as np
+
+from synth_filters import design_filter
+
+WAVEFORMS = ('sine', 'saw', 'square', 'triangle', 'pulse', 'noise')
+PCM_SCALE = 32767
+
+# ============================================
+# FORMATO PATCH
+# ============================================
+# {
+#   'duration': 0.25,                          # secondi (con 'notes': divisi tra le note)
+#   'layers': [                                # sommati
+#       {'wave': 'sine', 'freq': (300, 2800),  # Hz costante o sweep lineare (inizio, fine)
+#        'ratio': 1.5,                         # moltiplicatore di fase (armoniche sulla stessa curva)
+#        'fm': (10, 400),                      # vibrato: (Hz, deviazione Hz)
+#        'decay': 5.0,                         # smorzamento exp(-t * decay) del layer
+#        'duty': 0.3,                          # solo 'pulse'
+#        'amp': 0.7},
+#       {'wave': 'noise', 'amp': 0.5},         # rumore bianco uniforme in [-amp, amp]
+#   ],
+#   'notes': [659.25, 830.61],                 # opzionale: arpeggio, i layer senza 'freq' seguono la nota
+#   'note_amps': [0.6, 0.7],                   # guadagno per nota
+#   'clip': 1.0,                               # hard clip del mix
+#   'drive': 1.5,                              # saturazione tanh(mix * drive)
+#   'envelope': (attack, decay, sustain, release),   # per nota se c'è un arpeggio
+#               (attack, rate)                 # oppure pluck: rampa lineare poi exp(-t * rate)
+#   'filter': ('lowpass', 1000),               # (tipo, cutoff[, ordine[, q]]), vedi synth_filters
+#   'normalize': True,                         # picco portato a 1 prima di 'gain'
+#   'gain': 0.95,
+# }
+
+def patch_hash(patch, *extra):
+    """Hash stabile del patch (e di eventuali parametri extra, es. formato del mixer)"""
+    text = json.dumps([patch, *extra], sort_keys=True, default=repr)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def adsr_envelope(frames, attack, decay, sustain, release, sample_rate):
+    """Inviluppo ADSR lineare di frames campioni"""
+    envelope = np.full(frames, float(sustain))
+    attack_n = min(frames, int(attack * sample_rate))
+    decay_n = min(frames - attack_n, int(decay * sample_rate))
+    sustain_end = max(attack_n + decay_n, frames - int(release * sample_rate))
+    envelope[:attack_n] = np.linspace(0, 1, attack_n)
+    envelope[attack_n:attack_n + decay_n] = np.linspace(1, sustain, decay_n)
+    envelope[sustain_end:] = np.linspace(sustain, 0, frames - sustain_end)
+    return envelope
+
+def pluck_envelope(frames, attack, rate, sample_rate):
+    """Attacco lineare di attack secondi, poi decadimento esponenziale"""
+    t = np.arange(frames) / sample_rate
+    return np.where(t < attack, t / attack if attack > 0 else 1.0, np.exp(-(t - attack) * rate))
+
+def make_envelope(frames, spec, sample_rate):
+    if spec is None:
+        return np.ones(frames)
+    if len(spec) == 2:
+        return pluck_envelope(frames, *spec, sample_rate)
+    return adsr_envelope(frames, *spec, sample_rate)
+
+# ============================================
+# PLAN COMPILATO
+# ============================================
+
+class PatchPlan:
+    """Patch compilato: fase base e ampiezza di ogni layer, inviluppo e filtro già pronti"""
+
+    def __init__(self, patch, sample_rate=44100):
+        self.patch = patch
+        self.sample_rate = sample_rate
+        notes = patch.get('notes')
+
+        if notes:
+            note_frames = int(sample_rate * patch['duration'] / len(notes))
+            self.frames = note_frames * len(notes)
+            local_t = np.tile(np.arange(note_frames) / sample_rate, len(notes))
+            note_freq = np.repeat(np.asarray(notes, dtype=np.float64), note_frames)
+            note_amps = patch.get('note_amps', [1.0] * len(notes))
+            envelope = np.tile(make_envelope(note_frames, patch.get('envelope'), sample_rate), len(notes))
+            envelope *= np.repeat(np.asarray(note_amps, dtype=np.float64), note_frames)
+        else:
+            self.frames = int(sample_rate * patch['duration'])
+            local_t = np.arange(self.frames) / sample_rate
+            note_freq = None
+            envelope = make_envelope(self.frames, patch.get('envelope'), sample_rate)
+        t = np.arange(self.frames) / sample_rate
+
+        self.envelope = envelope
+        self.layers = []
+        for layer in patch['layers']:
+            wave = layer.get('wave', 'sine')
+            if wave not in WAVEFORMS:
+                raise ValueError(f"Forma d'onda sconosciuta: {wave}")
+            phase = None
+            if wave != 'noise':
+                ratio = layer.get('ratio', 1.0)
+                if note_freq is not None and 'freq' not in layer:
+                    # Ogni nota riparte da fase 0, come un oscillatore per nota
+                    phase = 2 * np.pi * note_freq * local_t * ratio
+                else:
+                    freq = layer['freq']
+                    if isinstance(freq, (tuple, list)):
+                        inst = np.linspace(freq[0], freq[1], self.frames)
+                    else:
+                        inst = np.full(self.frames, float(freq))
+                    if 'fm' in layer:
+                        rate, depth = layer['fm']
+                        inst = inst + depth * np.sin(2 * np.pi * rate * t)
+                    phase = np.cumsum(2 * np.pi * inst / sample_rate) * ratio
+            amp = np.exp(-t * layer['decay']) * layer.get('amp', 1.0) if 'decay' in layer else layer.get('amp', 1.0)
+            self.layers.append((wave, phase, amp, layer.get('duty', 0.3)))
+
+        spec = patch.get('filter')
+        self.filter = design_filter(spec[0], spec[1], *spec[2:], sample_rate=sample_rate) if spec else None
+        self._work = np.empty((0, self.frames))
+        self._mix = np.empty((0, self.frames))
+
+    def _buffers(self, count):
+        if len(self._work) < count:
+            self._work = np.empty((count, self.frames))
+            self._mix = np.empty((count, self.frames))
+        return self._work[:count], self._mix[:count]
+
+    def render_float(self, pitches=(1.0,), rng=None):
+        """Mix (varianti x campioni) in float64 prima del guadagno finale; può essere un buffer interno"""
+        pitches = np.asarray(pitches, dtype=np.float64).reshape(-1, 1)
+        rng = rng or np.random.default_rng()
+        work, mix = self._buffers(len(pitches))
+        mix[:] = 0.0
+
+        for wave, phase, amp, duty in self.layers:
+            if wave == 'noise':
+                rng.random(out=work)
+                work *= 2.0
+                work -= 1.0
+            else:
+                np.multiply(pitches, phase, out=work)
+                if wave == 'sine':
+                    np.sin(work, out=work)
+                else:
+                    # Fase normalizzata in cicli [0, 1)
+                    work /= 2 * np.pi
+                    np.mod(work, 1.0, out=work)
+                    if wave == 'saw':
+                        work *= 2.0
+                        work -= 1.0
+                    elif wave == 'triangle':
+                        work *= 2.0
+                        work -= 1.0
+                        np.abs(work, out=work)
+                        work *= 2.0
+                        work -= 1.0
+                    else:
+                        # +1 sotto il duty cycle, -1 sopra (square = duty 0.5)
+                        work -= 0.5 if wave == 'square' else duty
+                        np.sign(work, out=work)
+                        work *= -1.0
+            work *= amp
+            mix += work
+
+        if 'clip' in self.patch:
+            np.clip(mix, -self.patch['clip'], self.patch['clip'], out=mix)
+        if 'drive' in self.patch:
+            mix *= self.patch['drive']
+            np.tanh(mix, out=mix)
+        mix *= self.envelope
+        return self.filter.process(mix) if self.filter else mix
+
+    def render(self, pitches=(1.0,), gains=None, rng=None):
+        """PCM int16 stereo (varianti, campioni, 2) pronto per pygame.sndarray.make_sound"""
+        mix = self.render_float(pitches, rng)
+        if self.patch.get('normalize'):
+            mix /= np.maximum(np.abs(mix).max(axis=-1, keepdims=True), 1e-9)
+        scale = self.patch.get('gain', 1.0) * PCM_SCALE
+        if gains is not None:
+            mix *= np.asarray(gains, dtype=np.float64).reshape(-1, 1) * scale
+        else:
+            mix *= scale
+        np.clip(mix, -PCM_SCALE, PCM_SCALE, out=mix)
+        stereo = np.empty(mix.shape + (2,), dtype=np.int16)
+        np.copyto(stereo[..., 0], mix, casting='unsafe')
+        stereo[..., 1] = stereo[..., 0]
+        return stereo
+
+def compile_patch(patch, sample_rate=44100):
+    return PatchPlan(patch, sample_rate)
+
+def render_batch(plans, requests, rng=None):
+    """Render di molti (nome, pitch, gain): un solo render vettoriale per patch, output in ordine"""
+    groups = {}
+    for index, (name, pitch, gain) in enumerate(requests):
+        groups.setdefault(name, []).append((index, pitch, gain))
+
+    results = [None] * len(requests)
+    for name, items in groups.items():
+        indices, pitches, gains = zip(*items)
+        pcm = plans[name].render(pitches, gains, rng)
+        for index, variant in zip(indices, pcm):
+            results[index] = variant
+    return results
+
+# ============================================
+# EFFETTI DEL GIOCO
+# ============================================
+
+SFX_PATCHES = {
+    # Bright and crisp bell-like tone
+    'beep': {
+        'duration': 0.12,
+        'layers': [
+            {'wave': 'sine', 'freq': 1320, 'amp': 0.5},
+            {'wave': 'sine', 'freq': 1980, 'amp': 0.3},
+            {'wave': 'triangle', 'freq': 660, 'amp': 0.2},
+        ],
+        'envelope': (0.005, 0.04, 0.4, 0.075),
+        'gain': 0.85,
+    },
+    # Smooth FM sweep with a harmonic
+    'whoosh': {
+        'duration': 0.25,
+        'layers': [
+            {'wave': 'sine', 'freq': (300, 2800), 'fm': (10, 400), 'amp': 0.7},
+            {'wave': 'sine', 'freq': (300, 2800), 'fm': (10, 400), 'ratio': 1.5, 'amp': 0.3},
+        ],
+        'envelope': (0.015, 0.06, 0.45, 0.175),
+        'filter': ('lowpass', 4000),
+        'gain': 0.85,
+    },
+    # Sub bass sweep + mid punch + noise burst
+    'boom': {
+        'duration': 0.40,
+        'layers': [
+            {'wave': 'sine', 'freq': (80, 30), 'amp': 0.8},
+            {'wave': 'sine', 'freq': 120, 'decay': 5.0, 'amp': 0.4},
+            {'wave': 'noise', 'amp': 0.5},
+        ],
+        'clip': 1.0,
+        'envelope': (0.002, 0.12, 0.18, 0.278),
+        'filter': ('lowpass', 1000),
+        'gain': 0.95,
+    },
+    # Triumphant E major arpeggio, each note louder
+    'levelup': {
+        'duration': 0.50,
+        'notes': [659.25, 830.61, 987.77, 1318.51],  # E5, G#5, B5, E6
+        'note_amps': [0.6, 0.7, 0.8, 0.9],
+        'layers': [
+            {'wave': 'saw', 'amp': 0.6},
+            {'wave': 'pulse', 'ratio': 2.0, 'amp': 0.4},
+        ],
+        'envelope': (0.008, 0.04, 0.75, 0.06),
+        'gain': 0.80,
+    },
+    # Massive impact: bass drop, metallic crash, hard distortion
+    'collision': {
+        'duration': 0.55,
+        'layers': [
+            {'wave': 'sine', 'freq': (70, 20), 'amp': 0.9},
+            {'wave': 'sine', 'freq': (70, 20), 'ratio': 1.5, 'amp': 0.5},
+            {'wave': 'noise', 'amp': 0.7},
+            {'wave': 'pulse', 'freq': 60, 'decay': 3.0, 'amp': 0.5},
+        ],
+        'clip': 1.0,
+        'drive': 1.5,
+        'envelope': (0.001, 0.15, 0.12, 0.399),
+        'filter': ('lowpass', 800),
+        'gain': 0.98,
+    },
+    # Chiptune horror loop (livello sangue): pulse 25% + sub pulse + drone continuo
+    'horror': {
+        'duration': 3.2,
+        'notes': [130.81, 155.56, 174.61, 146.83, 130.81, 116.54, 103.83, 130.81],  # Do3 Mib3 Fa3 Re3 Do3 Si2 Lab2 Do3
+        'layers': [
+            {'wave': 'pulse', 'duty': 0.25, 'amp': 0.225},
+            {'wave': 'pulse', 'ratio': 0.5, 'duty': 0.3, 'amp': 0.0675},
+            {'wave': 'sine', 'freq': 65.41, 'amp': 0.15},
+        ],
+        'envelope': (0.02, 2.5),
+        'filter': ('highpass', 25),           # Toglie il DC dei pulse asimmetrici
+        'gain': 0.6,
+    },
+    # Tuono: rumore rosso (lowpass), attacco breve e lunga coda lineare
+    'thunder': {
+        'duration': 1.2,
+        'layers': [{'wave': 'noise', 'amp': 1.0}],
+        'envelope': (0.023, 1.177, 0.0, 0.0),
+        'filter': ('lowpass', 160),
+        'normalize': True,
+        'gain': 0.6,
+    },
+}
+
@@ -0,0 +1,112 @@
+"""
+VOICE RUNNER PRO - Synthesizer
+API del sintetizzatore del gioco (oscillatori, inviluppi, filtri, effetti) sopra
+i moduli di sintesi: i patch dichiarativi di synth_patches e i biquad di
+synth_filters. Qui c'è solo l'aggancio a pygame (make_sound) e la cache dei plan.
+"""
+
+import numpy as np
+import pygame
+
+from synth_patches import WAVEFORMS, SFX_PATCHES, compile_patch, render_batch, adsr_envelope
+from synth_filters import design_filter, moving_average
+
+
+class Synthesizer:
+    """Professional Software Synthesizer: declarative patches compiled to batched NumPy renders"""
+
+    SAMPLE_RATE = 44100
+
+    # Patch format: see synth_patches.py
+    PATCHES = SFX_PATCHES
+
+    _plans = {}
+    _oscillators = {}
+
+    @classmethod
+    def plan(cls, name):
+        """Compiled render plan for a patch (compiled on first use)"""
+        if name not in cls._plans:
+            cls._plans[name] = compile_patch(cls.PATCHES[name], cls.SAMPLE_RATE)
+        return cls._plans[name]
+
+    @classmethod
+    def render(cls, requests):
+        """Batch render of (name, pitch, gain) requests to int16 stereo PCM, in order"""
+        plans = {name: cls.plan(name) for name, _, _ in requests}
+        return render_batch(plans, requests)
+
+    @staticmethod
+    def make_sound(pcm):
+        sound = pygame.sndarray.make_sound(pcm)
+        sound.set_volume(1.0)
+        return sound
+
+    @classmethod
+    def synthesize(cls, name, pitch=1.0, gain=1.0):
+        """Single sound from a patch"""
+        return cls.make_sound(cls.render([(name, pitch, gain)])[0])
+
+    # --- Building blocks (one-layer patches, biquads) ---
+
+    @classmethod
+    def generate_oscillator(cls, waveform, frequency, duration, sample_rate=44100):
+        """Generate oscillator waveforms: (wave, t)"""
+        if waveform not in WAVEFORMS:
+            waveform = 'sine'
+        key = (waveform, frequency, duration, sample_rate)
+        if key not in cls._oscillators:
+            patch = {'duration': duration, 'layers': [{'wave': waveform, 'freq': frequency}]}
+            cls._oscillators[key] = compile_patch(patch, sample_rate)
+        plan = cls._oscillators[key]
+        wave = plan.render_float()[0].copy()      # render_float riusa i buffer del plan
+        return wave, np.arange(plan.frames) / sample_rate
+
+    @staticmethod
+    def apply_adsr_envelope(wave, attack, decay, sustain_level, release, sample_rate=44100):
+        """Apply ADSR envelope"""
+        return wave * adsr_envelope(len(wave), attack, decay, sustain_level, release, sample_rate)
+
+    @staticmethod
+    def apply_filter(wave, kind, cutoff_freq, order=2, q=None, sample_rate=44100):
+        """Biquad cascade (lowpass, highpass, bandpass, resonant), designed once per cutoff"""
+        if kind == 'lowpass' and cutoff_freq >= sample_rate / 2:
+            return wave
+        return design_filter(kind, cutoff_freq, order, q, sample_rate).process(wave)
+
+    @staticmethod
+    def apply_lowpass_filter(wave, cutoff_freq, sample_rate=44100):
+        """Lowpass filter (2-pole Butterworth)"""
+        return Synthesizer.apply_filter(wave, 'lowpass', cutoff_freq, sample_rate=sample_rate)
+
+    @staticmethod
+    def apply_moving_average(wave, cutoff_freq, sample_rate=44100):
+        """Boxcar smoothing (cumulative sums, O(n) for any width)"""
+        return moving_average(wave, max(2, int(sample_rate / (cutoff_freq * 2))))
+
+    # --- Game effects (patches in SFX_PATCHES) ---
+
+    @classmethod
+    def synthesize_beep(cls):
+        """Bright and crisp beep"""
+        return cls.synthesize('beep')
+
+    @classmethod
+    def synthesize_whoosh(cls):
+        """FM sweep whoosh"""
+        return cls.synthesize('whoosh')
+
+    @classmethod
+    def synthesize_explosion(cls):
+        """Sub bass sweep + noise burst"""
+        return cls.synthesize('boom')
+
+    @classmethod
+    def synthesize_levelup(cls):
+        """Triumphant arpeggio"""
+        return cls.synthesize('levelup')
+
+    @classmethod
+    def synthesize_collision(cls):
+        """Massive impact"""
+        return cls.synthesize('collision')
@@ -0,0 +1,21 @@
+import pytest
+
+pytest.importorskip('pygame')
+
+from bench_synth import is_slower, same_software, machine_info
+
+
+def test_platform_alone_does_not_disable_the_gate():
+    machine = machine_info()
+    assert same_software({**machine, 'platform': 'Linux-other-kernel'}, machine)
+    assert not same_software({**machine, 'numpy': '0.0'}, machine)
+    assert not same_software(None, machine)
+
+
+def test_is_slower_uses_normalised_times():
+    base = {'min_ms': 1.0}
+    # Macchina due volte più lenta: riferimento e caso raddoppiano, nessuna regressione
+    assert not is_slower({'min_ms': 2.0}, reference=2.0, base=base, base_reference=1.0)
+    assert is_slower({'min_ms': 2.0}, reference=1.0, base=base, base_reference=1.0)
+    # Sotto il rumore assoluto non conta
+    assert not is_slower({'min_ms': 0.04}, reference=1.0, base={'min_ms': 0.01}, base_reference=1.0)
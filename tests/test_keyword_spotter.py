@@ -0,0 +1,88 @@
+import math
+
+import numpy as np
+
+from voice_audio import MIC_SAMPLE_RATE, MicRingBuffer, KeywordSpotter, dtw_distance
+
+SR = MIC_SAMPLE_RATE
+
+
+def dtw_reference(a, b):
+    """DTW classica a doppio ciclo, stessa normalizzazione (n + m)"""
+    n, m = len(a), len(b)
+    acc = np.full((n + 1, m + 1), np.inf)
+    acc[0, 0] = 0.0
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            cost = np.linalg.norm(a[i - 1] - b[j - 1])
+            acc[i, j] = cost + min(acc[i - 1, j], acc[i, j - 1], acc[i - 1, j - 1])
+    return acc[n, m] / (n + m)
+
+
+def test_dtw_matches_reference():
+    rng = np.random.default_rng(3)
+    for n, m in ((5, 5), (7, 12), (12, 7), (20, 11)):
+        a = rng.normal(size=(n, 4))
+        b = rng.normal(size=(m, 4))
+        assert math.isclose(dtw_distance(a, b), dtw_reference(a, b), rel_tol=1e-9)
+
+
+def test_dtw_identity_and_ratio_limit():
+    a = np.random.default_rng(4).normal(size=(10, 3))
+    assert dtw_distance(a, a) == 0.0
+    assert dtw_distance(a, a[:4]) == math.inf
+
+
+def word(kind, seconds=0.4):
+    """Parole sintetiche distinguibili: glissando in su, in giù, due vocali"""
+    t = np.arange(int(SR * seconds)) / SR
+    if kind == 'start':
+        freq = 200 + 600 * t / seconds
+    elif kind == 'jump':
+        freq = 800 - 600 * t / seconds
+    else:
+        freq = np.where(t < seconds / 2, 250.0, 700.0)
+    phase = 2 * np.pi * np.cumsum(freq) / SR
+    return (0.3 * (np.sin(phase) + 0.5 * np.sin(3 * phase))).astype(np.float32)
+
+
+def feed(spotter, ring, signal, threshold, block=1024):
+    words = []
+    for i in range(0, len(signal), block):
+        ring.write(signal[i:i + block])
+        words += spotter.process(ring, threshold)
+    for _ in range(20):        # Svuota la coda DTW (un confronto per chiamata)
+        words += spotter.process(ring, threshold)
+    return words
+
+
+def with_silence(signal, rng):
+    gap = (0.002 * rng.normal(size=int(SR * 0.5))).astype(np.float32)
+    return np.concatenate([gap, signal, gap])
+
+
+def test_records_templates_and_recognises_words():
+    rng = np.random.default_rng(5)
+    spotter = KeywordSpotter()
+    ring = MicRingBuffer(SR * 2)
+    spotter.process(ring, 0.02)
+    for kind in ('start', 'jump', 'menu'):
+        spotter.set_recording(kind)
+        assert feed(spotter, ring, with_silence(word(kind), rng), 0.02) == []
+    spotter.set_recording(None)
+    assert sorted(spotter.templates) == ['jump', 'menu', 'start']
+
+    for kind in ('menu', 'start', 'jump'):
+        spoken = 0.8 * word(kind, seconds=0.45) + (0.003 * rng.normal(size=int(SR * 0.45))).astype(np.float32)
+        assert feed(spotter, ring, with_silence(spoken, rng), 0.02) == [kind]
+
+
+def test_gate_above_speech_records_nothing():
+    rng = np.random.default_rng(6)
+    spotter = KeywordSpotter()
+    ring = MicRingBuffer(SR * 2)
+    spotter.process(ring, 1.0)
+    spotter.set_recording('start')
+    feed(spotter, ring, with_silence(word('start'), rng), 1.0)
+    spotter.set_recording(None)
+    assert not spotter.has('start')
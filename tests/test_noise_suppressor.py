@@ -0,0 +1,68 @@
+import numpy as np
+
+from voice_audio import MicRingBuffer, NoiseSuppressor, MIC_SAMPLE_RATE
+
+
+def run(suppressor, signal, blocksize=1000, setup=None):
+    """Passa signal a blocchi nel denoiser; ritorna tutto ciò che è uscito in dst"""
+    src, dst = MicRingBuffer(len(signal) + 1), MicRingBuffer(len(signal) + 1)
+    for start in range(0, len(signal), blocksize):
+        if setup is not None:
+            setup(suppressor, start)
+        src.write(signal[start:start + blocksize])
+        suppressor.process(src, dst)
+    # Posizioni allineate: dst[k] = src[k - hop], in attesa al più due hop
+    assert 0 <= src.write_pos - dst.write_pos < 2 * suppressor.hop
+    return dst.read_latest(dst.write_pos)
+
+
+def test_bypass_is_a_pure_delay():
+    signal = np.random.default_rng(0).uniform(-1, 1, 20000).astype(np.float32)
+    ns = NoiseSuppressor()
+    out = run(ns, signal)
+    d = ns.latency_samples
+    np.testing.assert_array_equal(out[:d], 0.0)
+    np.testing.assert_array_equal(out[d:], signal[:len(out) - d])
+
+
+def test_unit_gain_stft_reconstructs_the_input():
+    # In apprendimento i gain sono 1: la STFT sqrt-Hann 50% deve ricostruire l'ingresso
+    signal = np.random.default_rng(1).uniform(-1, 1, 20000).astype(np.float32)
+    ns = NoiseSuppressor()
+    ns.set_learning(True)
+    out = run(ns, signal)
+    d = ns.latency_samples
+    # Il primo hop esce dalla sola metà destra della finestra (storia iniziale a zero)
+    np.testing.assert_allclose(out[2 * d:], signal[d:len(out) - d], atol=1e-5)
+
+
+def test_switching_from_bypass_to_stft_is_seamless():
+    signal = np.sin(2 * np.pi * 440 * np.arange(30000) / MIC_SAMPLE_RATE).astype(np.float32)
+    ns = NoiseSuppressor()
+    out = run(ns, signal, setup=lambda s, start: s.set_learning(start >= 10000))
+    d = ns.latency_samples
+    np.testing.assert_allclose(out[d:], signal[:len(out) - d], atol=1e-5)
+
+
+def test_learned_profile_attenuates_noise_and_keeps_the_tone():
+    rng = np.random.default_rng(2)
+    n = 30000
+    noise = rng.normal(0, 0.02, 3 * n).astype(np.float32)
+    tone = 0.5 * np.sin(2 * np.pi * 440 * np.arange(n) / MIC_SAMPLE_RATE).astype(np.float32)
+    signal = noise.copy()
+    signal[2 * n:] += tone
+
+    def setup(ns, start):
+        # Primo terzo: apprendimento del profilo; poi soppressione attiva
+        ns.set_learning(start < n)
+        ns.enabled = start >= n
+
+    ns = NoiseSuppressor()
+    out = run(ns, signal, setup=setup)
+    assert ns.noise_psd is not None
+    d = ns.latency_samples
+    rms = lambda x: float(np.sqrt(np.mean(x ** 2)))
+    out_noise = out[n + d + 2000:2 * n + d - 2000]
+    out_tone = out[2 * n + d + 2000:len(out) - 2000]
+    assert rms(out_noise) < 0.4 * rms(noise[n:2 * n])
+    assert 0.9 < rms(out_tone) / rms(tone[2000:len(out_tone) + 2000]) < 1.1
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from voice_audio import MicRingBuffer, VoiceOnsetDetector, MIC_SAMPLE_RATE
+
+SILENCE, SHOUT = 0.02, 0.2
+
+
+def shouts(amplitude=0.25, attack_ms=30.0, length_ms=200.0, gap_ms=400.0, count=4, seed=0):
+    """Urli identici (attacco lineare, tono armonico) separati da silenzio con poco rumore"""
+    sr = MIC_SAMPLE_RATE
+    rng = np.random.default_rng(seed)
+    attack, length, gap = (int(sr * ms / 1000) for ms in (attack_ms, length_ms, gap_ms))
+    t = np.arange(length) / sr
+    env = np.minimum(1.0, np.arange(length) / attack) * np.minimum(1.0, (length - np.arange(length)) / attack)
+    shout = amplitude * env * (np.sin(2 * np.pi * 220 * t) + 0.5 * np.sin(2 * np.pi * 440 * t)) / 1.5
+    pieces = [np.zeros(gap)]
+    for _ in range(count):
+        pieces += [shout, np.zeros(gap)]
+    signal = np.concatenate(pieces)
+    return (signal + rng.normal(0.0, 0.002, len(signal))).astype(np.float32)
+
+
+def detect(signal, blocksize):
+    ring = MicRingBuffer(MIC_SAMPLE_RATE)
+    detector = VoiceOnsetDetector()
+    detector.process(ring, SILENCE, SHOUT)        # Cursore a 0, prima del primo campione
+    events = []
+    for start in range(0, len(signal), blocksize):
+        ring.write(signal[start:start + blocksize])
+        events += detector.process(ring, SILENCE, SHOUT)
+    return [(ev.sample_pos, ev.intensity) for ev in events]
+
+
+@pytest.mark.parametrize('blocksize', [512, 1024, 2048, 4096])
+def test_events_do_not_depend_on_blocksize(blocksize):
+    signal = shouts()
+    reference = detect(signal, 256)
+    assert len(reference) == 4
+    events = detect(signal, blocksize)
+    assert [pos for pos, _ in events] == [pos for pos, _ in reference]
+    np.testing.assert_allclose([i for _, i in events], [i for _, i in reference], rtol=1e-6)
+
+
+def test_intensity_is_the_peak_after_the_onset():
+    events = detect(shouts(amplitude=0.25, attack_ms=30.0), 256)
+    # Stessa ampiezza per ogni urlo: stessa intensità (a meno della fase sulla griglia degli hop)
+    intensities = [i for _, i in events]
+    assert max(intensities) - min(intensities) < 0.01
+    assert intensities[0] > 0.5
+
+
+def test_event_is_emitted_only_after_its_window_closes():
+    signal = shouts(count=1)
+    ring = MicRingBuffer(MIC_SAMPLE_RATE)
+    detector = VoiceOnsetDetector()
+    detector.process(ring, SILENCE, SHOUT)
+    onset_pos = detect(signal, 256)[0][0]
+    window = detector.refractory_hops * detector.hop
+    emitted_at = None
+    for start in range(0, len(signal), 256):
+        ring.write(signal[start:start + 256])
+        if detector.process(ring, SILENCE, SHOUT):
+            emitted_at = ring.write_pos
+            break
+    assert onset_pos + window <= emitted_at < onset_pos + window + 2 * 256
@@ -0,0 +1,88 @@
+import numpy as np
+
+from voice_audio import MicRingBuffer
+
+
+def ramp(start, n):
+    return np.arange(start, start + n, dtype=np.float32)
+
+
+def test_read_latest_across_wrap():
+    ring = MicRingBuffer(16, frame_samples=4)
+    for start in range(0, 40, 6):
+        ring.write(ramp(start, 6))
+    assert ring.write_pos == 42
+    np.testing.assert_array_equal(ring.read_latest(10), ramp(32, 10))
+    # Mai più della capacità
+    np.testing.assert_array_equal(ring.read_latest(100), ramp(26, 16))
+
+
+def test_read_since_keeps_positions_and_drops_oldest():
+    ring = MicRingBuffer(16)
+    ring.write(ramp(0, 10))
+    out = np.empty(32, dtype=np.float32)
+    data, cursor = ring.read_since(0, out)
+    np.testing.assert_array_equal(data, ramp(0, 10))
+    assert cursor == 10
+
+    ring.write(ramp(10, 30))                      # Il lettore resta indietro di più della capacità
+    data, cursor = ring.read_since(cursor, out)
+    np.testing.assert_array_equal(data, ramp(24, 16))
+    assert cursor == 40
+
+    small = np.empty(4, dtype=np.float32)
+    ring.write(ramp(40, 8))
+    data, cursor = ring.read_since(cursor, small)
+    np.testing.assert_array_equal(data, ramp(44, 4))
+    assert cursor == 48
+
+
+def test_oversized_write_advances_by_full_length():
+    ring = MicRingBuffer(10)
+    ring.write(ramp(0, 3))
+    ring.write(ramp(3, 25))
+    assert ring.write_pos == 28
+    np.testing.assert_array_equal(ring.read_latest(10), ramp(18, 10))
+    ring.write(ramp(28, 4))
+    np.testing.assert_array_equal(ring.read_latest(6), ramp(26, 6))
+
+
+def test_frame_window_returns_new_samples_with_minimum_frame():
+    ring = MicRingBuffer(64, frame_samples=8)
+    ring.write(ramp(0, 20))
+    np.testing.assert_array_equal(ring.frame_window(), ramp(0, 20))
+    ring.write(ramp(20, 3))
+    # Meno di un frame di campioni nuovi: si rilegge comunque un frame intero
+    np.testing.assert_array_equal(ring.frame_window(), ramp(15, 8))
+
+
+class TearingRing(MicRingBuffer):
+    """Il produttore scrive durante la prima copia del lettore"""
+
+    def __init__(self, *args, burst=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.burst = burst
+        self.copies = 0
+
+    def _copy(self, pos, n, dest):
+        self.copies += 1
+        if self.copies == 1:
+            self.write(ramp(self.write_pos, self.burst))
+        return super()._copy(pos, n, dest)
+
+
+def test_torn_read_is_retried():
+    ring = TearingRing(16, burst=12)
+    ring.write(ramp(0, 16))
+    data = ring.read_latest(8)
+    # La prima copia è stata sovrascritta: il secondo tentativo legge i campioni più recenti
+    assert ring.copies == 2
+    np.testing.assert_array_equal(data, ramp(20, 8))
+
+
+def test_copy_without_overlap_is_not_a_tear():
+    ring = TearingRing(16, burst=4)
+    ring.write(ramp(0, 16))
+    data = ring.read_latest(8)
+    assert ring.copies == 1
+    np.testing.assert_array_equal(data, ramp(8, 8))
@@ -0,0 +1,64 @@
+import time
+
+import numpy as np
+
+from soundtrack import SoundtrackEngine, music_params
+
+
+def state(engine):
+    step_pos, bass_phase, arp_phase, arp_degrees, filters = engine._snapshot()
+    return [step_pos, bass_phase, arp_phase, *arp_degrees, *np.concatenate(filters)]
+
+
+def fill(engine, count):
+    for _ in range(count):
+        engine.chunks.put_nowait(engine.render_item())
+
+
+def test_same_params_do_not_flush():
+    engine = SoundtrackEngine(seed=0)
+    engine.set_params(1, 1.0)
+    assert not engine._params_changed.is_set()
+    engine.set_params(3, 1.0)
+    assert engine._params_changed.is_set()
+    assert engine.params == music_params(3, 1.0)
+
+
+def test_flush_resumes_from_first_unplayed_chunk():
+    engine = SoundtrackEngine(seed=0)
+    reference = SoundtrackEngine(seed=0)
+    fill(engine, 4)
+    played = engine.next_chunk()
+    assert np.allclose(played, reference.render_chunk())
+
+    engine.set_params(2, 1.3, 1.0)
+    pending = engine.render_item()
+    engine.flush_stale(pending)
+    assert engine.chunks.empty() and engine.flushed == 4
+    assert np.allclose(state(engine), state(reference))
+    assert not engine._params_changed.is_set()
+
+
+def test_chunks_come_from_the_pool():
+    engine = SoundtrackEngine(seed=0, queue_chunks=2)
+    chunks = [engine.render_chunk() for _ in range(len(engine._pool))]
+    for chunk in chunks:
+        assert np.shares_memory(chunk, engine._pool)
+    assert len({id(c.base) for c in chunks}) == 1
+    assert all(not np.shares_memory(a, b) for i, a in enumerate(chunks) for b in chunks[i + 1:])
+
+
+def test_thread_flushes_on_param_change():
+    engine = SoundtrackEngine(seed=0)
+    engine.start()
+    try:
+        deadline = time.perf_counter() + 5.0
+        while not engine.chunks.full() and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        assert engine.chunks.full()
+        engine.set_params(4, 1.0)
+        while engine.flushed == 0 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        assert engine.flushed >= engine.chunks.maxsize
+    finally:
+        engine.stop()
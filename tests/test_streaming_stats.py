@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from voice_audio import P2Quantile, StreamingStats, NoiseFloorTracker
+
+
+@pytest.mark.parametrize('q', [0.1, 0.5, 0.9])
+@pytest.mark.parametrize('dist', ['uniform', 'lognormal'])
+def test_p2_quantile_tracks_the_exact_quantile(q, dist):
+    rng = np.random.default_rng(3)
+    data = rng.uniform(0, 1, 20000) if dist == 'uniform' else rng.lognormal(-3, 0.5, 20000)
+    est = P2Quantile(q)
+    for x in data:
+        est.add(float(x))
+    exact = np.quantile(data, q)
+    spread = np.quantile(data, 0.95) - np.quantile(data, 0.05)
+    assert abs(est.value() - exact) < 0.02 * spread
+
+
+def test_p2_quantile_with_few_samples():
+    est = P2Quantile(0.5)
+    assert est.value() == 0.0
+    for x in (5.0, 1.0, 3.0):
+        est.add(x)
+    assert est.value() == 3.0
+
+
+def test_streaming_stats_moments_are_exact():
+    data = np.random.default_rng(4).normal(1.0, 0.2, 5000)
+    stats = StreamingStats()
+    for x in data:
+        stats.append(float(x))
+    assert len(stats) == len(data)
+    assert stats.mean == pytest.approx(data.mean())
+    assert stats.min == data.min() and stats.max == data.max()
+    assert stats.quantile(0.9) == pytest.approx(np.quantile(data, 0.9), abs=0.02)
+
+
+def test_noise_floor_tracker_updates_once_per_window_and_follows_the_floor():
+    rng = np.random.default_rng(5)
+    tracker = NoiseFloorTracker(window=100, alpha=0.5)
+    updates = [tracker.add(float(x)) for x in rng.uniform(0.01, 0.02, 1000)]
+    assert sum(updates) == 10 and all(updates[99::100])
+    assert tracker.floor == pytest.approx(0.011, abs=0.001)
+
+    # Rumore di fondo più alto: il floor lo insegue con lo smoothing tra finestre
+    for x in rng.uniform(0.05, 0.06, 1000):
+        tracker.add(float(x))
+    assert tracker.floor == pytest.approx(0.051, abs=0.002)
+
+    tracker.reset()
+    assert tracker.floor is None and tracker.count == 0
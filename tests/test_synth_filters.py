@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from synth_filters import (
+    FILTER_KINDS, Biquad, biquad_coefficients, design_filter, new_filter, moving_average,
+)
+
+SR = 44100
+
+
+def direct_form(coefficients, x):
+    """Biquad campione per campione (forma diretta I), riferimento"""
+    b0, b1, b2, a1, a2 = coefficients
+    y = np.zeros(len(x))
+    x1 = x2 = y1 = y2 = 0.0
+    for i, xi in enumerate(x):
+        y[i] = b0 * xi + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+        x2, x1 = x1, xi
+        y2, y1 = y1, y[i]
+    return y
+
+
+def signal(n, seed=0):
+    return np.random.default_rng(seed).uniform(-1, 1, n)
+
+
+@pytest.mark.parametrize('kind', FILTER_KINDS)
+@pytest.mark.parametrize('n', [1, 63, 64, 65, 1000])
+def test_biquad_matches_direct_form(kind, n):
+    coefficients = biquad_coefficients(kind, 1200.0, 0.9, SR)
+    x = signal(n)
+    assert np.allclose(Biquad(coefficients).process(x), direct_form(coefficients, x), atol=1e-9)
+
+
+def test_cascade_matches_sections_in_series():
+    cascade = new_filter('lowpass', 800.0, order=6)
+    x = signal(3000, seed=1)
+    expected = x
+    for section in cascade.sections:
+        expected = direct_form(section.coefficients, expected)
+    assert np.allclose(cascade.process(x), expected, atol=1e-9)
+
+
+def test_batch_matches_rows():
+    biquad = Biquad(biquad_coefficients('highpass', 300.0, 0.707, SR))
+    batch = np.stack([signal(500, seed=s) for s in range(3)])
+    out = biquad.process(batch)
+    for row, x in zip(out, batch):
+        assert np.allclose(row, biquad.process(x))
+
+
+@pytest.mark.parametrize('chunk', [1, 37, 64, 200])
+def test_process_stream_is_continuous(chunk):
+    x = signal(1500, seed=2)
+    whole = new_filter('resonant', 2000.0).process(x)
+    streaming = new_filter('resonant', 2000.0)
+    pieces = [streaming.process_stream(x[i:i + chunk]) for i in range(0, len(x), chunk)]
+    assert np.allclose(np.concatenate(pieces), whole, atol=1e-9)
+
+
+def test_butterworth_gain_at_cutoff():
+    t = np.arange(SR) / SR
+    for order in (2, 4):
+        out = design_filter('lowpass', 1000.0, order).process(np.sin(2 * np.pi * 1000.0 * t))
+        gain = np.sqrt(2 * np.mean(out[SR // 2:] ** 2))
+        assert gain == pytest.approx(1 / np.sqrt(2), rel=0.01)
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        new_filter('notch', 1000.0)
+
+
+@pytest.mark.parametrize('width', [1, 2, 5, 8, 33])
+def test_moving_average_matches_convolve(width):
+    x = signal(400, seed=3)
+    expected = np.convolve(x, np.ones(width) / width, mode='same')
+    assert np.allclose(moving_average(x, width), expected)
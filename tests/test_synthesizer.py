@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+import pytest
+
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+pygame = pytest.importorskip('pygame')
+
+from synthesizer import Synthesizer
+from synth_filters import design_filter
+
+
+@pytest.fixture(scope='module', autouse=True)
+def mixer():
+    pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
+    yield
+    pygame.mixer.quit()
+
+
+def test_oscillator_matches_formula_and_is_a_copy():
+    wave, t = Synthesizer.generate_oscillator('sine', 440.0, 0.1)
+    assert len(wave) == len(t) == 4410
+    # Fase integrata dal plan (cumsum): un campione avanti rispetto a t
+    assert np.allclose(wave, np.sin(2 * np.pi * 440.0 * (t + 1 / 44100)), atol=1e-6)
+    again, _ = Synthesizer.generate_oscillator('sine', 440.0, 0.1)
+    wave[:] = 0.0
+    assert np.abs(again).max() > 0.9
+
+
+def test_unknown_waveform_falls_back_to_sine():
+    wave, _ = Synthesizer.generate_oscillator('organ', 220.0, 0.05)
+    sine, _ = Synthesizer.generate_oscillator('sine', 220.0, 0.05)
+    assert np.array_equal(wave, sine)
+
+
+def test_envelope_and_filters():
+    wave = np.ones(4410)
+    shaped = Synthesizer.apply_adsr_envelope(wave, 0.01, 0.02, 0.5, 0.03)
+    assert shaped[0] == 0.0 and shaped[2000] == 0.5 and shaped[-1] == pytest.approx(0.0, abs=1e-3)
+
+    x = np.random.default_rng(0).uniform(-1, 1, 2000)
+    assert Synthesizer.apply_lowpass_filter(x, 30000) is x
+    assert np.array_equal(Synthesizer.apply_lowpass_filter(x, 1000), design_filter('lowpass', 1000).process(x))
+    assert np.allclose(Synthesizer.apply_moving_average(x, 2205), np.convolve(x, np.ones(10) / 10, mode='same'))
+
+
+@pytest.mark.parametrize('method, name', [
+    ('synthesize_beep', 'beep'), ('synthesize_whoosh', 'whoosh'), ('synthesize_explosion', 'boom'),
+    ('synthesize_levelup', 'levelup'), ('synthesize_collision', 'collision'),
+])
+def test_effects_render_their_patch(method, name):
+    sound = getattr(Synthesizer, method)()
+    pcm = pygame.sndarray.array(sound)
+    assert len(pcm) == Synthesizer.plan(name).frames
+    assert np.abs(pcm).max() > 1000
@@ -0,0 +1,58 @@
+from audio_mixer import VoiceManager, SFX_VOICE_RULES, SFX_DEFAULT_RULE
+
+
+def test_cooldown_drops_retriggers():
+    manager = VoiceManager(voices=4)
+    cooldown = SFX_VOICE_RULES['beep']['cooldown']
+    assert manager.allocate('beep', 1.0, 0.1, now=0.0) is not None
+    assert manager.allocate('beep', 1.0, 0.1, now=cooldown / 2) is None
+    assert manager.dropped['cooldown'] == 1
+    assert manager.allocate('beep', 1.0, 0.1, now=cooldown) is not None
+
+
+def test_kind_polyphony_reuses_oldest_voice_of_that_kind():
+    manager = VoiceManager(voices=8)
+    limit = SFX_VOICE_RULES['whoosh']['max_voices']
+    slots = [manager.allocate('whoosh', 1.0, 5.0, now=i * 0.1) for i in range(limit)]
+    assert len(set(slots)) == limit
+    again = manager.allocate('whoosh', 1.0, 5.0, now=1.0)
+    assert again == slots[0]
+    assert manager.active(1.0) == limit
+    assert manager.stolen == 0
+
+
+def test_unknown_kind_uses_default_rule():
+    manager = VoiceManager(voices=8)
+    slots = {manager.allocate(None, 1.0, 5.0, now=0.0) for _ in range(SFX_DEFAULT_RULE['max_voices'] + 1)}
+    assert len(slots) == SFX_DEFAULT_RULE['max_voices']
+
+
+def test_steals_lowest_priority_then_quietest():
+    manager = VoiceManager(voices=3)
+    manager.allocate('beep', 1.0, 5.0, now=0.0)            # priorità 1
+    quiet = manager.allocate(None, 0.2, 5.0, now=0.0)      # priorità 2, più silenziosa
+    manager.allocate(None, 0.9, 5.0, now=0.0)
+    beep_slot = manager.voices.index(next(v for v in manager.voices if v.kind == 'beep'))
+
+    assert manager.allocate('collision', 1.0, 1.0, now=0.1) == beep_slot
+    assert manager.allocate('levelup', 1.0, 1.0, now=0.1) == quiet
+    assert manager.stolen == 2
+
+
+def test_drops_when_only_more_important_voices_play():
+    manager = VoiceManager(voices=2)
+    manager.allocate('collision', 1.0, 5.0, now=0.0)
+    manager.allocate('levelup', 1.0, 5.0, now=0.0)
+    assert manager.allocate('whoosh', 1.0, 1.0, now=0.1) is None
+    assert manager.dropped['busy'] == 1
+    # Finite le voci importanti la voce torna libera
+    assert manager.allocate('whoosh', 1.0, 1.0, now=6.0) is not None
+
+
+def test_resize_keeps_voices():
+    manager = VoiceManager(voices=2)
+    manager.allocate('boom', 1.0, 5.0, now=0.0)
+    manager.resize(4)
+    assert len(manager.voices) == 4 and manager.voices[0].kind == 'boom'
+    manager.resize(1)
+    assert manager.stats(1.0)['active'] == 1
@@ -0,0 +1,1397 @@
+"""
+VOICE RUNNER PRO - Audio input e analisi voce
+Ring buffer, sorgenti audio, statistiche del callback e DSP (denoise, spettro,
+onset, pitch). Nessuna dipendenza da pygame: lo usano sia il gioco sia il
+worker audio out-of-process.
+"""
+
+import math
+import time
+import bisect
+import threading
+import wave
+from dataclasses import dataclass
+
+import numpy as np
+
+# Import differito: Pa_Initialize enumera i device e può richiedere secondi,
+# quindi avviene nel thread di avvio del microfono e non prima del primo frame
+sd = None
+
+def load_sounddevice():
+    """Importa sounddevice al primo uso; ImportError/OSError se manca PortAudio"""
+    global sd
+    if sd is None:
+        import sounddevice
+        sd = sounddevice
+    return sd
+
+# Stream di output aperti (mixer sounddevice): il re-init di PortAudio li chiuderebbe
+_refresh_holds = 0
+
+def hold_device_refresh(hold):
+    """Sospende (True) o riabilita (False) il refresh dei device finché c'è uno stream di output"""
+    global _refresh_holds
+    _refresh_holds = max(0, _refresh_holds + (1 if hold else -1))
+
+def refresh_audio_devices():
+    """PortAudio vede solo i device presenti all'init: re-init per il hot-plug (nessuno stream aperto)"""
+    if sd is None or _refresh_holds:
+        return
+    try:
+        sd._terminate()
+        sd._initialize()
+    except Exception as e:
+        print(f"⚠ Refresh device audio fallito: {e}")
+
+# ============================================
+# MIC RING BUFFER (lock-free, single producer)
+# ============================================
+
+MIC_SAMPLE_RATE = 44100
+MIC_RING_SECONDS = 2.0
+MIC_FRAME_SAMPLES = MIC_SAMPLE_RATE // 60   # Finestra minima = 1 frame a 60 FPS
+
+class MicRingBuffer:
+    """Ring buffer NumPy preallocato: il callback audio copia, il game loop legge"""
+
+    def __init__(self, capacity, frame_samples=MIC_FRAME_SAMPLES):
+        self.capacity = int(capacity)
+        self.buffer = np.zeros(self.capacity, dtype=np.float32)
+        # Contatore monotono dei campioni scritti: l'unico stato condiviso.
+        # Viene pubblicato DOPO la copia, quindi il lettore non vede mai dati parziali.
+        self.write_pos = 0
+        self.read_pos = 0
+        self.frame_samples = frame_samples
+        self._window = np.zeros(self.capacity, dtype=np.float32)
+
+    def write(self, samples):
+        """Chiamato SOLO dal thread audio: copia e pubblica, nient'altro"""
+        n = len(samples)
+        advance = n                              # Le posizioni contano anche i campioni sovrascritti
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            n = self.capacity
+        start = (self.write_pos + advance - n) % self.capacity
+        end = start + n
+        if end <= self.capacity:
+            self.buffer[start:end] = samples
+        else:
+            split = self.capacity - start
+            self.buffer[start:] = samples[:split]
+            self.buffer[:end - self.capacity] = samples[split:]
+        self.write_pos += advance
+
+    def _copy(self, pos, n, dest):
+        """Copia i campioni [pos - n, pos) in dest; False se il produttore li ha sovrascritti"""
+        start = (pos - n) % self.capacity
+        end = start + n
+        if end <= self.capacity:
+            dest[:] = self.buffer[start:end]
+        else:
+            split = self.capacity - start
+            dest[:split] = self.buffer[start:]
+            dest[split:] = self.buffer[:end - self.capacity]
+        # Tear check: il produttore non deve aver sovrascritto ciò che abbiamo copiato
+        return self.write_pos - pos <= self.capacity - n
+
+    def read_latest(self, n, out=None):
+        """Copia gli ultimi n campioni in out (preallocato) o in un nuovo array"""
+        for _ in range(3):
+            pos = self.write_pos
+            n = min(n, pos, self.capacity)
+            dest = np.empty(n, dtype=np.float32) if out is None else out[:n]
+            if self._copy(pos, n, dest):
+                break
+        return dest
+
+    def read_since(self, cursor, out):
+        """Campioni scritti dopo cursor (i più vecchi oltre len(out) si perdono): (dati, cursor)"""
+        for _ in range(3):
+            pos = self.write_pos
+            n = min(pos - cursor, self.capacity, len(out))
+            dest = out[:n]
+            if self._copy(pos, n, dest):
+                break
+        return dest, pos
+
+    def frame_window(self):
+        """Finestra allineata al frame: tutti i campioni dall'ultimo frame (min 1 frame)"""
+        pos = self.write_pos
+        new_samples = pos - self.read_pos
+        self.read_pos = pos
+        n = min(self.capacity, max(new_samples, self.frame_samples))
+        return self.read_latest(n, out=self._window)
+
+    def reset(self):
+        self.buffer.fill(0.0)
+        self.write_pos = 0
+        self.read_pos = 0
+
+
+# ============================================
+# CAPTURE PROFILES (latenza vs. consumo)
+# ============================================
+
+# blocksizes in ordine crescente: si parte dal più piccolo che l'host regge
+CAPTURE_PROFILES = {
+    'adaptive':    {'label': 'ADAPTIVE',    'blocksizes': (256, 512, 1024, 2048), 'latency': 'low'},
+    'low_latency': {'label': 'LOW LATENCY', 'blocksizes': (256, 512),             'latency': 'low'},
+    'balanced':    {'label': 'BALANCED',    'blocksizes': (1024, 2048),           'latency': None},
+    'power_saver': {'label': 'POWER SAVER', 'blocksizes': (4096,),                'latency': 'high'},
+}
+CAPTURE_PROFILE_ORDER = ['adaptive', 'low_latency', 'balanced', 'power_saver']
+DEFAULT_CAPTURE_PROFILE = 'balanced'
+ADAPTIVE_OVERFLOW_LIMIT = 3        # Overflow nella finestra prima del backoff
+ADAPTIVE_WINDOW_SEC = 2.0          # Finestra di osservazione overflow
+MIC_RETRY_SEC = 3.0                # Attesa tra i tentativi di apertura (device assente/scollegato)
+MIC_STALL_SEC = 1.0                # Nessun callback per così tanto = device perso
+
+# ============================================
+# AUDIO CALLBACK INSTRUMENTATION
+# ============================================
+
+AUDIO_STATUS_FLAGS = ('input_overflow', 'input_underflow', 'output_overflow',
+                      'output_underflow', 'priming_output')
+# Bucket dell'istogramma come frazione del periodo di blocco
+CALLBACK_HIST_EDGES = (0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+class AudioCallbackStats:
+    """Tempi del callback, flag di stato e latenza ADC -> frame (il callback scrive solo contatori)"""
+
+    def __init__(self, sample_rate=MIC_SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.reset()
+
+    def reset(self):
+        self.callbacks = 0
+        self.errors = 0
+        self.last_error = None
+        self.status_counts = {flag: 0 for flag in AUDIO_STATUS_FLAGS}
+        self.histogram = [0] * (len(CALLBACK_HIST_EDGES) + 1)
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+        self.total_ms = 0.0
+        self.period_ms = 0.0
+        # (adc_time del primo campione, offset stream-clock -> perf_counter, posizione ring del primo campione)
+        self.last_block = None
+        self._consumed_pos = 0
+        self.gap_ms = 0.0
+        self.gap_max_ms = 0.0
+        self.gap_count = 0
+        self.gap_total_ms = 0.0
+
+    # --- Lato thread audio ---
+    def note_status(self, status):
+        for flag in AUDIO_STATUS_FLAGS:
+            if getattr(status, flag, False):
+                self.status_counts[flag] += 1
+
+    def note_block(self, time_info, t_callback, start_pos):
+        adc = getattr(time_info, 'inputBufferAdcTime', 0.0)
+        now = getattr(time_info, 'currentTime', 0.0)
+        if adc and now:
+            self.last_block = (adc, now - t_callback, start_pos)
+
+    def note_error(self, error):
+        self.errors += 1
+        self.last_error = repr(error)
+
+    def note_duration(self, seconds, frames):
+        ms = seconds * 1000.0
+        self.period_ms = 1000.0 * frames / self.sample_rate
+        self.callbacks += 1
+        self.last_ms = ms
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+        ratio = ms / self.period_ms if self.period_ms > 0 else 0.0
+        self.histogram[bisect.bisect_right(CALLBACK_HIST_EDGES, ratio)] += 1
+
+    # --- Lato game loop ---
+    def note_consumed(self, ring_pos):
+        """Chiamato quando il frame consuma i dati: misura ADC -> frame del blocco più recente"""
+        block = self.last_block
+        if block is None or ring_pos <= self._consumed_pos:
+            return
+        self._consumed_pos = ring_pos
+        adc, offset, _ = block
+        gap = (time.perf_counter() + offset - adc) * 1000.0
+        if gap < 0:
+            return
+        self.gap_ms = gap
+        self.gap_max_ms = max(self.gap_max_ms, gap)
+        self.gap_total_ms += gap
+        self.gap_count += 1
+
+    def sample_time(self, pos):
+        """Istante di campionamento (perf_counter) della posizione pos del capture ring"""
+        block = self.last_block
+        if block is None:
+            return None
+        adc, offset, start_pos = block
+        return adc - offset + (pos - start_pos) / self.sample_rate
+
+    def snapshot(self):
+        """Vista coerente delle statistiche per API/overlay"""
+        return {
+            'callbacks': self.callbacks,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'status': dict(self.status_counts),
+            'period_ms': self.period_ms,
+            'last_ms': self.last_ms,
+            'mean_ms': self.total_ms / self.callbacks if self.callbacks else 0.0,
+            'max_ms': self.max_ms,
+            'histogram': list(zip(CALLBACK_HIST_EDGES + (float('inf'),), self.histogram)),
+            'adc_gap_ms': self.gap_ms,
+            'adc_gap_mean_ms': self.gap_total_ms / self.gap_count if self.gap_count else 0.0,
+            'adc_gap_max_ms': self.gap_max_ms,
+        }
+
+
+# ============================================
+# AUDIO INPUT BACKENDS (mic, file, synth, null)
+# ============================================
+
+class SourceStatus:
+    """Equivalente di sd.CallbackFlags per le sorgenti software"""
+    __slots__ = AUDIO_STATUS_FLAGS
+
+    def __init__(self, input_overflow=False):
+        for flag in AUDIO_STATUS_FLAGS:
+            setattr(self, flag, False)
+        self.input_overflow = input_overflow
+
+    def __bool__(self):
+        return any(getattr(self, flag) for flag in AUDIO_STATUS_FLAGS)
+
+class SourceTimeInfo:
+    """Equivalente del time_info di PortAudio (clock = perf_counter)"""
+    __slots__ = ('inputBufferAdcTime', 'currentTime')
+
+    def __init__(self, adc_time, current_time):
+        self.inputBufferAdcTime = adc_time
+        self.currentTime = current_time
+
+class ThreadedAudioSource:
+    """Base per sorgenti software: un thread chiama il callback a blocchi come PortAudio"""
+
+    def __init__(self, callback, blocksize, samplerate=MIC_SAMPLE_RATE, speed=1.0):
+        self.callback = callback
+        self.blocksize = blocksize
+        self.samplerate = samplerate
+        self.speed = speed
+        self.pos = 0
+        self._block = np.zeros((blocksize, 1), dtype=np.float32)
+        self._running = False
+        self._thread = None
+
+    def fill(self, out, pos):
+        """Riempie out con i campioni a partire da pos; False a fine sorgente"""
+        raise NotImplementedError
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        period = self.blocksize / self.samplerate / self.speed if self.speed > 0 else 0.0
+        next_t = time.perf_counter() + period
+        while self._running:
+            if period > 0:
+                delay = next_t - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            if not self.fill(self._block[:, 0], self.pos):
+                break
+            now = time.perf_counter()
+            status = SourceStatus(input_overflow=period > 0 and now - next_t > period)
+            self.callback(self._block, self.blocksize, SourceTimeInfo(next_t - period, now), status)
+            self.pos += self.blocksize
+            next_t = next_t + period if period > 0 else now
+        self._running = False
+
+    @property
+    def active(self):
+        return self._running
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def close(self):
+        self.stop()
+
+class FileAudioSource(ThreadedAudioSource):
+    """Riproduce un WAV o un .npy come se fosse il microfono (tempo reale o accelerato)"""
+
+    def __init__(self, callback, blocksize, path, samplerate=MIC_SAMPLE_RATE, speed=1.0, loop=True):
+        super().__init__(callback, blocksize, samplerate, speed)
+        self.path = path
+        self.loop = loop
+        self.samples = self.load(path, samplerate)
+
+    @staticmethod
+    def load(path, samplerate):
+        if path.endswith('.npy'):
+            data = np.load(path).astype(np.float32)
+            rate = samplerate
+        else:
+            with wave.open(path, 'rb') as wf:
+                rate = wf.getframerate()
+                width = wf.getsampwidth()
+                channels = wf.getnchannels()
+                raw = wf.readframes(wf.getnframes())
+            if width == 1:
+                data = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+            elif width == 2:
+                data = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+            elif width == 4:
+                data = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648.0
+            else:
+                raise ValueError(f"WAV a {width * 8} bit non supportato")
+            if channels > 1:
+                data = data.reshape(-1, channels).mean(axis=1)
+        if data.ndim > 1:
+            data = data.mean(axis=1)
+        if rate != samplerate and len(data):
+            # Ricampionamento lineare vettorizzato
+            n_out = int(len(data) * samplerate / rate)
+            data = np.interp(np.arange(n_out) * (rate / samplerate), np.arange(len(data)), data).astype(np.float32)
+        if not len(data):
+            raise ValueError(f"File audio vuoto: {path}")
+        return np.ascontiguousarray(data, dtype=np.float32)
+
+    def fill(self, out, pos):
+        total = len(self.samples)
+        if not self.loop and pos >= total:
+            return False
+        idx = (pos + np.arange(len(out))) % total if self.loop else np.arange(pos, pos + len(out))
+        if self.loop:
+            out[:] = self.samples[idx]
+        else:
+            valid = idx < total
+            out[:] = 0.0
+            out[valid] = self.samples[idx[valid]]
+        return True
+
+class SyntheticAudioSource(ThreadedAudioSource):
+    """Generatore procedurale deterministico: silence, noise, shouts (urli a intervalli)"""
+
+    PATTERNS = ('silence', 'noise', 'shouts')
+
+    def __init__(self, callback, blocksize, pattern='shouts', samplerate=MIC_SAMPLE_RATE,
+                 speed=1.0, seed=1234, noise_level=0.004, shout_level=0.3,
+                 shout_interval=0.9, shout_length=0.18, shout_freq=220.0):
+        super().__init__(callback, blocksize, samplerate, speed)
+        if pattern not in self.PATTERNS:
+            raise ValueError(f"Pattern sintetico sconosciuto: {pattern}")
+        self.pattern = pattern
+        self.rng = np.random.default_rng(seed)
+        self.noise_level = noise_level
+        self.shout_level = shout_level
+        self.shout_interval = shout_interval
+        self.shout_length = shout_length
+        self.shout_freq = shout_freq
+
+    def fill(self, out, pos):
+        if self.pattern == 'silence':
+            out[:] = 0.0
+            return True
+        out[:] = self.rng.normal(0.0, self.noise_level, len(out))
+        if self.pattern == 'shouts':
+            t = (pos + np.arange(len(out))) / self.samplerate
+            phase_t = t % self.shout_interval
+            burst = phase_t < self.shout_length
+            if burst.any():
+                env = np.sin(np.pi * phase_t[burst] / self.shout_length)
+                w = 2 * np.pi * self.shout_freq * t[burst]
+                voice = np.sin(w) + 0.5 * np.sin(2 * w) + 0.25 * np.sin(3 * w)
+                out[burst] += (self.shout_level / 1.75) * env * voice
+        return True
+
+class NullAudioSource:
+    """Sorgente vuota: nessun callback, il ring resta a zero"""
+
+    def __init__(self, callback=None, blocksize=0):
+        self.blocksize = blocksize
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def make_audio_source(spec, callback, blocksize, latency=None, speed=1.0):
+    """'mic' | 'null' | 'synth[:silence|noise|shouts]' | 'file:percorso.wav|.npy'"""
+    kind, _, arg = spec.partition(':')
+    if kind == 'mic':
+        try:
+            load_sounddevice()
+        except (ImportError, OSError) as e:
+            raise RuntimeError(f"sounddevice/PortAudio non disponibile: {e}") from e
+        kwargs = dict(channels=1, samplerate=MIC_SAMPLE_RATE, blocksize=blocksize, callback=callback)
+        if latency is not None:
+            kwargs['latency'] = latency
+        return sd.InputStream(**kwargs)
+    if kind == 'null':
+        return NullAudioSource(callback, blocksize)
+    if kind == 'synth':
+        return SyntheticAudioSource(callback, blocksize, pattern=arg or 'shouts', speed=speed)
+    if kind in ('file', 'wav', 'npy'):
+        return FileAudioSource(callback, blocksize, arg, speed=speed)
+    raise ValueError(f"Sorgente audio sconosciuta: {spec}")
+
+
+class MicCapture:
+    """Gestisce l'InputStream secondo il profilo scelto, con backoff adattivo"""
+
+    def __init__(self, callback, stats, source_spec='mic', speed=1.0):
+        self.callback = callback
+        self.stats = stats
+        self.source_spec = source_spec
+        self.speed = speed
+        self.stream = None
+        self.profile = DEFAULT_CAPTURE_PROFILE
+        self.blocksize = 0
+        self.latency = None
+        self._level = 0
+        self._window_start = time.perf_counter()
+        self._window_overflows = 0
+        # 'idle' -> 'starting' -> 'active' | 'failed' (ritenta ogni MIC_RETRY_SEC)
+        self.state = 'idle'
+        self.error = None
+        self._thread = None
+        self._next_retry = 0.0
+        self._last_callbacks = 0
+        self._last_progress = 0.0
+
+    def start(self, profile):
+        """Apre lo stream al blocksize più basso sostenibile per il profilo"""
+        if profile not in CAPTURE_PROFILES:
+            profile = DEFAULT_CAPTURE_PROFILE
+        self.profile = profile
+        try:
+            self._open_from(0)
+        except Exception as e:
+            self._fail(str(e))
+            raise
+        self.state = 'active'
+        self.error = None
+        self._last_callbacks = self.stats.callbacks
+        self._last_progress = time.perf_counter()
+
+    def start_async(self, profile):
+        """Come start(), ma in un thread: il gioco continua a disegnare mentre si apre il device"""
+        if self.starting:
+            return
+        if profile in CAPTURE_PROFILES:
+            self.profile = profile
+        self.state = 'starting'
+        self._thread = threading.Thread(target=self._start_thread, args=(self.profile,),
+                                        name="MicStart", daemon=True)
+        self._thread.start()
+
+    def _start_thread(self, profile):
+        was_failed = self.error is not None
+        try:
+            self.start(profile)
+        except Exception as e:
+            if not was_failed:
+                print(f"⚠ Input audio non disponibile: {e} (ritento ogni {MIC_RETRY_SEC:.0f}s)")
+            return
+        print(f"✓ Input audio attivo: {self.source_spec} ({self.profile}, blocksize {self.blocksize})")
+
+    @property
+    def starting(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _fail(self, error):
+        self.state = 'failed'
+        self.error = error
+        self._next_retry = time.perf_counter() + MIC_RETRY_SEC
+
+    def _open_from(self, level):
+        spec = CAPTURE_PROFILES[self.profile]
+        last_error = None
+        for idx in range(level, len(spec['blocksizes'])):
+            blocksize = spec['blocksizes'][idx]
+            try:
+                new_stream = make_audio_source(self.source_spec, self.callback,
+                                               blocksize, spec['latency'], self.speed)
+                self.close()
+                new_stream.start()
+            except Exception as e:
+                last_error = e
+                continue
+            self.stream = new_stream
+            self.blocksize = blocksize
+            self.latency = spec['latency']
+            self._level = idx
+            self._window_start = time.perf_counter()
+            self._window_overflows = self.overflows
+            return
+        raise last_error if last_error else RuntimeError("Nessun blocksize disponibile")
+
+    @property
+    def overflows(self):
+        return self.stats.status_counts['input_overflow']
+
+    def poll(self):
+        """Una volta per frame: retry/hot-plug, device perso e backoff adattivo sugli overflow"""
+        now = time.perf_counter()
+        if self.state == 'failed':
+            if now >= self._next_retry and not self.starting:
+                if self.stream is None and self.source_spec == 'mic':
+                    refresh_audio_devices()
+                self.start_async(self.profile)
+            return
+        if self.state != 'active' or self.stream is None or isinstance(self.stream, NullAudioSource):
+            return
+        # Device scollegato: lo stream si ferma o i callback smettono di arrivare
+        if self.stats.callbacks != self._last_callbacks:
+            self._last_callbacks = self.stats.callbacks
+            self._last_progress = now
+        elif not getattr(self.stream, 'active', True) or now - self._last_progress > MIC_STALL_SEC:
+            print("⚠ Input audio perso: controlli da tastiera/joypad, ritento...")
+            self.close()
+            self._fail("device perso")
+            return
+        if self.profile != 'adaptive':
+            return
+        if self.overflows - self._window_overflows >= ADAPTIVE_OVERFLOW_LIMIT:
+            if self._level + 1 < len(CAPTURE_PROFILES['adaptive']['blocksizes']):
+                try:
+                    self._open_from(self._level + 1)
+                    print(f"⚠ Input overflow: blocksize -> {self.blocksize}")
+                except Exception as e:
+                    print(f"⚠ Errore backoff microfono: {e}")
+            self._window_start = now
+            self._window_overflows = self.overflows
+        elif now - self._window_start >= ADAPTIVE_WINDOW_SEC:
+            self._window_start = now
+            self._window_overflows = self.overflows
+
+    def next_profile(self):
+        idx = CAPTURE_PROFILE_ORDER.index(self.profile) if self.profile in CAPTURE_PROFILE_ORDER else -1
+        return CAPTURE_PROFILE_ORDER[(idx + 1) % len(CAPTURE_PROFILE_ORDER)]
+
+    def latency_ms(self):
+        return 1000.0 * self.blocksize / MIC_SAMPLE_RATE
+
+    def close(self):
+        if self.stream is not None:
+            try:
+                self.stream.stop()
+                self.stream.close()
+            except Exception:
+                pass
+            self.stream = None
+
+
+# ============================================
+# NOISE SUPPRESSOR (sottrazione spettrale STFT)
+# ============================================
+
+NOISE_WIN = 512                  # Frame STFT del denoiser (hop = metà)
+NOISE_BINS = NOISE_WIN // 2 + 1  # Bin del profilo di rumore
+
+class NoiseSuppressor:
+    """Gain spettrale tipo Wiener su STFT sqrt-Hann 50% + overlap-add, budget fisso per chiamata"""
+
+    def __init__(self, win=NOISE_WIN, max_frames=32, over_subtraction=1.5,
+                 gain_floor=0.08, gain_smoothing=0.5):
+        self.win = win
+        self.hop = win // 2
+        self.max_frames = max_frames
+        self.over_subtraction = over_subtraction
+        self.gain_floor = gain_floor
+        self.gain_smoothing = gain_smoothing
+
+        # sqrt-Hann periodica in analisi e sintesi: somma = 1 con hop = win / 2
+        n = np.arange(win)
+        self.window = np.sqrt(0.5 - 0.5 * np.cos(2 * np.pi * n / win)).astype(np.float32)
+        self._tail_window = (self.window[self.hop:] ** 2).astype(np.float32)
+        self._pending = np.zeros(self.hop * (max_frames + 1), dtype=np.float32)
+        self._pending_len = self.hop          # Storia iniziale (ritardo fisso = hop)
+        self._tail = np.zeros(self.hop, dtype=np.float32)
+        self._gain = np.ones(self.hop + 1, dtype=np.float32)
+        self._frame_index = np.arange(max_frames)[:, None] * self.hop + np.arange(win)[None, :]
+
+        self.noise_psd = None
+        self.enabled = False
+        self.learning = False
+        self._learn_sum = np.zeros(self.hop + 1, dtype=np.float64)
+        self._learn_count = 0
+
+        self.cursor = None
+        self.dropped = 0
+        self.last_cost_ms = 0.0
+        self.mean_cost_ms = 0.0
+
+    @property
+    def latency_samples(self):
+        return self.hop
+
+    def set_learning(self, flag):
+        """Inizia/chiude l'apprendimento del profilo di rumore (fase CALIBRATE_SILENCE)"""
+        if flag and not self.learning:
+            self._learn_sum.fill(0.0)
+            self._learn_count = 0
+        elif not flag and self.learning and self._learn_count > 0:
+            self.noise_psd = (self._learn_sum / self._learn_count).astype(np.float32)
+            print(f"✓ Profilo rumore appreso ({self._learn_count} frame STFT)")
+        self.learning = flag
+
+    def set_profile(self, profile):
+        if profile and len(profile) == self.hop + 1:
+            self.noise_psd = np.asarray(profile, dtype=np.float32)
+
+    def profile_list(self):
+        return None if self.noise_psd is None else [round(float(v), 9) for v in self.noise_psd]
+
+    def process(self, src, dst):
+        """Consuma i campioni nuovi di src e scrive in dst lo stesso numero di campioni (ritardati di hop)"""
+        t0 = time.perf_counter()
+        first_call = self.cursor is None
+        if first_call:
+            # Da 0, non da write_pos: la posizione k di dst resta il campione k di src
+            # (gli eventi si datano togliendo solo latency_samples)
+            self.cursor = 0
+        hop = self.hop
+        start = self._pending_len
+        available = src.write_pos - self.cursor
+        data, self.cursor = src.read_since(self.cursor, self._pending[start:])
+        dropped = available - len(data)
+        if dropped > 0:
+            # Oltre il budget: mantieni l'allineamento delle posizioni con silenzio
+            dst.write(np.zeros(dropped, dtype=np.float32))
+            if not first_call:                        # L'arretrato iniziale non è una perdita
+                self.dropped += dropped
+
+        total = start + len(data)
+        n_frames = (total - hop) // hop
+        if n_frames > 0:
+            if self.learning or (self.enabled and self.noise_psd is not None):
+                out = self._stft_process(n_frames)
+            else:
+                # Bypass: stesso ritardo e stessa coda OLA del percorso STFT a gain unitario
+                out = self._pending[:n_frames * hop].copy()
+                self._tail[:] = self._pending[n_frames * hop:(n_frames + 1) * hop] * self._tail_window
+            dst.write(out)
+            rem = total - n_frames * hop
+            self._pending[:rem] = self._pending[n_frames * hop:total]
+            self._pending_len = rem
+        else:
+            self._pending_len = total
+
+        self.last_cost_ms = (time.perf_counter() - t0) * 1000.0
+        self.mean_cost_ms += (self.last_cost_ms - self.mean_cost_ms) * 0.05
+        return n_frames
+
+    def _stft_process(self, n_frames):
+        hop = self.hop
+        frames = self._pending[self._frame_index[:n_frames]] * self.window
+        spec = np.fft.rfft(frames, axis=1)
+        power = spec.real ** 2 + spec.imag ** 2
+
+        if self.learning:
+            self._learn_sum += power.sum(axis=0)
+            self._learn_count += n_frames
+            gains = np.ones_like(power)
+        elif self.enabled and self.noise_psd is not None:
+            # Gain di sottrazione di potenza con floor anti "musical noise"
+            gains = np.sqrt(np.maximum(1.0 - self.over_subtraction * self.noise_psd / (power + 1e-12),
+                                       self.gain_floor ** 2))
+            # Smoothing temporale: media con il gain del frame precedente
+            k = self.gain_smoothing
+            gains = ((1 - k) * gains + k * np.vstack((self._gain[None, :], gains[:-1]))).astype(np.float32)
+        else:
+            gains = np.ones_like(power)
+        self._gain[:] = gains[-1]
+
+        y = np.fft.irfft(spec * gains, self.win, axis=1).astype(np.float32) * self.window
+        out = y[:, :hop].copy()
+        out[0] += self._tail
+        out[1:] += y[:-1, hop:]
+        self._tail[:] = y[-1, hop:]
+        return out.reshape(-1)
+
+
+# ============================================
+# SPECTRUM ANALYZER (FFT reale per l'equalizer)
+# ============================================
+
+def log_band_matrix(fft_size, sample_rate, f_min, f_max, num_bands):
+    """Matrice bin -> banda log-spaced precalcolata (media dei bin in ogni banda)"""
+    freqs = np.fft.rfftfreq(fft_size, 1.0 / sample_rate)
+    edges = np.geomspace(f_min, f_max, num_bands + 1)
+    band_idx = np.searchsorted(edges, freqs, side='right') - 1
+    valid = (band_idx >= 0) & (band_idx < num_bands)
+    matrix = np.zeros((num_bands, len(freqs)), dtype=np.float32)
+    matrix[band_idx[valid], np.nonzero(valid)[0]] = 1.0
+    for b in np.nonzero(matrix.sum(axis=1) == 0)[0]:
+        # Bande più strette di un bin: usa il bin più vicino al centro
+        center = math.sqrt(edges[b] * edges[b + 1])
+        matrix[b, int(np.argmin(np.abs(freqs - center)))] = 1.0
+    return matrix / matrix.sum(axis=1, keepdims=True)
+
+class SpectrumAnalyzer:
+    """rfft finestrata sugli ultimi campioni, bande log-spaced, attack/release per banda"""
+
+    def __init__(self, ring, num_bands=6, fft_size=2048, sample_rate=MIC_SAMPLE_RATE,
+                 f_min=60.0, f_max=12000.0, attack=0.6, release=0.12,
+                 floor_db=-70.0, ceil_db=-10.0):
+        self.ring = ring
+        self.num_bands = num_bands
+        self.fft_size = fft_size
+        self.attack = attack
+        self.release = release
+        self.floor_db = floor_db
+        self.db_range = ceil_db - floor_db
+
+        self.window = np.hanning(fft_size).astype(np.float32)
+        self.amp_scale = 2.0 / float(self.window.sum())
+        self._samples = np.zeros(fft_size, dtype=np.float32)
+        self._windowed = np.zeros(fft_size, dtype=np.float32)
+
+        self.band_matrix = log_band_matrix(fft_size, sample_rate, f_min, f_max, num_bands)
+
+        self.bands = np.zeros(num_bands, dtype=np.float32)
+        self._frame = -1
+
+    def update(self, frame_index):
+        """Calcola le bande al massimo una volta per frame"""
+        if frame_index == self._frame:
+            return self.bands
+        self._frame = frame_index
+
+        samples = self.ring.read_latest(self.fft_size, out=self._samples)
+        if len(samples) < self.fft_size:
+            return self.bands
+
+        np.multiply(self._samples, self.window, out=self._windowed)
+        spectrum = np.abs(np.fft.rfft(self._windowed)) * self.amp_scale
+        power = self.band_matrix @ (spectrum * spectrum)
+        db = 10.0 * np.log10(power + 1e-12)
+        target = np.clip((db - self.floor_db) / self.db_range, 0.0, 1.0)
+
+        coeff = np.where(target > self.bands, self.attack, self.release)
+        self.bands += (target - self.bands) * coeff
+        return self.bands
+
+
+# ============================================
+# VOICE BANDS (filterbank FFT per il controllo multi-banda)
+# ============================================
+
+# (nome, f_min, f_max): "mmm" grave e "iii" acuto
+VOICE_BANDS = (
+    ('low', 80.0, 400.0),
+    ('high', 1800.0, 5000.0),
+)
+
+class VoiceBandAnalyzer:
+    """RMS per banda vocale: una rfft + un prodotto matrice sullo stesso blocco dell'RMS (Parseval)"""
+
+    def __init__(self, bands=VOICE_BANDS, sample_rate=MIC_SAMPLE_RATE, max_fft=2048, quantum=128):
+        self.bands = bands
+        self.sample_rate = sample_rate
+        self.max_fft = max_fft
+        self.quantum = quantum
+        self.energy = np.zeros(len(bands), dtype=np.float32)
+        self._plans = {}
+
+    def _plan(self, n):
+        """Finestra e matrice bin -> banda per lunghezza di blocco (n multiplo di quantum: pochi piani)"""
+        plan = self._plans.get(n)
+        if plan is None:
+            nfft = 1 << (n - 1).bit_length()
+            window = np.hanning(n).astype(np.float32)
+            freqs = np.fft.rfftfreq(nfft, 1.0 / self.sample_rate)
+            matrix = np.zeros((len(self.bands), len(freqs)), dtype=np.float64)
+            for i, (_, f_lo, f_hi) in enumerate(self.bands):
+                matrix[i, (freqs >= f_lo) & (freqs < f_hi)] = 2.0
+            # Potenza media per banda del segnale, al netto dell'energia della finestra
+            matrix /= nfft * float(np.dot(window, window))
+            plan = self._plans[n] = (nfft, window, matrix)
+        return plan
+
+    def measure(self, window):
+        """Energia RMS di ogni banda sugli ultimi campioni del blocco"""
+        n = min(len(window), self.max_fft) // self.quantum * self.quantum
+        if n == 0:
+            self.energy.fill(0.0)
+            return self.energy
+        nfft, hann, matrix = self._plan(n)
+        spec = np.fft.rfft(window[-n:] * hann, nfft)
+        power = spec.real * spec.real + spec.imag * spec.imag
+        np.sqrt(matrix @ power, out=self.energy, casting='same_kind')
+        return self.energy
+
+
+# ============================================
+# VOICE ONSET DETECTOR (VAD -> eventi "flap")
+# ============================================
+
+@dataclass
+class VoiceEvent:
+    """Evento flap discreto: intensità 0..1, posizione nel ring e istante ADC (perf_counter)"""
+    intensity: float
+    sample_pos: int
+    adc_time: float = None
+
+class VoiceOnsetDetector:
+    """Envelope follower + spectral flux + gate con isteresi, un passaggio NumPy per blocco"""
+
+    def __init__(self, hop=256, max_hops=64, sample_rate=MIC_SAMPLE_RATE,
+                 release_ms=60.0, gate_on=0.10, gate_off=0.04,
+                 flux_on=0.6, rise_ratio=1.5, refractory_ms=90.0):
+        self.hop = hop
+        self.gate_on = gate_on
+        self.gate_off = gate_off
+        self.flux_on = flux_on
+        self.rise_ratio = rise_ratio
+        self.release = math.exp(-hop / (sample_rate * release_ms / 1000.0))
+        self.refractory_hops = max(1, int(refractory_ms / 1000.0 * sample_rate / hop))
+
+        self.window = np.hanning(hop).astype(np.float32)
+        self._pending = np.zeros(hop * max_hops, dtype=np.float32)
+        self._pending_len = 0
+        self._hop_index = np.arange(max_hops)
+        self._decay = self.release ** np.arange(1, max_hops + 1)
+        self._prev_mag = np.zeros(hop // 2 + 1, dtype=np.float32)
+        self._prev_rms = 0.0
+        self._hops_since_event = self.refractory_hops
+        # Eventi in attesa: [evento, picco, hop mancanti alla chiusura della finestra]
+        self._open_events = []
+        self.cursor = None
+
+        self.envelope = 0.0
+        self.level = 0.0
+        self.gate = False
+
+    def reset(self):
+        self._pending_len = 0
+        self._prev_mag.fill(0.0)
+        self._prev_rms = 0.0
+        self.envelope = 0.0
+        self.level = 0.0
+        self.gate = False
+        self._open_events = []
+        self.cursor = None
+
+    def process(self, ring, silence_threshold, shout_threshold):
+        """Analizza i campioni nuovi del ring e ritorna la lista di VoiceEvent"""
+        if self.cursor is None:
+            self.cursor = ring.write_pos
+        data, self.cursor = ring.read_since(self.cursor, self._pending[self._pending_len:])
+        n_total = self._pending_len + len(data)
+        n_hops = n_total // self.hop
+        if n_hops == 0:
+            self._pending_len = n_total
+            return []
+
+        hop = self.hop
+        frames = self._pending[:n_hops * hop].reshape(n_hops, hop)
+        rms = np.sqrt(np.einsum('ij,ij->i', frames, frames) / hop)
+
+        # Envelope follower: attacco istantaneo, rilascio esponenziale (forma chiusa)
+        decay = self._decay[:n_hops]
+        env = decay * np.maximum(self.envelope, np.maximum.accumulate(rms / decay))
+        span = max(shout_threshold - silence_threshold, 1e-4)
+        level = np.clip((env - silence_threshold) / span, 0.0, 1.0)
+
+        # Spectral flux relativo tra hop consecutivi
+        mags = np.abs(np.fft.rfft(frames * self.window, axis=1))
+        prev = np.vstack((self._prev_mag[None, :], mags[:-1]))
+        flux = np.maximum(mags - prev, 0.0).sum(axis=1) / (prev.sum(axis=1) + 1e-6)
+        prev_rms = np.concatenate(([self._prev_rms], rms[:-1]))
+        rising = rms > prev_rms * self.rise_ratio
+
+        # Gate con isteresi: l'ultimo attraversamento di soglia decide lo stato
+        idx = self._hop_index[:n_hops]
+        marks = np.where(level >= self.gate_on, 1, np.where(level <= self.gate_off, 0, -1))
+        last = np.maximum.accumulate(np.where(marks >= 0, idx, -1))
+        gate = np.where(last >= 0, marks[np.maximum(last, 0)], int(self.gate)).astype(bool)
+        prev_gate = np.concatenate(([self.gate], gate[:-1]))
+        opened = gate & ~prev_gate
+        retrigger = gate & prev_gate & rising & (flux > self.flux_on)
+
+        # Intensità = picco del livello nei refractory_hops dall'onset, anche oltre la fine
+        # del blocco: l'evento esce quando la finestra si chiude, così non dipende dal blocksize
+        base_pos = self.cursor - n_total
+        since = self._hops_since_event
+        for entry in self._open_events:
+            entry[1] = max(entry[1], float(level[:entry[2]].max()))
+            entry[2] -= n_hops
+        for i in np.flatnonzero(opened | retrigger):
+            if retrigger[i] and since + i < self.refractory_hops:
+                continue
+            window = level[i:i + self.refractory_hops]
+            self._open_events.append([VoiceEvent(0.0, base_pos + int(i) * hop), float(window.max()),
+                                      self.refractory_hops - len(window)])
+            since = -int(i)
+        self._hops_since_event = since + n_hops
+
+        events = []
+        while self._open_events and self._open_events[0][2] <= 0:
+            event, peak, _ = self._open_events.pop(0)
+            event.intensity = max(peak, self.gate_on)
+            events.append(event)
+
+        rem = n_total - n_hops * hop
+        self._pending[:rem] = self._pending[n_hops * hop:n_total]
+        self._pending_len = rem
+        self._prev_mag[:] = mags[-1]
+        self._prev_rms = float(rms[-1])
+        self.envelope = float(env[-1])
+        self.level = float(level[-1])
+        self.gate = bool(gate[-1])
+        return events
+
+
+# ============================================
+# STATISTICHE STREAMING (calibrazione, rumore di fondo)
+# ============================================
+
+NOISE_FLOOR_QUANTILE = 0.1       # Percentile basso dell'RMS durante il gioco
+NOISE_FLOOR_WINDOW = 120         # Frame per finestra di stima (~2 s)
+NOISE_FLOOR_ALPHA = 0.3          # Smoothing tra finestre
+
+class P2Quantile:
+    """Stima streaming di un quantile (algoritmo P² di Jain & Chlamtac), 5 marker"""
+
+    def __init__(self, q):
+        self.q = q
+        self.n = 0
+        self.heights = []
+        self.pos = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self.incr = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def add(self, x):
+        self.n += 1
+        h = self.heights
+        if self.n <= 5:
+            bisect.insort(h, x)
+            return
+
+        if x < h[0]:
+            h[0] = x
+            k = 0
+        elif x >= h[4]:
+            h[4] = x
+            k = 3
+        else:
+            k = bisect.bisect_right(h, x) - 1
+        pos = self.pos
+        for i in range(k + 1, 5):
+            pos[i] += 1
+        for i in range(5):
+            self.desired[i] += self.incr[i]
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - pos[i]
+            if (d >= 1 and pos[i + 1] - pos[i] > 1) or (d <= -1 and pos[i - 1] - pos[i] < -1):
+                d = 1 if d > 0 else -1
+                # Interpolazione parabolica, fallback lineare se esce dall'ordine
+                hp = h[i] + d / (pos[i + 1] - pos[i - 1]) * (
+                    (pos[i] - pos[i - 1] + d) * (h[i + 1] - h[i]) / (pos[i + 1] - pos[i]) +
+                    (pos[i + 1] - pos[i] - d) * (h[i] - h[i - 1]) / (pos[i] - pos[i - 1]))
+                if not h[i - 1] < hp < h[i + 1]:
+                    hp = h[i] + d * (h[i + d] - h[i]) / (pos[i + d] - pos[i])
+                h[i] = hp
+                pos[i] += d
+
+    def value(self):
+        if not self.heights:
+            return 0.0
+        if self.n < 5:
+            return self.heights[min(len(self.heights) - 1, int(self.q * len(self.heights)))]
+        return self.heights[2]
+
+class StreamingStats:
+    """Media/min/max (Welford) + quantili P² per la calibrazione, senza liste che crescono"""
+
+    def __init__(self, quantiles=(0.1, 0.9)):
+        self.count = 0
+        self.mean = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.estimators = {q: P2Quantile(q) for q in quantiles}
+
+    def append(self, x):
+        self.count += 1
+        self.mean += (x - self.mean) / self.count
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        for est in self.estimators.values():
+            est.add(x)
+
+    def quantile(self, q):
+        return self.estimators[q].value()
+
+    def __len__(self):
+        return self.count
+
+class NoiseFloorTracker:
+    """Percentile basso dell'RMS a finestre, smussato: il rumore di fondo durante il gioco"""
+
+    def __init__(self, quantile=NOISE_FLOOR_QUANTILE, window=NOISE_FLOOR_WINDOW, alpha=NOISE_FLOOR_ALPHA):
+        self.quantile = quantile
+        self.window = window
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        self.estimator = P2Quantile(self.quantile)
+        self.count = 0
+        self.floor = None
+
+    def add(self, rms):
+        """True quando una finestra è completa e floor è stato aggiornato"""
+        self.estimator.add(rms)
+        self.count += 1
+        if self.count < self.window:
+            return False
+        estimate = self.estimator.value()
+        self.floor = estimate if self.floor is None else self.floor + (estimate - self.floor) * self.alpha
+        self.estimator = P2Quantile(self.quantile)
+        self.count = 0
+        return True
+
+
+# ============================================
+# KEYWORD SPOTTER (MFCC + DTW, tutto offline)
+# ============================================
+
+KEYWORDS = ('start', 'jump', 'menu')
+
+def mel_filterbank(n_mels, n_fft, sample_rate, f_min, f_max):
+    """Matrice (n_mels, n_fft // 2 + 1) di filtri triangolari in scala mel"""
+    def to_mel(f):
+        return 2595.0 * np.log10(1.0 + f / 700.0)
+    mel_points = np.linspace(to_mel(f_min), to_mel(f_max), n_mels + 2)
+    hz_points = 700.0 * (10.0 ** (mel_points / 2595.0) - 1.0)
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    lower, center, upper = hz_points[:-2, None], hz_points[1:-1, None], hz_points[2:, None]
+    rising = (freqs[None, :] - lower) / (center - lower)
+    falling = (upper - freqs[None, :]) / (upper - center)
+    return np.maximum(0.0, np.minimum(rising, falling)).astype(np.float32)
+
+def dtw_distance(a, b, max_ratio=2.0):
+    """DTW vettorizzata sulle anti-diagonali, normalizzata sulla lunghezza del percorso"""
+    n, m = len(a), len(b)
+    if n == 0 or m == 0 or n > max_ratio * m or m > max_ratio * n:
+        return math.inf
+    diff = a[:, None, :] - b[None, :, :]
+    cost = np.sqrt(np.einsum('ijk,ijk->ij', diff, diff))
+    # Costo riordinato per anti-diagonale: skew[d - 2, i] = cost[i - 1, d - i - 1]
+    rows = np.arange(1, n + 1)[None, :]
+    cols = np.arange(2, n + m + 1)[:, None] - rows
+    skew = np.full((n + m - 1, n + 1), np.inf)
+    skew[:, 1:] = np.where((cols >= 1) & (cols <= m),
+                           cost[np.broadcast_to(rows - 1, cols.shape), np.clip(cols - 1, 0, m - 1)], np.inf)
+    # acc[i-1, j] e acc[i, j-1] stanno sulla diagonale precedente, acc[i-1, j-1] su quella prima
+    prev2 = np.full(n + 1, np.inf)
+    prev2[0] = 0.0
+    prev1 = np.full(n + 1, np.inf)
+    for diag in skew:
+        cur = np.full(n + 1, np.inf)
+        cur[1:] = diag[1:] + np.minimum(np.minimum(prev1[:-1], prev1[1:]), prev2[:-1])
+        prev2, prev1 = prev1, cur
+    return float(prev1[n] / (n + m))
+
+class KeywordSpotter:
+    """MFCC incrementali dal ring, segmentazione a energia, DTW contro i template registrati.
+    Budget fisso per chiamata: al massimo max_frames frame MFCC e dtw_per_call confronti DTW."""
+
+    def __init__(self, sample_rate=MIC_SAMPLE_RATE, n_fft=1024, hop=512, n_mels=26, n_ceps=13,
+                 f_min=80.0, f_max=7600.0, max_frames=8, dtw_per_call=1,
+                 min_frames=8, max_segment=120, hangover=15, preroll=2,
+                 max_distance=3.5, min_margin=0.85):
+        self.n_fft = n_fft
+        self.hop = hop
+        self.max_frames = max_frames
+        self.dtw_per_call = dtw_per_call
+        self.min_frames = min_frames
+        self.max_segment = max_segment
+        self.hangover = hangover
+        self.preroll = preroll
+        self.max_distance = max_distance
+        self.min_margin = min_margin
+
+        self.window = np.hamming(n_fft).astype(np.float32)
+        self.mel = mel_filterbank(n_mels, n_fft, sample_rate, f_min, f_max)
+        # DCT-II ortonormale, c0 (energia) scartato: i template non dipendono dal volume
+        k = np.arange(1, n_ceps)[:, None]
+        self.dct = (np.cos(np.pi * k * (np.arange(n_mels)[None, :] + 0.5) / n_mels)
+                    * math.sqrt(2.0 / n_mels)).astype(np.float32)
+        self._pending = np.zeros(n_fft + hop * max_frames, dtype=np.float32)
+        self._pending_len = 0
+        self._frame_index = np.arange(max_frames)[:, None] * hop + np.arange(n_fft)[None, :]
+        self._history = np.zeros((preroll, n_ceps - 1), dtype=np.float32)
+        self._segment = np.zeros((max_segment, n_ceps - 1), dtype=np.float32)
+        self._segment_len = 0
+        self._silent_frames = 0
+        self.cursor = None
+
+        self.templates = {}
+        self.recording = None
+        self._recorded = None
+        self._queue = []               # Confronti DTW in sospeso: (segmento, [(parola, template)], risultati)
+        self.last_match = None
+        self.last_cost_ms = 0.0
+
+    def has(self, word):
+        return word in self.templates
+
+    def set_templates(self, templates):
+        self.templates = {word: np.asarray(t, dtype=np.float32) for word, t in (templates or {}).items()
+                          if word in KEYWORDS and len(t) >= self.min_frames}
+
+    def template_lists(self):
+        return {word: np.round(t, 4).tolist() for word, t in self.templates.items()}
+
+    def set_recording(self, word):
+        """Registra il template di word (None = fine registrazione: tiene il segmento più lungo)"""
+        if word == self.recording:
+            return
+        if self.recording is not None and self._recorded is not None:
+            self.templates[self.recording] = self._recorded
+            print(f"✓ Parola '{self.recording}' registrata ({len(self._recorded)} frame)")
+        self.recording = word
+        self._recorded = None
+        self._segment_len = 0
+        self._silent_frames = 0
+
+    def features(self, frames):
+        """MFCC (c1..c12) di un blocco di frame, un solo passaggio NumPy"""
+        emphasized = np.empty_like(frames)
+        emphasized[:, 0] = frames[:, 0]
+        emphasized[:, 1:] = frames[:, 1:] - 0.97 * frames[:, :-1]
+        spec = np.fft.rfft(emphasized * self.window, axis=1)
+        power = spec.real * spec.real + spec.imag * spec.imag
+        log_mel = np.log(power @ self.mel.T + 1e-10)
+        return log_mel @ self.dct.T
+
+    def process(self, ring, silence_threshold):
+        """Consuma i campioni nuovi del ring; ritorna le parole riconosciute in questa chiamata"""
+        t0 = time.perf_counter()
+        if self.cursor is None:
+            self.cursor = ring.write_pos
+        data, self.cursor = ring.read_since(self.cursor, self._pending[self._pending_len:])
+        total = self._pending_len + len(data)
+        n_frames = min(self.max_frames, (total - self.n_fft) // self.hop + 1) if total >= self.n_fft else 0
+
+        if n_frames > 0:
+            frames = self._pending[self._frame_index[:n_frames]]
+            rms = np.sqrt(np.einsum('ij,ij->i', frames, frames) / self.n_fft)
+            ceps = self.features(frames)
+            for i in range(n_frames):
+                self._segment_frame(ceps[i], rms[i] > silence_threshold)
+            consumed = n_frames * self.hop
+            self._pending[:total - consumed] = self._pending[consumed:total]
+            total -= consumed
+        self._pending_len = total
+
+        words = self._match_step()
+        self.last_cost_ms = (time.perf_counter() - t0) * 1000.0
+        return words
+
+    def _segment_frame(self, ceps, speech):
+        """VAD a energia con preroll e hangover: un segmento chiuso va al match (o al template)"""
+        if self._segment_len == 0:
+            if speech:
+                self._segment[:self.preroll] = self._history
+                self._segment_len = self.preroll
+                self._silent_frames = 0
+            else:
+                self._history[:-1] = self._history[1:]
+                self._history[-1] = ceps
+                return
+        self._segment[self._segment_len] = ceps
+        self._segment_len += 1
+        self._silent_frames = 0 if speech else self._silent_frames + 1
+        if self._silent_frames >= self.hangover or self._segment_len >= self.max_segment:
+            voiced = self._segment_len - self._silent_frames
+            if voiced - self.preroll >= self.min_frames:
+                self._close_segment(self._segment[:voiced].copy())
+            self._segment_len = 0
+            self._silent_frames = 0
+
+    def _close_segment(self, segment):
+        # Normalizzazione cepstrale (CMN): toglie la colorazione fissa di mic e stanza
+        segment -= segment.mean(axis=0)
+        if self.recording is not None:
+            if self._recorded is None or len(segment) > len(self._recorded):
+                self._recorded = segment
+        elif self.templates:
+            self._queue.append((segment, list(self.templates.items()), []))
+
+    def _match_step(self):
+        """Al massimo dtw_per_call confronti per chiamata; la decisione arriva a coda finita"""
+        words = []
+        budget = self.dtw_per_call
+        while self._queue and budget > 0:
+            segment, todo, results = self._queue[0]
+            while todo and budget > 0:
+                word, template = todo.pop()
+                results.append((dtw_distance(segment, template), word))
+                budget -= 1
+            if todo:
+                break
+            self._queue.pop(0)
+            results.sort()
+            best, word = results[0]
+            second = results[1][0] if len(results) > 1 else math.inf
+            self.last_match = (word, best)
+            if best <= self.max_distance and best <= self.min_margin * second:
+                words.append(word)
+        return words
+
+
+# ============================================
+# PITCH TRACKER (YIN via autocorrelazione FFT)
+# ============================================
+
+PITCH_LOW_HZ = 110.0             # Voce bassa -> fondo dello schermo
+PITCH_HIGH_HZ = 440.0            # Voce alta -> cima dello schermo
+
+class PitchTracker:
+    """YIN vettorizzato: una FFT di dimensione fissa per frame, costo indipendente dal blocksize"""
+
+    def __init__(self, ring, sample_rate=MIC_SAMPLE_RATE, integration=1024,
+                 f_min=80.0, f_max=1000.0, threshold=0.15, max_aperiodicity=0.35,
+                 smoothing=0.35):
+        self.ring = ring
+        self.sample_rate = sample_rate
+        self.W = integration
+        self.tau_min = max(2, int(sample_rate / f_max))
+        self.tau_max = min(integration, int(sample_rate / f_min) + 1)
+        self.size = integration + self.tau_max
+        self.nfft = 1 << int(math.ceil(math.log2(self.size + integration)))
+        self.threshold = threshold
+        self.max_aperiodicity = max_aperiodicity
+        self.smoothing = smoothing
+
+        self._samples = np.zeros(self.size, dtype=np.float32)
+        self._taus = np.arange(1, self.tau_max, dtype=np.float64)
+        self._frame = -1
+        self.pitch = None
+        self.smoothed = None
+        self.last_cost_ms = 0.0
+
+    def estimate(self, x):
+        """Ritorna (f0 Hz, aperiodicità) oppure (None, aperiodicità) se non intonato"""
+        W, tau_max = self.W, self.tau_max
+        x = x.astype(np.float64)
+        # Funzione differenza: d(tau) = E0 + E(tau) - 2 * acf(tau)
+        spec = np.fft.rfft(x, self.nfft)
+        spec_head = np.fft.rfft(x[:W], self.nfft)
+        acf = np.fft.irfft(spec * np.conj(spec_head), self.nfft)[:tau_max]
+        energy = np.concatenate(([0.0], np.cumsum(x * x)))
+        e0 = energy[W]
+        e_tau = energy[W:W + tau_max] - energy[:tau_max]
+        diff = e0 + e_tau - 2.0 * acf
+
+        # Differenza cumulativa normalizzata (CMND)
+        cmnd = np.ones(tau_max)
+        cmnd[1:] = diff[1:] * self._taus / np.maximum(np.cumsum(diff[1:]), 1e-12)
+
+        search = cmnd[self.tau_min:]
+        below = np.flatnonzero(search < self.threshold)
+        if len(below):
+            tau = below[0]
+            rise = np.flatnonzero(np.diff(search[tau:]) >= 0)
+            if len(rise):
+                tau += rise[0]
+        else:
+            tau = int(np.argmin(search))
+        tau += self.tau_min
+        aperiodicity = float(cmnd[tau])
+        if aperiodicity > self.max_aperiodicity:
+            return None, aperiodicity
+
+        # Interpolazione parabolica attorno al minimo
+        if 0 < tau < tau_max - 1:
+            a, b, c = cmnd[tau - 1], cmnd[tau], cmnd[tau + 1]
+            denom = a - 2 * b + c
+            shift = 0.5 * (a - c) / denom if abs(denom) > 1e-12 else 0.0
+        else:
+            shift = 0.0
+        return float(self.sample_rate / (tau + shift)), aperiodicity
+
+    def update(self, frame_index):
+        """Al massimo una stima per frame sugli ultimi campioni del ring"""
+        if frame_index == self._frame:
+            return self.smoothed
+        self._frame = frame_index
+        t0 = time.perf_counter()
+        samples = self.ring.read_latest(self.size, out=self._samples)
+        if len(samples) < self.size:
+            self.pitch = None
+        else:
+            self.pitch, _ = self.estimate(samples)
+        if self.pitch is None:
+            self.smoothed = None
+        elif self.smoothed is None:
+            self.smoothed = self.pitch
+        else:
+            # Smoothing in dominio logaritmico (semitoni)
+            log_p = math.log2(self.smoothed) + (math.log2(self.pitch) - math.log2(self.smoothed)) * (1 - self.smoothing)
+            self.smoothed = 2.0 ** log_p
+        self.last_cost_ms = (time.perf_counter() - t0) * 1000.0
+        return self.smoothed
+
+    @staticmethod
+    def target_y(pitch, scr_h, margin):
+        """Mappa il pitch (scala log) sull'altezza dello schermo"""
+        frac = math.log2(pitch / PITCH_LOW_HZ) / math.log2(PITCH_HIGH_HZ / PITCH_LOW_HZ)
+        frac = max(0.0, min(1.0, frac))
+        return scr_h - margin - frac * (scr_h - 2 * margin)
+
+
+def benchmark_control_paths(frames=600, sample_rate=MIC_SAMPLE_RATE):
+    """Confronta il costo per frame del percorso RMS/onset con bande voce e pitch tracker"""
+    ring = MicRingBuffer(int(sample_rate * MIC_RING_SECONDS))
+    onset = VoiceOnsetDetector()
+    voice_bands = VoiceBandAnalyzer(sample_rate=sample_rate)
+    tracker = PitchTracker(ring)
+    hop = sample_rate // 60
+    t = np.arange(hop * frames) / sample_rate
+    voice = 0.2 * np.sin(2 * np.pi * 220.0 * t) * (np.sin(2 * np.pi * 1.5 * t) > 0)
+    signal = (voice + np.random.normal(0, 0.005, len(t))).astype(np.float32)
+
+    rms_ms, bands_ms, pitch_ms = [], [], []
+    for i in range(frames):
+        ring.write(signal[i * hop:(i + 1) * hop])
+        t0 = time.perf_counter()
+        window = ring.frame_window()
+        float(np.sqrt(np.dot(window, window) / len(window)))
+        onset.process(ring, 0.02, 0.15)
+        t1 = time.perf_counter()
+        voice_bands.measure(window)
+        t2 = time.perf_counter()
+        tracker.update(i)
+        t3 = time.perf_counter()
+        rms_ms.append((t1 - t0) * 1000.0)
+        bands_ms.append((t2 - t1) * 1000.0)
+        pitch_ms.append((t3 - t2) * 1000.0)
+
+    budget = 1000.0 / 60
+    for name, values in (("RMS + onset", rms_ms), ("Bande voce", bands_ms), ("Pitch (YIN)", pitch_ms)):
+        print(f"  {name:12s} mean {np.mean(values):.3f} ms | p99 {np.percentile(values, 99):.3f} ms "
+              f"| {100 * np.mean(values) / budget:.2f}% del frame")
+    return rms_ms, bands_ms, pitch_ms